@@ -1,36 +1,170 @@
 import csv
+import hashlib
+import hmac
 import time
+from collections import deque
+from itertools import chain
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from concurrent.futures import as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from fastapi import HTTPException, status
-import requests
 from kiteconnect import KiteConnect
 from kiteconnect.exceptions import KiteException
 
 from app.core.config import settings
 from app.core.database import SessionLocal
 from app.models.app_setting import AppSetting
+from app.models.instrument import Instrument
+from app.services.candle_aggregator import CandleAggregator, bar_to_candle
+from app.services.history_export import ExportJob, HistoryExporter
+from app.services.index_refresher import NSE_INDICES, IndexConstituentsRefresher
+from app.services.kite_client import KiteClient
+from app.services.kite_sessions import KiteSessionPool, UserSession
+from app.services.iv_surface import IVSurfaceEngine
+from app.services.market_movers import MarketMovers
+from app.services.market_snapshot import QUOTE_BATCH_SIZE, MarketSnapshot, SnapshotFrame
+from app.services.market_stream import MarketStream
+from app.services.pnl_engine import PnLEngine
+from app.services.option_chain import OptionIndex, build_chain, spot_key
+from app.services.order_book import TERMINAL_STATUSES, OrderBook
+from app.services.pnl_engine import HOLDING, POSITION
+from app.services.simulated_market import SimulatedKite, SimulatedMarket, SimulatedTicker
+from app.services.tick_journal import TickJournal, TickReplayer
+from app.utils.concurrency import history_executor, order_executor
+from app.utils.downsample import lttb, ohlc_buckets
+from app.utils.rate_limiter import TokenBucket
+from app.utils.server_timing import span
+from app.utils.swr_cache import SWRCache, swr_cached
+from app.utils.cache_snapshot import load_snapshot, save_snapshot
+
+
+def _ist_now() -> datetime:
+    # Naive IST wall time: Kite reads naive timestamps as IST.
+    return datetime.utcnow() + timedelta(hours=5, minutes=30)
 
 
 class MarketDataController:
     _TOKEN_SETTING_KEY = "zerodha_access_token"
+    # Kite user id of an account: "<key>" for the service account, "<key>:<app user>" per user,
+    # and "<key>-owner:<kite user>" maps a Kite user id back to the app user.
+    _BROKER_USER_SETTING_KEY = "zerodha_broker_user_id"
+    # Shared, non-account caches that survive restarts. Entries keep their original
+    # timestamps so TTL checks behave exactly as if the worker had never stopped.
+    _SNAPSHOT_CACHES = ("_instruments_cache", "_index_cache", "_candles_cache", "_movers_reference")
 
     def __init__(self) -> None:
-        self.api_key = settings.ZERODHA_API_KEY
-        self.api_secret = settings.ZERODHA_API_SECRET
-        self.access_token = settings.ZERODHA_ACCESS_TOKEN or None
-        self.kite = KiteConnect(api_key=self.api_key) if self.api_key else None
-        if self.kite and self.access_token:
-            self.kite.set_access_token(self.access_token)
-
-        self._instruments_cache: Dict[str, Any] = {"data": None, "ts": 0}
-        self._quotes_cache: Dict[str, Dict[str, Any]] = {}
-        self._positions_cache: Dict[str, Any] = {"data": None, "ts": 0}
-        self._holdings_cache: Dict[str, Any] = {"data": None, "ts": 0}
-        self._candles_cache: Dict[str, Dict[str, Any]] = {}
+        # Simulated mode needs no credentials: placeholders satisfy every token check.
+        self.simulated = settings.MARKET_DATA_MODE == "simulated"
+        placeholder = "simulated" if self.simulated else ""
+        self.api_key = settings.ZERODHA_API_KEY or placeholder
+        self.api_secret = settings.ZERODHA_API_SECRET or placeholder
+        self.access_token = settings.ZERODHA_ACCESS_TOKEN or placeholder or None
+        self._kite: Optional[KiteConnect] = None
+        self._simulated_market: Optional[SimulatedMarket] = None
+        # Kite user id -> app user id, and the service account's own Kite user id.
+        self._broker_owners: Dict[str, Optional[str]] = {}
+        self._service_broker_user: Optional[str] = None
+
+        self._instruments_cache = SWRCache(soft_ttl=600, hard_ttl=86400, negative_ttl=30, name="instruments")
+        self._symbol_index: Dict[str, Any] = {"data": None, "ts": 0}
+        self._nse_universe_cache: Optional[List[Dict[str, str]]] = None
+        self._quotes_cache = SWRCache(soft_ttl=3, hard_ttl=15, negative_ttl=3, name="quotes")
+        self._candles_cache = SWRCache(soft_ttl=10, hard_ttl=120, negative_ttl=10, name="candles")
+        self._option_index_cache = SWRCache(soft_ttl=3600, hard_ttl=86400, negative_ttl=30, name="option_index")
+        self.iv_surface = IVSurfaceEngine(
+            settings.RISK_FREE_RATE,
+            spot_tolerance=settings.IV_SURFACE_SPOT_TOLERANCE,
+            full_refresh_seconds=settings.IV_SURFACE_FULL_REFRESH_SECONDS,
+        )
         self._index_cache: Dict[str, Dict[str, Any]] = {}
+        self.index_refresher = IndexConstituentsRefresher(self._index_cache)
+        self.market_snapshot = MarketSnapshot(
+            self._snapshot_universe,
+            self._fetch_quotes,
+            interval_seconds=settings.MARKET_SNAPSHOT_INTERVAL_SECONDS,
+            idle_interval_seconds=settings.MARKET_SNAPSHOT_IDLE_INTERVAL_SECONDS,
+            market_open=self._is_market_open,
+        )
+        self.market_snapshot.add_listener(self._seed_quotes)
+        self._movers_reference: Dict[str, Dict[str, Any]] = {}
+        # Zerodha allows 3 historical data requests per second.
+        self._historical_rate = TokenBucket(rate=3, capacity=3, name="historical")
+        self.market_movers = MarketMovers(
+            self._movers_reference,
+            self._reference_stats,
+            self._index_members,
+            self._session_progress,
+            history_executor.submit,
+        )
+        self.market_snapshot.add_listener(self.market_movers.on_frame)
+        # Account data lives in per-user sessions; everything above is shared.
+        self.sessions = KiteSessionPool(
+            self.api_key,
+            self._load_user_access_token,
+            max_sessions=settings.KITE_SESSION_POOL_SIZE,
+            idle_ttl_seconds=settings.KITE_SESSION_IDLE_SECONDS,
+            client_factory=self._simulated_client if self.simulated else None,
+        )
+        self.sessions.add_create_hook(self._on_session_created)
+        self.market_stream = MarketStream()
+        self.market_stream.add_order_listener(self._route_order_update)
+        self.market_stream.add_tick_listener(self._on_ticks)
+        # The simulated feed ticks at any hour, so its bars are not cut to NSE hours.
+        self.candle_aggregator = CandleAggregator(session_hours=not self.simulated)
+        self.market_stream.add_tick_listener(self.candle_aggregator.on_ticks)
+        self.tick_journal = TickJournal(
+            self._tick_journal_path(),
+            chunk_ticks=settings.TICK_JOURNAL_CHUNK_TICKS,
+            flush_seconds=settings.TICK_JOURNAL_FLUSH_SECONDS,
+        )
+        if settings.TICK_JOURNAL_ENABLED:
+            self.market_stream.journal = self.tick_journal
+        # Replays run through their own stream, aggregator and P&L engine (see start_replay),
+        # never the live ones that connected users read from.
+        self.tick_replayer = TickReplayer(self.tick_journal, lambda ticks: None)
+        self.replay_aggregator: Optional[CandleAggregator] = None
+        self.replay_pnl: Optional[PnLEngine] = None
+        self.history_exporter = HistoryExporter(
+            self._export_history,
+            self._export_path(),
+            concurrency=settings.EXPORT_CONCURRENCY,
+            keep_jobs=settings.EXPORT_KEEP_JOBS,
+        )
+
+    @property
+    def kite(self) -> Optional[KiteConnect]:
+        # The client is built on first use so importing the controller stays cheap.
+        if self._kite is None and self.api_key:
+            if self.simulated:
+                self._kite = self._simulated_client("service")
+            else:
+                self._kite = KiteClient(api_key=self.api_key, root=settings.ZERODHA_API_ROOT or None)
+            if self.access_token:
+                self._kite.set_access_token(self.access_token)
+        return self._kite
+
+    @property
+    def simulated_market(self) -> SimulatedMarket:
+        if self._simulated_market is None:
+            universe = {entry["symbol"]: entry.get("underlying") or entry["symbol"] for entry in self._nse_universe_entries()}
+            for symbol in self._nifty_category_symbols("banks") + self._nifty50_symbols():
+                universe.setdefault(symbol, symbol)
+            for i in range(settings.SIMULATED_EXTRA_SYMBOLS):
+                universe[f"SIM{i:05d}"] = f"Simulated {i}"
+            self._simulated_market = SimulatedMarket(
+                universe,
+                ticks_per_second=settings.SIMULATED_TICKS_PER_SECOND,
+                volatility=settings.SIMULATED_VOLATILITY,
+                correlation=settings.SIMULATED_CORRELATION,
+                seed=settings.SIMULATED_SEED,
+                starting_cash=settings.SIMULATED_STARTING_CASH,
+            )
+        return self._simulated_market
+
+    def _simulated_client(self, user_id: str) -> SimulatedKite:
+        return SimulatedKite(self.simulated_market, user_id)
 
     def _env_path(self) -> Path:
         return Path(__file__).resolve().parents[2] / ".env"
@@ -38,10 +172,55 @@ class MarketDataController:
     def _nse_universe_path(self) -> Path:
         return Path(__file__).resolve().parents[1] / "data" / "nse_universe.csv"
 
-    def _load_access_token_from_db(self) -> Optional[str]:
+    def _cache_snapshot_path(self) -> Path:
+        path = Path(settings.CACHE_SNAPSHOT_PATH)
+        if not path.is_absolute():
+            path = Path(__file__).resolve().parents[2] / path
+        return path
+
+    def _tick_journal_path(self) -> Path:
+        path = Path(settings.TICK_JOURNAL_DIR)
+        if not path.is_absolute():
+            path = Path(__file__).resolve().parents[2] / path
+        return path
+
+    def _export_path(self) -> Path:
+        path = Path(settings.EXPORT_DIR)
+        if not path.is_absolute():
+            path = Path(__file__).resolve().parents[2] / path
+        return path
+
+    def save_cache_snapshot(self) -> None:
+        caches = {}
+        for name in self._SNAPSHOT_CACHES:
+            cache = getattr(self, name)
+            caches[name] = cache.snapshot() if isinstance(cache, SWRCache) else dict(cache)
+        save_snapshot(self._cache_snapshot_path(), caches)
+
+    def restore_cache_snapshot(self) -> int:
+        caches = load_snapshot(self._cache_snapshot_path())
+        if not caches:
+            return 0
+        restored = 0
+        for name in self._SNAPSHOT_CACHES:
+            if name in caches:
+                cache = getattr(self, name)
+                if isinstance(cache, SWRCache):
+                    cache.restore(caches[name])
+                else:
+                    # Update in place: background services hold references to these dicts.
+                    cache.clear()
+                    cache.update(caches[name])
+                restored += 1
+        return restored
+
+    def _user_token_key(self, user_id: str) -> str:
+        return f"{self._TOKEN_SETTING_KEY}:{user_id}"
+
+    def _load_access_token_from_db(self, key: Optional[str] = None) -> Optional[str]:
         db = SessionLocal()
         try:
-            row = db.query(AppSetting).filter(AppSetting.key == self._TOKEN_SETTING_KEY).first()
+            row = db.query(AppSetting).filter(AppSetting.key == (key or self._TOKEN_SETTING_KEY)).first()
             return row.value if row else None
         finally:
             db.close()
@@ -73,18 +252,25 @@ class MarketDataController:
             new_lines.append(f"ZERODHA_ACCESS_TOKEN={token}")
         env_path.write_text("\n".join(new_lines) + "\n", encoding="utf-8")
 
-    def _persist_access_token(self, token: str) -> None:
+    def _store_access_token(self, key: str, token: str) -> None:
+        if self.simulated:
+            return
         db = SessionLocal()
         try:
-            row = db.query(AppSetting).filter(AppSetting.key == self._TOKEN_SETTING_KEY).first()
+            row = db.query(AppSetting).filter(AppSetting.key == key).first()
             if row:
                 row.value = token
             else:
-                row = AppSetting(key=self._TOKEN_SETTING_KEY, value=token)
+                row = AppSetting(key=key, value=token)
                 db.add(row)
             db.commit()
         finally:
             db.close()
+
+    def _persist_access_token(self, token: str) -> None:
+        if self.simulated:
+            return
+        self._store_access_token(self._TOKEN_SETTING_KEY, token)
         self._write_access_token_to_env(token)
 
     def _load_access_token(self) -> Optional[str]:
@@ -93,6 +279,86 @@ class MarketDataController:
             return token
         return self._load_access_token_from_env_file()
 
+    def _load_user_access_token(self, user_id: str) -> Tuple[Optional[str], bool]:
+        if self.simulated:
+            return f"simulated-{user_id}", False
+        token = self._load_access_token_from_db(self._user_token_key(user_id))
+        if token:
+            return token, False
+        if not settings.ZERODHA_SHARED_SESSION_FALLBACK:
+            return None, False
+        if not self.access_token:
+            self.access_token = self._load_access_token()
+        return self.access_token, True
+
+    def _session(self, user_id: Optional[str]) -> UserSession:
+        return self.sessions.get(user_id or "anonymous")
+
+    def order_book_for(self, user_id: str) -> OrderBook:
+        return self._session(user_id).order_book
+
+    def _on_session_created(self, session: UserSession) -> None:
+        if self.simulated:
+            # Paper accounts are keyed by app user, and so are their order updates.
+            session.broker_user_id = session.user_id
+        elif session.user_id != "anonymous":
+            # Restored after a restart or eviction: the login that set this is long gone.
+            session.broker_user_id = self._load_access_token_from_db(self._broker_user_key(session.user_id))
+        if self.market_stream.connected:
+            session.use_streaming_ttls()
+
+    def _broker_user_key(self, user_id: str) -> str:
+        return f"{self._BROKER_USER_SETTING_KEY}:{user_id}"
+
+    def _broker_owner_key(self, broker_user_id: str) -> str:
+        return f"{self._BROKER_USER_SETTING_KEY}-owner:{broker_user_id}"
+
+    def _store_broker_user(self, user_id: str, broker_user_id: str) -> None:
+        self._broker_owners[broker_user_id] = user_id
+        self._store_access_token(self._broker_user_key(user_id), broker_user_id)
+        self._store_access_token(self._broker_owner_key(broker_user_id), user_id)
+
+    def _broker_owner(self, broker_user_id: str) -> Optional[str]:
+        if self.simulated:
+            return broker_user_id
+        if broker_user_id not in self._broker_owners:
+            self._broker_owners[broker_user_id] = self._load_access_token_from_db(self._broker_owner_key(broker_user_id))
+        return self._broker_owners[broker_user_id]
+
+    def _service_broker_user_id(self) -> Optional[str]:
+        if self._service_broker_user is None and not self.simulated:
+            self._service_broker_user = self._load_access_token_from_db(self._BROKER_USER_SETTING_KEY)
+            if self._service_broker_user is None and self.kite and self.access_token:
+                # Service logins from before the id was stored: ask Kite once.
+                try:
+                    self._service_broker_user = self.kite.profile().get("user_id")
+                except KiteException as exc:
+                    print(f"Unable to resolve the service account's Kite user id: {exc}")
+                if self._service_broker_user:
+                    self._store_access_token(self._BROKER_USER_SETTING_KEY, self._service_broker_user)
+        return self._service_broker_user
+
+    def _on_ticks(self, ticks: List[Dict[str, Any]]) -> None:
+        for session in self.sessions.active():
+            session.pnl_engine.on_ticks(ticks)
+
+    def _route_order_update(self, update: Dict[str, Any]) -> None:
+        broker_user_id = update.get("user_id")
+        sessions = self.sessions.for_broker_user(broker_user_id)
+        if not sessions and broker_user_id:
+            owner = self._broker_owner(broker_user_id)
+            if owner:
+                # The owner's session was evicted or not rebuilt yet; recreate it.
+                sessions = [self.sessions.get(owner)]
+            elif broker_user_id == self._service_broker_user_id():
+                # Updates for the deployment-wide account go to everyone sharing it.
+                sessions = self.sessions.shared_sessions()
+        if not sessions:
+            print(f"Dropping order update for unknown Kite user {broker_user_id!r}")
+            return
+        for session in sessions:
+            session.order_book.apply(update, pushed=True)
+
     def _require_kite(self) -> KiteConnect:
         if not self.kite:
             raise HTTPException(
@@ -117,14 +383,18 @@ class MarketDataController:
             )
         return self.kite.login_url()
 
-    def create_session(self, request_token: str) -> Dict[str, Any]:
+    def create_session(self, request_token: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         if not self.kite or not self.api_secret:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Zerodha API key/secret is not configured.",
             )
+        user_session = self.sessions.get(user_id) if user_id else None
+        # generate_session sets the token on the client it runs on, so a user's login
+        # must not go through the shared service client.
+        client = user_session.kite if user_session else self.kite
         try:
-            session = self.kite.generate_session(request_token, api_secret=self.api_secret)
+            session = client.generate_session(request_token, api_secret=self.api_secret)
         except KiteException as exc:
             error_detail = getattr(exc, "message", None) or str(exc)
             print(f"Zerodha session error: {error_detail}")
@@ -132,16 +402,34 @@ class MarketDataController:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Unable to create Zerodha session. Please check the request token.",
             ) from exc
-        self.access_token = session.get("access_token")
-        if self.access_token:
-            self.kite.set_access_token(self.access_token)
-            self._persist_access_token(self.access_token)
+        token = session.get("access_token")
+        if not token:
+            return session
+        broker_user_id = session.get("user_id")
+        if user_session:
+            user_session.set_access_token(token)
+            user_session.broker_user_id = broker_user_id
+            self._store_access_token(self._user_token_key(user_session.user_id), token)
+            if broker_user_id:
+                self._store_broker_user(user_session.user_id, broker_user_id)
+        if not user_session or not self.access_token:
+            # Legacy single-account flow, or the first login becomes the service session
+            # used for shared market data.
+            self.access_token = token
+            self.kite.set_access_token(token)
+            self._persist_access_token(token)
+            if broker_user_id:
+                self._service_broker_user = broker_user_id
+                self._store_access_token(self._BROKER_USER_SETTING_KEY, broker_user_id)
+            for shared_session in self.sessions.active():
+                if shared_session.shared or not shared_session.access_token:
+                    shared_session.set_access_token(token, shared=True)
+        for cache in (self._instruments_cache, self._quotes_cache, self._candles_cache):
+            cache.clear_errors()
         return session
 
-    def _cached_instruments(self, ttl_seconds: int = 600) -> List[Dict[str, Any]]:
-        now = time.time()
-        if self._instruments_cache["data"] and now - self._instruments_cache["ts"] < ttl_seconds:
-            return self._instruments_cache["data"]
+    @swr_cached("_instruments_cache")
+    def _cached_instruments(self) -> List[Dict[str, Any]]:
         kite = self._require_kite()
         try:
             instruments = kite.instruments("NSE")
@@ -150,11 +438,13 @@ class MarketDataController:
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail="Unable to fetch instruments from Zerodha.",
             ) from exc
-        self._instruments_cache = {"data": instruments, "ts": now}
         return instruments
 
     def _symbol_map(self) -> Dict[str, Dict[str, Any]]:
         instruments = self._cached_instruments()
+        instruments_ts = self._instruments_cache.timestamp()
+        if self._symbol_index["data"] is not None and self._symbol_index["ts"] == instruments_ts:
+            return self._symbol_index["data"]
         symbol_map = {}
         for inst in instruments:
             if inst.get("segment") != "NSE":
@@ -162,9 +452,12 @@ class MarketDataController:
             if inst.get("instrument_type") != "EQ":
                 continue
             symbol_map[inst.get("tradingsymbol")] = inst
+        self._symbol_index = {"data": symbol_map, "ts": instruments_ts}
         return symbol_map
 
     def _nse_universe_entries(self) -> List[Dict[str, str]]:
+        if self._nse_universe_cache is not None:
+            return self._nse_universe_cache
         path = self._nse_universe_path()
         if not path.exists():
             raise HTTPException(
@@ -186,49 +479,34 @@ class MarketDataController:
                         "symbol": symbol,
                     }
                 )
+        self._nse_universe_cache = entries
         return entries
 
     def _nse_universe_symbols(self) -> List[str]:
         return [entry["symbol"] for entry in self._nse_universe_entries()]
 
-    def _get_positions(self, ttl_seconds: int = 5) -> Dict[str, Any]:
-        now = time.time()
-        if self._positions_cache["data"] and now - self._positions_cache["ts"] < ttl_seconds:
-            return self._positions_cache["data"]
-        if not self.access_token:
-            self.access_token = self._load_access_token()
-        if not self.access_token:
-            self._positions_cache = {"data": [], "ts": now}
-            return []
-        kite = self._require_kite()
-        try:
-            positions = kite.positions().get("net", [])
-        except KiteException as exc:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Unable to fetch positions from Zerodha.",
-            ) from exc
-        self._positions_cache = {"data": positions, "ts": now}
-        return positions
-
     def _is_market_open(self) -> bool:
-        now = datetime.utcnow() + timedelta(hours=5, minutes=30)
+        if self.simulated:
+            return True
+        now = _ist_now()
         if now.weekday() >= 5:
             return False
         market_open = now.replace(hour=9, minute=15, second=0, microsecond=0)
         market_close = now.replace(hour=15, minute=30, second=0, microsecond=0)
         return market_open <= now <= market_close
 
-    def get_margins(self) -> Dict[str, Any]:
-        kite = self._require_kite()
-        try:
-            margins = kite.margins()
-        except KiteException as exc:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Unable to fetch margins from Zerodha.",
-            ) from exc
-        return margins
+    def _session_progress(self) -> float:
+        now = _ist_now()
+        market_open = now.replace(hour=9, minute=15, second=0, microsecond=0)
+        market_close = now.replace(hour=15, minute=30, second=0, microsecond=0)
+        if now <= market_open:
+            return 0.0
+        if now >= market_close or now.weekday() >= 5:
+            return 1.0
+        return (now - market_open) / (market_close - market_open)
+
+    def get_margins(self, user_id: str) -> Dict[str, Any]:
+        return self._session(user_id).get_margins()
 
     def get_quote(self, symbols: List[str]) -> Dict[str, Any]:
         if not symbols:
@@ -242,34 +520,71 @@ class MarketDataController:
                 detail="Unable to fetch quotes from Zerodha.",
             ) from exc
 
-    def get_orders(self) -> List[Dict[str, Any]]:
-        kite = self._require_kite()
-        try:
-            return kite.orders()
-        except KiteException as exc:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Unable to fetch orders from Zerodha.",
-            ) from exc
+    def get_orders(self, user_id: str, since: Optional[str] = None) -> Any:
+        session = self._session(user_id)
+        session.sync_order_book(self.market_stream.connected)
+        order_book = session.order_book
+        if since is None:
+            return order_book.list_orders()
+        epoch, _, since_version = since.partition(".")
+        version = order_book.version
+        cursor = order_book.cursor
+        if epoch != order_book.epoch or not since_version.isdigit() or int(since_version) > version:
+            # Cursor from another book (restart, eviction, another worker): hand back everything.
+            return {"cursor": cursor, "version": version, "reset": True, "unchanged": False, "orders": order_book.list_orders()}
+        if int(since_version) == version:
+            return {"cursor": cursor, "version": version, "reset": False, "unchanged": True, "orders": []}
+        return {
+            "cursor": cursor,
+            "version": version,
+            "reset": False,
+            "unchanged": False,
+            "orders": order_book.changes_since(int(since_version)),
+        }
 
-    def get_order_status(self, order_id: str) -> Dict[str, Any]:
-        kite = self._require_kite()
-        try:
-            history = kite.order_history(order_id)
-        except KiteException as exc:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Unable to fetch order status from Zerodha.",
-            ) from exc
-        if not history:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Order not found.",
-            )
-        return history[-1]
+    def start_stream(self) -> None:
+        self._require_kite()
+        ticker_factory = None
+        if self.simulated:
+            interval = settings.SIMULATED_TICK_INTERVAL_MS / 1000
+            ticker_factory = lambda: SimulatedTicker(self.simulated_market, interval)
+        self.market_stream.start(self.api_key, self.access_token, ticker_factory)
+        for session in self.sessions.active():
+            session.use_streaming_ttls()
+
+    def verify_postback(self, payload: Dict[str, Any]) -> bool:
+        if not self.api_secret:
+            return False
+        raw = f"{payload.get('order_id', '')}{payload.get('order_timestamp', '')}{self.api_secret}"
+        expected = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        return hmac.compare_digest(expected, str(payload.get("checksum") or ""))
+
+    def ingest_postback(self, payload: Dict[str, Any]) -> None:
+        if not self.verify_postback(payload):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid postback checksum.")
+        self.market_stream.ingest_order_update({key: value for key, value in payload.items() if key != "checksum"})
+
+    def get_order_status(self, user_id: str, order_id: str) -> Dict[str, Any]:
+        session = self._session(user_id)
+        order = session.order_book.get(order_id)
+        if order and (order.get("status") in TERMINAL_STATUSES or self._order_kept_current(session, order)):
+            return order
+        return session.fetch_order_status(order_id)
+
+    def _order_kept_current(self, session: UserSession, order: Dict[str, Any]) -> bool:
+        # The ticker only carries updates for the service account's token (every paper
+        # account in simulated mode); other accounts depend on postbacks, which may not
+        # be configured, so their entries are trusted only while a push is recent.
+        own_account = self.simulated or session.shared or (
+            session.broker_user_id is not None and session.broker_user_id == self._service_broker_user
+        )
+        if self.market_stream.connected and own_account:
+            return True
+        pushed_at = order.get("pushed_at")
+        return pushed_at is not None and time.time() - pushed_at < settings.ORDER_PUSH_FRESH_SECONDS
 
-    def get_order_margins(self, order: Dict[str, Any]) -> Dict[str, Any]:
-        kite = self._require_kite()
+    def get_order_margins(self, user_id: str, order: Dict[str, Any]) -> Dict[str, Any]:
+        kite = self._session(user_id).require_kite()
         params = {key: value for key, value in order.items() if value is not None}
         try:
             margin_list = kite.order_margins([params])
@@ -280,26 +595,6 @@ class MarketDataController:
             ) from exc
         return margin_list[0] if margin_list else {}
 
-    def _get_holdings(self, ttl_seconds: int = 10) -> List[Dict[str, Any]]:
-        now = time.time()
-        if self._holdings_cache["data"] and now - self._holdings_cache["ts"] < ttl_seconds:
-            return self._holdings_cache["data"]
-        if not self.access_token:
-            self.access_token = self._load_access_token()
-        if not self.access_token:
-            self._holdings_cache = {"data": [], "ts": now}
-            return []
-        kite = self._require_kite()
-        try:
-            holdings = kite.holdings()
-        except KiteException as exc:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Unable to fetch holdings from Zerodha.",
-            ) from exc
-        self._holdings_cache = {"data": holdings, "ts": now}
-        return holdings
-
     def _position_qty(self, position: Dict[str, Any]) -> int:
         if position is None:
             return 0
@@ -312,34 +607,98 @@ class MarketDataController:
             qty = buy_qty - sell_qty
         return qty or 0
 
-    def _get_quotes(self, instruments: List[str], ttl_seconds: int = 3) -> Dict[str, Any]:
-        now = time.time()
-        results: Dict[str, Any] = {}
-        missing: List[str] = []
-        for inst in instruments:
-            cached = self._quotes_cache.get(inst)
-            if cached and now - cached["ts"] < ttl_seconds:
-                results[inst] = cached["data"]
-            else:
-                missing.append(inst)
-
-        if missing:
-            if not self.access_token:
-                self.access_token = self._load_access_token()
-            if not self.access_token:
-                return results
-            kite = self._require_kite()
-            try:
-                quotes = kite.quote(missing)
-            except KiteException as exc:
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail="Unable to fetch live quotes from Zerodha.",
-                ) from exc
-            for key, value in quotes.items():
-                self._quotes_cache[key] = {"data": value, "ts": now}
-                results[key] = value
-        return results
+    def _get_quotes(self, instruments: List[str]) -> Dict[str, Any]:
+        return self._quotes_cache.get_many(instruments, self._fetch_quotes)
+
+    def _fetch_quotes(self, instruments: List[str]) -> Dict[str, Any]:
+        if not self.access_token:
+            self.access_token = self._load_access_token()
+        if not self.access_token:
+            return {}
+        kite = self._require_kite()
+        try:
+            return kite.quote(instruments)
+        except KiteException as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Unable to fetch live quotes from Zerodha.",
+            ) from exc
+
+    def _snapshot_universe(self) -> Dict[str, str]:
+        symbol_map = self._symbol_map()
+        symbols = (
+            self._segment_symbols("NIFTY50")
+            + self._segment_symbols("BANKNIFTY")
+            + self._filter_symbols_by_list(symbol_map, self._nse_universe_symbols())
+        )
+        return {symbol: symbol_map[symbol].get("name") or symbol for symbol in dict.fromkeys(symbols)}
+
+    def _seed_quotes(self, frame: SnapshotFrame) -> None:
+        # Page renders read quotes through the cache; the snapshot keeps it warm.
+        for symbol, quote in frame.quotes.items():
+            self._quotes_cache.set(f"NSE:{symbol}", quote, frame.fetched_at)
+
+    def start_replay(self, day: str, start: Optional[float], end: Optional[float], speed: Optional[float]) -> Dict[str, Any]:
+        """
+        Replay a journaled day into a sandbox: a fresh stream feeding its own candle
+        aggregator and a copy of the service account's P&L engine.
+        """
+        stream = MarketStream()
+        aggregator = CandleAggregator(session_hours=not self.simulated)
+        stream.add_tick_listener(aggregator.on_ticks)
+        shared = self.sessions.shared_sessions()
+        pnl = shared[0].pnl_engine.clone() if shared else PnLEngine()
+        stream.add_tick_listener(pnl.on_ticks)
+        self.replay_aggregator, self.replay_pnl = aggregator, pnl
+        self.tick_replayer.sink = stream.ingest_ticks
+        self.tick_replayer.start(day, start, end, speed)
+        return self.replay_status()
+
+    def replay_status(self) -> Dict[str, Any]:
+        state = self.tick_replayer.status()
+        state["aggregator"] = self.replay_aggregator.status() if self.replay_aggregator else None
+        state["pnl"] = self.replay_pnl.aggregates() if self.replay_pnl else None
+        return state
+
+    def get_snapshot_status(self) -> Dict[str, Any]:
+        return self.market_snapshot.status()
+
+    def _index_members(self) -> Dict[str, List[str]]:
+        return {segment: self._segment_symbols(segment) for segment in ("NIFTY50", "BANKNIFTY")}
+
+    def _reference_stats(self, symbol: str) -> Optional[Dict[str, Any]]:
+        instrument = self._symbol_map().get(symbol)
+        if not instrument or not self.access_token:
+            return None
+        kite = self._require_kite()
+        # Completed sessions only, so the stats hold for the whole trading day.
+        end = _ist_now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(seconds=1)
+        # Background work: only take a token when the bucket is full, so user-facing
+        # history requests never queue behind a reference refresh.
+        self._historical_rate.acquire(reserve=self._historical_rate.capacity - 1)
+        candles = kite.historical_data(
+            instrument_token=instrument["instrument_token"],
+            from_date=end - timedelta(days=365),
+            to_date=end,
+            interval="day",
+        )
+        if not candles:
+            return None
+        recent = candles[-20:]
+        return {
+            "high_52w": max(c["high"] for c in candles),
+            "low_52w": min(c["low"] for c in candles),
+            "avg_volume": sum(c["volume"] for c in recent) / len(recent),
+        }
+
+    def get_movers(self, limit: int) -> Dict[str, Any]:
+        movers = self.market_movers.get(limit)
+        if movers is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Market snapshot is not ready yet.",
+            )
+        return movers
 
     def _interval_from_scale(self, scale: str) -> str:
         mapping = {
@@ -354,21 +713,91 @@ class MarketDataController:
         }
         return mapping.get(scale, "5minute")
 
-    def _get_candles(self, instrument_token: int, scale: str, ttl_seconds: int = 10) -> List[Dict[str, Any]]:
-        cache_key = f"{instrument_token}:{scale}"
-        now = time.time()
-        cached = self._candles_cache.get(cache_key)
-        if cached and now - cached["ts"] < ttl_seconds:
-            return cached["data"]
+    # Days of history fetched when seeding the aggregator or serving candles without
+    # the stream, kept within Kite's per-request limits for each interval.
+    _HISTORY_DAYS = {
+        "minute": 7,
+        "3minute": 10,
+        "5minute": 15,
+        "10minute": 30,
+        "15minute": 45,
+        "30minute": 90,
+        "60minute": 180,
+        "day": 730,
+    }
+
+    def _fetch_history(self, instrument_token: int, interval: str) -> List[Dict[str, Any]]:
+        kite = self._require_kite()
+        # Kite reads naive timestamps as IST; the seed must reach the current bar.
+        end = _ist_now()
+        start = end - timedelta(days=self._HISTORY_DAYS.get(interval, 7))
+        self._historical_rate.acquire()
+        try:
+            return kite.historical_data(
+                instrument_token=instrument_token,
+                from_date=start,
+                to_date=end,
+                interval=interval,
+                continuous=False,
+                oi=False,
+            )
+        except KiteException as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Unable to fetch candle data from Zerodha.",
+            ) from exc
+
+    def _streaming_candles(self, instrument_token: int, interval: str) -> bool:
+        """Make the aggregator serve this instrument; False when it cannot."""
+        if not instrument_token or not self.market_stream.connected or not self.candle_aggregator.supports(interval):
+            return False
+        self.market_stream.subscribe([instrument_token])
+        if self.candle_aggregator.needs_seed(instrument_token, interval):
+            # One historical call per instrument, interval and day; ticks do the rest.
+            self.candle_aggregator.seed(instrument_token, interval, self._fetch_history(instrument_token, interval))
+        return True
+
+    def _recent_candles(self, instrument_token: int, scale: str) -> List[Dict[str, Any]]:
+        interval = self._interval_from_scale(scale)
+        try:
+            streaming = self._streaming_candles(instrument_token, interval)
+        except HTTPException:
+            streaming = False
+        if not streaming:
+            return self._get_candles(instrument_token, scale)
+        completed, forming = self.candle_aggregator.candles(instrument_token, interval, limit=5)
+        bars = completed + ([forming] if forming else [])
+        return [bar_to_candle(bar) for bar in bars[-5:]]
+
+    def get_candles(self, instrument_token: int, scale: str, limit: int) -> Dict[str, Any]:
+        interval = self._interval_from_scale(scale)
+        if self._streaming_candles(instrument_token, interval):
+            completed, forming = self.candle_aggregator.candles(instrument_token, interval, limit=limit)
+            return {
+                "instrument_token": instrument_token,
+                "interval": interval,
+                "streaming": True,
+                "candles": [bar_to_candle(bar) for bar in completed],
+                "forming": bar_to_candle(forming) if forming else None,
+            }
+        candles = self._fetch_history(instrument_token, interval)[-limit:]
+        return {
+            "instrument_token": instrument_token,
+            "interval": interval,
+            "streaming": False,
+            "candles": [{**candle, "date": candle["date"].isoformat()} for candle in candles],
+            "forming": None,
+        }
 
+    @swr_cached("_candles_cache", key=lambda instrument_token, scale: f"{instrument_token}:{scale}")
+    def _get_candles(self, instrument_token: int, scale: str) -> List[Dict[str, Any]]:
         if not self.access_token:
             self.access_token = self._load_access_token()
         if not self.access_token:
-            self._candles_cache[cache_key] = {"data": [], "ts": now}
             return []
         kite = self._require_kite()
         interval = self._interval_from_scale(scale)
-        end = datetime.utcnow()
+        end = _ist_now()
         start = end - timedelta(days=7)
         try:
             candles = kite.historical_data(
@@ -396,10 +825,9 @@ class MarketDataController:
             }
             for c in recent
         ]
-        self._candles_cache[cache_key] = {"data": formatted, "ts": now}
         return formatted
 
-    def _symbols_from_db(self, db, segment: str) -> List[str]:
+    def _segment_symbols(self, segment: str) -> List[str]:
         symbol_map = self._symbol_map()
         if segment == "NIFTY50":
             nifty_symbols = self._nifty50_symbols()
@@ -425,43 +853,33 @@ class MarketDataController:
         symbol_set = {symbol.strip().upper() for symbol in symbols if symbol}
         return [symbol for symbol in symbols_in_scope if symbol.upper() in symbol_set]
 
-    def _fetch_index_symbols(self, url: str, cache_key: str, ttl_seconds: int = 3600) -> List[str]:
-        now = time.time()
-        cached = self._index_cache.get(cache_key)
-        if cached and now - cached["ts"] < ttl_seconds:
-            return cached["data"]
-
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/91.0.4472.124 Safari/537.36"
-            ),
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Referer": "https://www.nseindia.com/market-data/live-equity-market",
+    def warmup(self) -> Dict[str, str]:
+        steps = {
+            "nse_universe": self._nse_universe_entries,
+            "index_constituents": lambda: self.index_refresher.ensure_loaded(["NIFTY50", "BANKNIFTY"]),
+            "instruments": self._cached_instruments,
+            "symbol_index": self._symbol_map,
         }
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code != 200:
-                raise ValueError(f"Bad status {response.status_code}")
-            data = response.json()
-            symbols = [stock.get("symbol") for stock in data.get("data", []) if stock.get("symbol")]
-            self._index_cache[cache_key] = {"data": symbols, "ts": now}
-            return symbols
-        except Exception as exc:
-            print(f"NSE index fetch failed ({cache_key}): {exc}")
-            if cached:
-                return cached["data"]
-            return []
+        results: Dict[str, str] = {}
+        for name, step in steps.items():
+            try:
+                step()
+                results[name] = "ok"
+            except HTTPException as exc:
+                results[name] = f"skipped: {exc.detail}"
+            except Exception as exc:
+                print(f"Warmup step failed ({name}): {exc}")
+                results[name] = f"failed: {exc}"
+        return results
 
     def _nifty50_symbols(self) -> List[str]:
-        url = "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%2050"
-        return self._fetch_index_symbols(url, "NIFTY50")
+        return self.index_refresher.get("NIFTY50")
 
     def _banknifty_symbols(self) -> List[str]:
-        url = "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%20BANK"
-        return self._fetch_index_symbols(url, "BANKNIFTY")
+        return self.index_refresher.get("BANKNIFTY")
+
+    def get_index_freshness(self) -> Dict[str, Any]:
+        return self.index_refresher.freshness()
 
     def _nifty_category_symbols(self, category: str) -> List[str]:
         mapping = {
@@ -675,9 +1093,44 @@ class MarketDataController:
         }
         return mapping.get((category or "").lower(), [])
 
+    def _position_status(self, position: Optional[Dict[str, Any]]) -> str:
+        net_qty = self._position_qty(position)
+        if net_qty > 0:
+            return "Long"
+        if net_qty < 0:
+            return "Short"
+        return "Neutral"
+
+    def _sort_symbols(
+        self,
+        symbols: List[str],
+        symbol_map: Dict[str, Dict[str, Any]],
+        position_map: Dict[str, Dict[str, Any]],
+        sort_by: str,
+        descending: bool,
+    ) -> List[str]:
+        if sort_by not in {"id", "name", "price", "position"}:
+            sort_by = "name"
+        # Only the page is quoted live, so an old frame still gives a usable global order.
+        frame = self.market_snapshot.latest()
+        if frame is not None and frame.sortable(sort_by):
+            return frame.sort(symbols, sort_by, descending)
+
+        if sort_by == "price":
+            # No snapshot yet: quoting the whole universe inline would take thousands of
+            # calls, so fall back to symbol order until the first frame lands.
+            return sorted(symbols)
+        if sort_by == "id":
+            key_fn = lambda s: symbol_map[s].get("instrument_token") or 0
+        elif sort_by == "position":
+            key_fn = lambda s: self._position_status(position_map.get(s))
+        else:
+            key_fn = lambda s: (symbol_map[s].get("name") or s).lower()
+        return sorted(symbols, key=key_fn, reverse=descending)
+
     def _build_rows(
         self,
-        db,
+        user_id: str,
         segment: str,
         scale: str,
         search: Optional[str],
@@ -689,8 +1142,9 @@ class MarketDataController:
         page_size: int,
         include_candles: bool,
     ) -> Dict[str, Any]:
-        symbol_map = self._symbol_map()
-        symbols = self._symbols_from_db(db, segment)
+        with span("symbol_map"):
+            symbol_map = self._symbol_map()
+            symbols = self._segment_symbols(segment)
         filtered_symbols = [s for s in symbols if s in symbol_map]
 
         if search:
@@ -706,7 +1160,8 @@ class MarketDataController:
                 filtered_symbols,
             )
 
-        positions = self._get_positions()
+        with span("positions"):
+            positions = self._session(user_id).get_positions()
         position_map = {pos.get("tradingsymbol"): pos for pos in positions}
         if position:
             normalized = position.lower()
@@ -721,26 +1176,34 @@ class MarketDataController:
                     )
                 ]
 
+        # Sort the whole filtered set before paginating so every page is globally ordered.
+        with span("sort"):
+            filtered_symbols = self._sort_symbols(
+                filtered_symbols,
+                symbol_map,
+                position_map,
+                sort_by,
+                sort_dir == "desc",
+            )
         total = len(filtered_symbols)
         start = max(0, (page - 1) * page_size)
         end = start + page_size
         page_symbols = filtered_symbols[start:end]
 
         quote_keys = [f"NSE:{symbol}" for symbol in page_symbols]
-        quotes = self._get_quotes(quote_keys)
+        with span("quotes"):
+            quotes = self._get_quotes(quote_keys)
 
         rows: List[Dict[str, Any]] = []
         for symbol in page_symbols:
             inst = symbol_map[symbol]
             quote = quotes.get(f"NSE:{symbol}", {})
             last_price = quote.get("last_price")
-            position = position_map.get(symbol)
-            net_qty = self._position_qty(position)
-            status = "Neutral"
-            if net_qty > 0:
-                status = "Long"
-            elif net_qty < 0:
-                status = "Short"
+            status = self._position_status(position_map.get(symbol))
+            candles = []
+            if include_candles:
+                with span("candles"):
+                    candles = self._recent_candles(inst.get("instrument_token"), scale)
 
             rows.append(
                 {
@@ -750,19 +1213,10 @@ class MarketDataController:
                     "name": inst.get("name") or symbol,
                     "price": last_price,
                     "position": status,
-                    "candles": self._get_candles(inst.get("instrument_token"), scale) if include_candles else [],
+                    "candles": candles,
                 }
             )
 
-        sort_key_map = {
-            "id": lambda r: r.get("id") or 0,
-            "name": lambda r: (r.get("name") or "").lower(),
-            "price": lambda r: r.get("price") or 0,
-            "position": lambda r: r.get("position") or "",
-        }
-        key_fn = sort_key_map.get(sort_by, sort_key_map["name"])
-        rows.sort(key=key_fn, reverse=sort_dir == "desc")
-
         return {
             "items": rows,
             "total": total,
@@ -770,9 +1224,9 @@ class MarketDataController:
             "page_size": page_size,
         }
 
-    async def get_nifty50(
+    def get_nifty50(
         self,
-        db,
+        user_id: str,
         scale: str,
         search: Optional[str],
         position: Optional[str],
@@ -784,7 +1238,7 @@ class MarketDataController:
         include_candles: bool,
     ) -> Dict[str, Any]:
         return self._build_rows(
-            db=db,
+            user_id=user_id,
             segment="NIFTY50",
             scale=scale,
             search=search,
@@ -797,9 +1251,9 @@ class MarketDataController:
             include_candles=include_candles,
         )
 
-    async def get_banknifty(
+    def get_banknifty(
         self,
-        db,
+        user_id: str,
         scale: str,
         search: Optional[str],
         position: Optional[str],
@@ -810,7 +1264,7 @@ class MarketDataController:
         include_candles: bool,
     ) -> Dict[str, Any]:
         return self._build_rows(
-            db=db,
+            user_id=user_id,
             segment="BANKNIFTY",
             scale=scale,
             search=search,
@@ -823,23 +1277,39 @@ class MarketDataController:
             include_candles=include_candles,
         )
 
-    async def get_historical_data(self, instrument_token: int, interval: str, from_date: str, to_date: str):
-        kite = self._require_kite()
-        interval_name = self._interval_from_scale(interval)
-
-        if from_date and to_date:
-            start = datetime.fromisoformat(from_date)
-            end = datetime.fromisoformat(to_date)
-        else:
-            end = datetime.utcnow()
-            start = end - timedelta(days=30)
-
+    # Longest date range Kite serves in one historical call, per interval.
+    _HISTORY_CHUNK_DAYS = {
+        "minute": 60,
+        "3minute": 100,
+        "5minute": 100,
+        "10minute": 100,
+        "15minute": 200,
+        "30minute": 200,
+        "60minute": 400,
+        "day": 2000,
+    }
+    # Chunk requests kept in flight; the historical rate bucket paces them further.
+    _HISTORY_FETCH_WINDOW = 3
+
+    def _history_windows(self, start: datetime, end: datetime, interval: str) -> List[Tuple[datetime, datetime]]:
+        span = timedelta(days=self._HISTORY_CHUNK_DAYS.get(interval, 60))
+        windows = []
+        while start <= end:
+            window_end = min(start + span - timedelta(seconds=1), end)
+            windows.append((start, window_end))
+            start = window_end + timedelta(seconds=1)
+        return windows
+
+    def _fetch_history_window(
+        self, kite: KiteConnect, instrument_token: int, interval: str, start: datetime, end: datetime
+    ) -> List[Dict[str, Any]]:
+        self._historical_rate.acquire()
         try:
-            candles = kite.historical_data(
+            return kite.historical_data(
                 instrument_token=instrument_token,
                 from_date=start,
                 to_date=end,
-                interval=interval_name,
+                interval=interval,
                 continuous=False,
                 oi=False,
             )
@@ -848,19 +1318,330 @@ class MarketDataController:
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail="Unable to fetch historical data from Zerodha.",
             ) from exc
+
+    def _history_chunks(
+        self,
+        kite: KiteConnect,
+        instrument_token: int,
+        interval: str,
+        windows: List[Tuple[datetime, datetime]],
+        prefetch: bool = True,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Candles per window, in date order. With ``prefetch`` a few windows are
+        fetched ahead of the reader on the history pool; without it each window is
+        fetched in the caller's thread.
+        """
+        if prefetch:
+            fetched = self._prefetch_history_windows(kite, instrument_token, interval, windows)
+        else:
+            fetched = (self._fetch_history_window(kite, instrument_token, interval, *window) for window in windows)
+        last_date = None
+        try:
+            for candles in fetched:
+                # Windows do not overlap, but a bar can straddle the boundary second.
+                if last_date is not None:
+                    candles = [c for c in candles if c["date"] > last_date]
+                if candles:
+                    last_date = candles[-1]["date"]
+                yield candles
+        finally:
+            fetched.close()
+
+    def _prefetch_history_windows(
+        self, kite: KiteConnect, instrument_token: int, interval: str, windows: List[Tuple[datetime, datetime]]
+    ) -> Iterator[List[Dict[str, Any]]]:
+        pending: deque = deque()
+        upcoming = iter(windows)
+
+        def submit_next() -> None:
+            window = next(upcoming, None)
+            if window is not None:
+                pending.append(
+                    history_executor.submit(self._fetch_history_window, kite, instrument_token, interval, *window)
+                )
+
+        for _ in range(self._HISTORY_FETCH_WINDOW):
+            submit_next()
+        try:
+            while pending:
+                candles = pending.popleft().result()
+                submit_next()
+                yield candles
+        finally:
+            # The client went away or a window failed; drop fetches not yet started.
+            for future in pending:
+                future.cancel()
+
+    def get_historical_data(
+        self,
+        instrument_token: int,
+        interval: str,
+        from_date: Optional[str],
+        to_date: Optional[str],
+        max_points: Optional[int] = None,
+        series: str = "candle",
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Historical candles as a stream of date-ordered chunks.
+
+        Long ranges are split into the largest spans Kite accepts per call and
+        fetched concurrently. The first chunk is fetched before returning, so
+        upstream errors still surface as a 502 rather than a truncated stream.
+
+        With ``max_points`` the whole range is collected and reduced to one
+        chunk: OHLC buckets for candle charts, LTTB on close for line charts.
+        """
+        kite = self._require_kite()
+        interval_name = self._interval_from_scale(interval)
+
+        if from_date and to_date:
+            try:
+                start = datetime.fromisoformat(from_date)
+                end = datetime.fromisoformat(to_date)
+            except ValueError as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="start and end must be ISO dates.",
+                ) from exc
+        else:
+            # Kite reads naive timestamps as IST.
+            end = _ist_now()
+            start = end - timedelta(days=30)
+        if start > end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start must be before end.",
+            )
+
+        chunks = self._history_chunks(kite, instrument_token, interval_name, self._history_windows(start, end, interval_name))
+        first = next(chunks, [])
+        if max_points:
+            candles = [c for chunk in chain([first], chunks) for c in chunk]
+            reduce = lttb if series == "line" else ohlc_buckets
+            first, chunks = reduce(candles, max_points), iter(())
+        return (
+            [
+                {
+                    "date": c["date"].isoformat(),
+                    "open": c["open"],
+                    "high": c["high"],
+                    "low": c["low"],
+                    "close": c["close"],
+                    "volume": c["volume"],
+                }
+                for c in chunk
+            ]
+            for chunk in chain([first], chunks)
+        )
+
+    def _export_history(
+        self, instrument_token: int, interval: str, start: datetime, end: datetime
+    ) -> Iterator[List[Dict[str, Any]]]:
+        kite = self._require_kite()
+        # Exports already fetch several instruments at once on the exporter's threads;
+        # windows run inline there so exports never queue on the shared history pool.
+        windows = self._history_windows(start, end, interval)
+        return self._history_chunks(kite, instrument_token, interval, windows, prefetch=False)
+
+    def _export_instruments(self, instrument_tokens: Optional[List[int]], index: Optional[str]) -> List[Tuple[int, str]]:
+        symbol_map = self._symbol_map()
+        if instrument_tokens:
+            by_token = {inst["instrument_token"]: symbol for symbol, inst in symbol_map.items()}
+            unknown = [token for token in instrument_tokens if token not in by_token]
+            if unknown:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unknown instrument tokens: {unknown[:10]}",
+                )
+            return [(token, by_token[token]) for token in dict.fromkeys(instrument_tokens)]
+        key = (index or "").strip().upper()
+        if key == "NSE_UNIVERSE":
+            symbols = self._nse_universe_symbols()
+        elif key in NSE_INDICES:
+            self.index_refresher.ensure_loaded([key])
+            symbols = self.index_refresher.get(key)
+            if not symbols:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=f"Constituents for {key} are not available yet.",
+                )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown index. Use NSE_UNIVERSE or one of: {', '.join(NSE_INDICES)}.",
+            )
         return [
-            {
-                "date": c["date"].isoformat(),
-                "open": c["open"],
-                "high": c["high"],
-                "low": c["low"],
-                "close": c["close"],
-                "volume": c["volume"],
-            }
-            for c in candles
+            (symbol_map[symbol]["instrument_token"], symbol)
+            for symbol in self._filter_symbols_by_list(symbol_map, symbols)
         ]
 
-    async def get_instruments(self, db):
+    def start_export(
+        self,
+        user_id: str,
+        instrument_tokens: Optional[List[int]],
+        index: Optional[str],
+        scale: str,
+        from_date: str,
+        to_date: str,
+    ) -> Dict[str, Any]:
+        self._require_kite()
+        try:
+            start = datetime.fromisoformat(from_date)
+            end = datetime.fromisoformat(to_date)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start and end must be ISO dates.",
+            ) from exc
+        if start > end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start must be before end.",
+            )
+        instruments = self._export_instruments(instrument_tokens, index)
+        if not instruments:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No instruments to export.",
+            )
+        if len(instruments) > settings.EXPORT_MAX_INSTRUMENTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Exports are limited to {settings.EXPORT_MAX_INSTRUMENTS} instruments.",
+            )
+        job = self.history_exporter.submit(user_id, instruments, self._interval_from_scale(scale), start, end)
+        return job.status()
+
+    def _export_job(self, user_id: str, job_id: str) -> ExportJob:
+        job = self.history_exporter.get(job_id)
+        if job is None or job.owner != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Export not found.",
+            )
+        return job
+
+    def list_exports(self, user_id: str) -> List[Dict[str, Any]]:
+        return [job.status() for job in self.history_exporter.jobs(user_id)]
+
+    def get_export(self, user_id: str, job_id: str) -> Dict[str, Any]:
+        return self._export_job(user_id, job_id).status()
+
+    def cancel_export(self, user_id: str, job_id: str) -> Dict[str, Any]:
+        job = self._export_job(user_id, job_id)
+        self.history_exporter.cancel(job)
+        return job.status()
+
+    def export_file(self, user_id: str, job_id: str) -> Path:
+        job = self._export_job(user_id, job_id)
+        if job.state != "done" or job.path is None or not job.path.exists():
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Export is {job.state}.",
+            )
+        return job.path
+
+    @swr_cached("_option_index_cache")
+    def _option_index(self) -> OptionIndex:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(
+                    Instrument.instrument_token,
+                    Instrument.trading_symbol,
+                    Instrument.name,
+                    Instrument.expiry,
+                    Instrument.strike,
+                    Instrument.instrument_type,
+                    Instrument.lot_size,
+                )
+                .filter(Instrument.segment == "NFO-OPT")
+                .all()
+            )
+        finally:
+            db.close()
+        return OptionIndex(
+            (token, symbol, name, expiry, float(strike or 0), instrument_type, lot_size or 0)
+            for token, symbol, name, expiry, strike, instrument_type, lot_size in rows
+        )
+
+    def invalidate_option_index(self) -> None:
+        self._option_index_cache.invalidate()
+
+    def _fetch_quotes_batched(self, instruments: List[str]) -> Dict[str, Any]:
+        quotes: Dict[str, Any] = {}
+        for start in range(0, len(instruments), QUOTE_BATCH_SIZE):
+            quotes.update(self._fetch_quotes(instruments[start:start + QUOTE_BATCH_SIZE]) or {})
+        return quotes
+
+    def get_option_expiries(self, underlying: str) -> Dict[str, Any]:
+        underlying = underlying.strip().upper()
+        expiries = self._option_index().expiries(underlying)
+        if not expiries:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No option contracts for {underlying}. Sync instruments first.",
+            )
+        return {"underlying": underlying, "expiries": [expiry.isoformat() for expiry in expiries]}
+
+    def get_option_chain(self, underlying: str, expiry: Optional[str], strike_count: Optional[int]) -> Dict[str, Any]:
+        underlying = underlying.strip().upper()
+        try:
+            expiry_date = datetime.strptime(expiry, "%Y-%m-%d").date() if expiry else None
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="expiry must be YYYY-MM-DD.",
+            ) from exc
+        index = self._option_index()
+        chain = index.chain(underlying, expiry_date)
+        if chain is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No option chain for {underlying} {expiry or ''}".strip() + ".",
+            )
+        spot_symbol = spot_key(underlying)
+        with span("quotes"):
+            quotes = self._quotes_cache.get_many([spot_symbol] + chain.quote_keys(), self._fetch_quotes_batched)
+        spot = (quotes.get(spot_symbol) or {}).get("last_price")
+        if not spot:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"No quote for {spot_symbol}.",
+            )
+        with span("greeks"):
+            result = build_chain(chain, spot, quotes, settings.RISK_FREE_RATE, strike_count)
+        result["expiries"] = [value.isoformat() for value in index.expiries(underlying)]
+        return result
+
+    def _spot_price(self, underlying: str) -> float:
+        spot_symbol = spot_key(underlying)
+        spot = (self._quotes_cache.get_many([spot_symbol], self._fetch_quotes_batched).get(spot_symbol) or {}).get("last_price")
+        if not spot:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"No quote for {spot_symbol}.",
+            )
+        return spot
+
+    def get_iv_surface(self, underlying: str, max_expiries: int, include_points: bool) -> Dict[str, Any]:
+        underlying = underlying.strip().upper()
+        index = self._option_index()
+        chains = [index.chain(underlying, expiry) for expiry in index.expiries(underlying)[:max_expiries]]
+        if not chains:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No option contracts for {underlying}. Sync instruments first.",
+            )
+        spot = self._spot_price(underlying)
+        options = self.iv_surface.options(chains, spot)
+        with span("quotes"):
+            quotes = self._quotes_cache.get_many(options.quote_keys(), self._fetch_quotes_batched)
+        with span("surface"):
+            return self.iv_surface.build(underlying, options, spot, quotes, include_points)
+
+    def get_instruments(self):
         instruments = self._cached_instruments()
         return [
             {
@@ -873,7 +1654,7 @@ class MarketDataController:
             for inst in instruments
         ]
 
-    async def get_nse_universe_zerodha(self) -> Dict[str, Any]:
+    def get_nse_universe_zerodha(self) -> Dict[str, Any]:
         symbol_map = self._symbol_map()
         entries = self._nse_universe_entries()
         present: List[Dict[str, Any]] = []
@@ -901,49 +1682,78 @@ class MarketDataController:
             "missing": missing,
         }
 
-    async def get_positions(self):
-        positions = self._get_positions()
+    def _pnl_rows(self, session: UserSession, kind: int, source: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        engine = session.pnl_engine
+        if not engine.is_current(kind, source):
+            engine.rebuild(kind, source)
+            self.market_stream.subscribe(engine.instrument_tokens())
+        return engine.rows(kind)
+
+    def get_positions(self, user_id: str):
+        session = self._session(user_id)
         results = []
-        for pos in positions:
+        for row in self._pnl_rows(session, POSITION, session.get_positions()):
+            pos = row["item"]
             qty = self._position_qty(pos)
-            ltp = pos.get("last_price") or pos.get("average_price")
-            avg = pos.get("average_price") or 0
-            pnl = (ltp - avg) * qty if qty >= 0 else (avg - ltp) * abs(qty)
             results.append(
                 {
                     "id": pos.get("instrument_token"),
                     "instrument": pos.get("tradingsymbol"),
                     "type": "BUY" if qty >= 0 else "SELL",
                     "qty": qty,
-                    "avgPrice": avg,
-                    "ltp": ltp,
-                    "pnl": pnl,
+                    "avgPrice": pos.get("average_price") or 0,
+                    "ltp": row["ltp"],
+                    "pnl": row["pnl"],
+                    "dayPnl": row["day_pnl"],
                 }
             )
         return results
 
-    async def get_holdings(self):
-        holdings = self._get_holdings()
+    def get_holdings(self, user_id: str):
+        session = self._session(user_id)
         results = []
-        for holding in holdings:
-            qty = holding.get("quantity") or 0
-            avg = holding.get("average_price") or 0
-            ltp = holding.get("last_price") or holding.get("close_price") or avg
-            pnl = (ltp - avg) * qty if qty else 0
+        for row in self._pnl_rows(session, HOLDING, session.get_holdings()):
+            holding = row["item"]
             results.append(
                 {
                     "id": holding.get("instrument_token"),
                     "instrument": holding.get("tradingsymbol"),
-                    "qty": qty,
-                    "avgPrice": avg,
-                    "ltp": ltp,
-                    "pnl": pnl,
+                    "qty": holding.get("quantity") or 0,
+                    "avgPrice": holding.get("average_price") or 0,
+                    "ltp": row["ltp"],
+                    "pnl": row["pnl"],
+                    "dayPnl": row["day_pnl"],
                 }
             )
         return results
 
-    def place_order(self, order: Dict[str, Any]) -> Dict[str, Any]:
-        kite = self._require_kite()
+    def get_pnl_summary(self, user_id: str) -> Dict[str, Any]:
+        session = self._session(user_id)
+        self._pnl_rows(session, POSITION, session.get_positions())
+        self._pnl_rows(session, HOLDING, session.get_holdings())
+        return session.pnl_engine.aggregates()
+
+    def _estimate_order_margin(self, kite: KiteConnect, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            margin_list = kite.order_margins([params])
+        except KiteException:
+            return None
+        return margin_list[0] if margin_list else None
+
+    def _available_funds(self, session: UserSession) -> Optional[float]:
+        try:
+            equity = session.get_margins().get("equity", {})
+        except Exception:
+            return None
+        available = (
+            equity.get("available", {}).get("cash")
+            or equity.get("available", {}).get("live_balance")
+            or equity.get("available", {}).get("opening_balance")
+            or 0
+        )
+        return float(available)
+
+    def _order_params(self, order: Dict[str, Any]) -> Dict[str, Any]:
         tradingsymbol = (order.get("tradingsymbol") or "").strip().upper()
         if not tradingsymbol:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="tradingsymbol is required.")
@@ -967,8 +1777,7 @@ class MarketDataController:
         price = order.get("price")
         trigger_price = order.get("trigger_price")
 
-        symbol_map = self._symbol_map()
-        if tradingsymbol not in symbol_map:
+        if tradingsymbol not in self._symbol_map():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Unknown trading symbol for NSE equity.",
@@ -994,50 +1803,136 @@ class MarketDataController:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Market is closed. Use AMO to place after-market orders.",
             )
+        return params
 
-        margin_data = None
+    def _submit_order(self, session: UserSession, params: Dict[str, Any]) -> str:
+        # Callers take an order_rate token first, so pool workers never wait on it.
+        kite = session.require_kite()
         try:
-            margin_list = kite.order_margins([params])
-            if margin_list:
-                margin_data = margin_list[0]
-        except KiteException:
-            margin_data = None
-
-        if margin_data and margin_data.get("total") is not None:
-            try:
-                margins = kite.margins().get("equity", {})
-                available = (
-                    margins.get("available", {}).get("cash")
-                    or margins.get("available", {}).get("live_balance")
-                    or margins.get("available", {}).get("opening_balance")
-                    or 0
-                )
-                required = float(margin_data.get("total") or 0)
-                if required > float(available):
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Insufficient funds or margin to place this order.",
-                    )
-            except HTTPException:
-                raise
-            except Exception:
-                pass
-
-        try:
-            order_id = kite.place_order(**params)
+            return kite.place_order(**params)
         except KiteException as exc:
             error_detail = getattr(exc, "message", None) or str(exc)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Order rejected by Zerodha: {error_detail}",
             ) from exc
+        finally:
+            session.invalidate_funds()
+
+    def place_order(self, user_id: str, order: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        session = self._session(user_id)
+        kite = session.require_kite()
+        params = self._order_params(order)
+        market_open = self._is_market_open()
+        validated = time.perf_counter()
+
+        # Margin estimate and account funds are independent; fetch them side by side.
+        margin_future = order_executor.submit(self._estimate_order_margin, kite, params)
+        funds_future = order_executor.submit(self._available_funds, session)
+        margin_data = margin_future.result()
+        available = funds_future.result()
+        pretrade_done = time.perf_counter()
+
+        if margin_data and margin_data.get("total") is not None and available is not None:
+            required = float(margin_data.get("total") or 0)
+            if required > available:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Insufficient funds or margin to place this order.",
+                )
+
+        session.order_rate.acquire()
+        order_id = self._submit_order(session, params)
+        session.order_book.seed({**params, "order_id": order_id, "status": "PUT ORDER REQ RECEIVED"})
+        submitted = time.perf_counter()
 
         return {
             "order_id": order_id,
             "market_open": market_open,
             "required_margin": margin_data.get("total") if margin_data else None,
             "charges": margin_data.get("charges") if margin_data else None,
+            "timings_ms": {
+                "validate": round((validated - started) * 1000, 2),
+                "pretrade": round((pretrade_done - validated) * 1000, 2),
+                "submit": round((submitted - pretrade_done) * 1000, 2),
+                "total": round((submitted - started) * 1000, 2),
+            },
+        }
+
+    def prepare_basket(self, user_id: str, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        session = self._session(user_id)
+        kite = session.require_kite()
+        legs: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        for index, order in enumerate(orders):
+            try:
+                legs.append(self._order_params(order))
+            except HTTPException as exc:
+                errors.append({"index": index, "tradingsymbol": order.get("tradingsymbol"), "detail": exc.detail})
+        if errors:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"message": "Basket validation failed.", "errors": errors},
+            )
+
+        # One batched margin call for every leg, then a single funds check.
+        margin_future = order_executor.submit(kite.order_margins, legs)
+        funds_future = order_executor.submit(self._available_funds, session)
+        try:
+            margin_list = margin_future.result() or []
+        except KiteException:
+            margin_list = []
+        available = funds_future.result()
+
+        required = None
+        if margin_list:
+            required = sum(float(item.get("total") or 0) for item in margin_list)
+            if available is not None and required > available:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Insufficient funds or margin to place this basket.",
+                )
+        return {
+            "session": session,
+            "legs": legs,
+            "margins": margin_list,
+            "required_margin": required,
+            "available": available,
+        }
+
+    def _submit_basket_leg(self, session: UserSession, index: int, params: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = {"type": "leg", "index": index, "tradingsymbol": params["tradingsymbol"]}
+        try:
+            result["order_id"] = self._submit_order(session, params)
+            result["status"] = "placed"
+            session.order_book.seed({**params, "order_id": result["order_id"], "status": "PUT ORDER REQ RECEIVED"})
+        except HTTPException as exc:
+            result["status"] = "rejected"
+            result["detail"] = exc.detail
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    def submit_basket(self, basket: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        legs = basket["legs"]
+        yield {
+            "type": "summary",
+            "legs": len(legs),
+            "required_margin": basket["required_margin"],
+            "available": basket["available"],
         }
+        session = basket["session"]
+        pending = set()
+        for index, params in enumerate(legs):
+            # Pace here rather than in the workers, reporting legs as they finish.
+            session.order_rate.acquire()
+            pending.add(order_executor.submit(self._submit_basket_leg, session, index, params))
+            for future in [future for future in pending if future.done()]:
+                pending.discard(future)
+                yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
 
 
 market_controller = MarketDataController()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 from sqlalchemy.engine import URL
 from pydantic import computed_field
@@ -16,10 +18,72 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str
     POSTGRES_DB: str
 
+    # Connection pooling
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_STATEMENT_TIMEOUT_MS: int = 15000
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 256
+
     # Zerodha
     ZERODHA_API_KEY: str = ""
     ZERODHA_API_SECRET: str = ""
     ZERODHA_ACCESS_TOKEN: str = ""
+    # Override the Kite REST root, e.g. to point at bench/fake_kite.py.
+    ZERODHA_API_ROOT: str = ""
+    # Users without their own Zerodha login fall back to the deployment-wide token.
+    ZERODHA_SHARED_SESSION_FALLBACK: bool = True
+    KITE_SESSION_POOL_SIZE: int = 256
+    KITE_SESSION_IDLE_SECONDS: int = 3600
+    MARKET_STREAM_ENABLED: bool = True
+    # How long a streamed or postback order update is trusted without asking Kite.
+    ORDER_PUSH_FRESH_SECONDS: int = 30
+    MARKET_SNAPSHOT_INTERVAL_SECONDS: int = 5
+    MARKET_SNAPSHOT_IDLE_INTERVAL_SECONDS: int = 60
+
+    # Simulated market: "live" uses Zerodha, "simulated" serves generated data and
+    # paper-trading accounts with no broker credentials.
+    MARKET_DATA_MODE: str = "live"
+    SIMULATED_TICKS_PER_SECOND: int = 20000
+    SIMULATED_TICK_INTERVAL_MS: int = 100
+    SIMULATED_VOLATILITY: float = 0.25
+    SIMULATED_CORRELATION: float = 0.3
+    SIMULATED_EXTRA_SYMBOLS: int = 0
+    SIMULATED_SEED: Optional[int] = None
+    SIMULATED_STARTING_CASH: float = 1000000
+
+    # Tick journal (relative paths resolve against the backend directory)
+    TICK_JOURNAL_ENABLED: bool = False
+    TICK_JOURNAL_DIR: str = "var/ticks"
+    TICK_JOURNAL_CHUNK_TICKS: int = 5000
+    TICK_JOURNAL_FLUSH_SECONDS: float = 1.0
+
+    # Bulk historical exports (Parquet files under EXPORT_DIR)
+    EXPORT_DIR: str = "var/exports"
+    EXPORT_CONCURRENCY: int = 4
+    EXPORT_MAX_INSTRUMENTS: int = 1000
+    EXPORT_KEEP_JOBS: int = 20
+
+    # Option chain Greeks and implied-volatility surfaces
+    RISK_FREE_RATE: float = 0.065
+    # Reuse solved IVs for unchanged quotes while spot stays within this relative move.
+    IV_SURFACE_SPOT_TOLERANCE: float = 0.0005
+    IV_SURFACE_FULL_REFRESH_SECONDS: int = 60
+
+    # Diagnostics
+    SERVER_TIMING_ENABLED: bool = True
+    LOOP_LAG_INTERVAL_MS: int = 100
+    LOOP_STALL_THRESHOLD_MS: int = 250
+    # JWT subjects allowed to use the /admin endpoints (e.g. the sampling profiler).
+    ADMIN_USER_IDS: list[str] = []
+
+    # Startup
+    WARMUP_DB_RETRY_SECONDS: int = 5
+
+    # Cache snapshots (relative paths resolve against the backend directory)
+    CACHE_SNAPSHOT_PATH: str = "var/cache_snapshot.json.gz"
+    CACHE_SNAPSHOT_INTERVAL_SECONDS: int = 300
 
     BACKEND_CORS_ORIGINS: list[str] = [
         "http://localhost:3000",
@@ -29,9 +93,15 @@ class Settings(BaseSettings):
     @computed_field
     @property
     def DATABASE_URL(self) -> str:
-        db_url = f"postgresql+psycopg2://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
-        print(db_url)
-        return db_url
+        return f"postgresql+psycopg2://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+    @computed_field
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+            f"?prepared_statement_cache_size={self.DB_PREPARED_STATEMENT_CACHE_SIZE}"
+        )
 
     class Config:
         env_file = ".env"
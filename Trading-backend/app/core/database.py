@@ -1,16 +1,140 @@
+import time
+from typing import Any, Callable, Dict, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.utils.metrics import Gauge, Histogram
+
+POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection.",
+    ("engine",),
+)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    metrics_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - started, engine=self.metrics_label)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool, TimedQueuePool):
+    metrics_label = "async"
 
-engine = create_engine(settings.DATABASE_URL)
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=TimedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args={"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"},
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    # Built on first use so the asyncpg driver is only imported by workers that need it.
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL,
+            poolclass=TimedAsyncQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            connect_args={
+                "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)},
+            },
+        )
+        _async_session_factory = async_sessionmaker(
+            _async_engine,
+            expire_on_commit=False,
+            autoflush=False,
+        )
+    return _async_engine
+
+
+def _pool_connections() -> Dict[tuple, float]:
+    values: Dict[tuple, float] = {}
+    pools = [("sync", engine.pool)]
+    if _async_engine is not None:
+        pools.append(("async", _async_engine.pool))
+    for label, pool in pools:
+        values[(label, "checked_out")] = pool.checkedout()
+        values[(label, "idle")] = pool.checkedin()
+    return values
+
+
+Gauge(
+    "db_pool_connections",
+    "Pooled database connections by state.",
+    ("engine", "state"),
+    collect=_pool_connections,
+)
+
+
+class LazySession:
+    """
+    Session proxy that only opens a real session (and pool connection) on first use.
+    Handlers that never touch the database never check anything out of the pool.
+    """
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        self._factory = factory
+        self._session: Optional[Any] = None
+
+    @property
+    def has_session(self) -> bool:
+        return self._session is not None
+
+    def _get(self) -> Any:
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+
 def get_db():
-    db = SessionLocal()
+    db = LazySession(SessionLocal)
+    try:
+        yield db
+    finally:
+        if db.has_session:
+            db.close()
+
+
+def _async_session() -> AsyncSession:
+    get_async_engine()
+    return _async_session_factory()
+
+
+async def get_async_db():
+    db = LazySession(_async_session)
     try:
         yield db
     finally:
-        db.close()
+        if db.has_session:
+            await db.close()
@@ -0,0 +1,30 @@
+import time
+from typing import Any, Dict, Optional
+
+
+class ReadinessState:
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.ready_at: Optional[float] = None
+        self.steps: Dict[str, str] = {}
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready_at is not None
+
+    def record(self, step: str, result: str) -> None:
+        self.steps[step] = result
+
+    def mark_ready(self) -> None:
+        self.ready_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.is_ready,
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "warmup_seconds": round(self.ready_at - self.started_at, 3) if self.ready_at else None,
+            "steps": dict(self.steps),
+        }
+
+
+readiness = ReadinessState()
@@ -1,18 +1,101 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import List
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.routes import auth, market
+from app.core.readiness import readiness
+from app.routes import admin, auth, health, market, metrics
 from app.models import instrument
 from app.models import app_setting
 from app.models import market as market_models
 from app.core.database import Base, engine
+from app.controllers.market_data_controller import market_controller
+from app.utils import server_timing
+from app.utils.loop_monitor import loop_monitor
+from app.utils.metrics import Histogram
+from app.utils.profiler import profiler
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template (time to response headers).",
+    ("method", "route", "status"),
+)
+
+
+_background_tasks: List[asyncio.Task] = []
+
+
+async def _create_tables() -> None:
+    while True:
+        try:
+            await asyncio.to_thread(Base.metadata.create_all, bind=engine)
+            readiness.record("database", "ok")
+            return
+        except Exception as exc:
+            print(f"Database not reachable during warmup: {exc}")
+            readiness.record("database", f"retrying: {exc}")
+            await asyncio.sleep(settings.WARMUP_DB_RETRY_SECONDS)
+
+
+async def _warmup() -> None:
+    restored = await asyncio.to_thread(market_controller.restore_cache_snapshot)
+    readiness.record("cache_snapshot", f"restored {restored} caches")
+    _background_tasks.append(asyncio.create_task(market_controller.index_refresher.run()))
+    await _create_tables()
+    results = await asyncio.to_thread(market_controller.warmup)
+    for step, result in results.items():
+        readiness.record(step, result)
+    readiness.mark_ready()
+    _background_tasks.append(asyncio.create_task(market_controller.market_snapshot.run()))
+    if settings.MARKET_STREAM_ENABLED:
+        try:
+            await asyncio.to_thread(market_controller.start_stream)
+        except HTTPException as exc:
+            print(f"Market stream not started: {exc.detail}")
+
+
+async def _snapshot_caches_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.CACHE_SNAPSHOT_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(market_controller.save_cache_snapshot)
+        except Exception as exc:
+            print(f"Cache snapshot failed: {exc}")
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    loop_monitor.interval = settings.LOOP_LAG_INTERVAL_MS / 1000
+    loop_monitor.threshold = settings.LOOP_STALL_THRESHOLD_MS / 1000
+    loop_monitor.start()
+    _background_tasks.append(asyncio.create_task(_warmup()))
+    _background_tasks.append(asyncio.create_task(_snapshot_caches_periodically()))
+    try:
+        yield
+    finally:
+        for task in _background_tasks:
+            task.cancel()
+        _background_tasks.clear()
+        loop_monitor.stop()
+        try:
+            market_controller.market_stream.stop()
+            market_controller.tick_replayer.stop()
+        finally:
+            # Write the journal's last buffered batches even if stopping the feed failed.
+            market_controller.tick_journal.close()
+        market_controller.history_exporter.shutdown()
+        try:
+            market_controller.save_cache_snapshot()
+        except Exception as exc:
+            print(f"Cache snapshot failed: {exc}")
 
-# Create tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Optimized CORS configuration for better security and performance
@@ -23,7 +106,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         allow_headers=["Content-Type", "Authorization", "Accept"],
-        expose_headers=["Content-Length", "Content-Type"],
+        expose_headers=["Content-Length", "Content-Type", "Server-Timing"],
         max_age=3600,  # Cache preflight requests for 1 hour
     )
 else:
@@ -34,10 +117,61 @@ else:
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         allow_headers=["Content-Type", "Authorization", "Accept"],
-        expose_headers=["Content-Length", "Content-Type"],
+        expose_headers=["Content-Length", "Content-Type", "Server-Timing"],
         max_age=3600,
     )
 
+
+def _route_template(request: Request) -> str:
+    # Label by route template, not raw path, to keep cardinality bounded. Routes of
+    # included routers only know their own path, so the mount prefix is taken from
+    # the leading segments of the request path.
+    route = request.scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+    path_parts = request.url.path.rstrip("/").split("/")
+    template_parts = template.rstrip("/").split("/")
+    prefix = "/".join(path_parts[:len(path_parts) - len(template_parts) + 1])
+    return prefix + template
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=_route_template(request),
+            status=str(status_code),
+        )
+
+
+@app.middleware("http")
+async def add_server_timing(request: Request, call_next):
+    if not settings.SERVER_TIMING_ENABLED and not profiler.enabled:
+        return await call_next(request)
+    spans = server_timing.start()
+    started = time.perf_counter()
+    if profiler.should_sample():
+        with profiler.track(f"{request.method} {request.url.path}"):
+            response = await call_next(request)
+    else:
+        response = await call_next(request)
+    if settings.SERVER_TIMING_ENABLED:
+        total_ms = (time.perf_counter() - started) * 1000
+        response.headers["Server-Timing"] = server_timing.header(spans, total_ms)
+    return response
+
+app.include_router(health.router)
+app.include_router(metrics.router)
+app.include_router(admin.router, prefix=f"{settings.API_V1_STR}/admin")
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}", tags=["login"])
 app.include_router(market.router, prefix=f"{settings.API_V1_STR}/market")
 
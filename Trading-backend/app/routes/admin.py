@@ -0,0 +1,133 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Security, status
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from app.controllers.market_data_controller import market_controller
+from app.core.config import settings
+from app.routes.market import get_current_user
+from app.services.tick_journal import IST
+from app.utils.loop_monitor import loop_monitor
+from app.utils.profiler import ProfiledRoute, profiler
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+class ProfilerRequest(BaseModel):
+    sample_rate: float = Field(0.1, gt=0, le=1)
+    duration_seconds: int = Field(300, gt=0, le=3600)
+    interval_ms: float = Field(5.0, ge=1, le=100)
+
+
+class ReplayRequest(BaseModel):
+    day: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    # Omit (null) to replay as fast as possible.
+    speed: Optional[float] = Field(1.0, gt=0, le=1000)
+
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=IST)
+    return value.timestamp()
+
+
+def require_admin(current_user: str = Security(get_current_user)) -> str:
+    if current_user not in settings.ADMIN_USER_IDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required.")
+    return current_user
+
+
+@router.get("/profiler", tags=["Admin"])
+def get_profiler_status(admin: str = Security(require_admin)):
+    """
+    Current sampling profiler settings and sample counts.
+    """
+    return profiler.status()
+
+
+@router.post("/profiler", tags=["Admin"])
+def enable_profiler(request: ProfilerRequest, admin: str = Security(require_admin)):
+    """
+    Profile a fraction of requests for a limited time.
+    """
+    profiler.enable(request.sample_rate, request.duration_seconds, request.interval_ms)
+    return profiler.status()
+
+
+@router.delete("/profiler", tags=["Admin"])
+def disable_profiler(admin: str = Security(require_admin)):
+    """
+    Stop sampling. Collected stacks are kept until cleared.
+    """
+    profiler.disable()
+    return profiler.status()
+
+
+@router.get("/profiler/stacks", tags=["Admin"], response_class=PlainTextResponse)
+def get_profiler_stacks(clear: bool = False, admin: str = Security(require_admin)):
+    """
+    Collected stacks in folded format (flamegraph.pl / speedscope).
+    """
+    stacks = profiler.collapsed()
+    if clear:
+        profiler.clear()
+    return PlainTextResponse(stacks)
+
+
+@router.get("/loop-stalls", tags=["Admin"])
+def get_loop_stalls(admin: str = Security(require_admin)):
+    """
+    Most recent event loop stalls with the blocking route and stack.
+    """
+    return {
+        "threshold_ms": loop_monitor.threshold * 1000,
+        "stalls": loop_monitor.recent_stalls(),
+    }
+
+
+@router.get("/journal", tags=["Admin"])
+def get_tick_journal(admin: str = Security(require_admin)):
+    """
+    Journaled trading days with chunk, batch and tick counts.
+    """
+    journal = market_controller.tick_journal
+    return {
+        "recording": market_controller.market_stream.journal is not None,
+        "recorded_ticks": journal.recorded_ticks,
+        "days": journal.summary(),
+    }
+
+
+@router.get("/replay", tags=["Admin"])
+def get_replay_status(admin: str = Security(require_admin)):
+    """
+    Progress of the current or last tick replay.
+    """
+    return market_controller.replay_status()
+
+
+@router.post("/replay", tags=["Admin"])
+def start_replay(request: ReplayRequest, admin: str = Security(require_admin)):
+    """
+    Replay a journaled day into an isolated stream, candle aggregator and P&L engine,
+    optionally from a timestamp. Live prices, bars and P&L are never touched.
+    """
+    if request.day not in market_controller.tick_journal.days():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No journal for that day.")
+    if market_controller.tick_replayer.running:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A replay is already running.")
+    return market_controller.start_replay(request.day, _epoch(request.start), _epoch(request.end), request.speed)
+
+
+@router.delete("/replay", tags=["Admin"])
+def stop_replay(admin: str = Security(require_admin)):
+    """
+    Stop the running replay.
+    """
+    market_controller.tick_replayer.stop()
+    return market_controller.replay_status()
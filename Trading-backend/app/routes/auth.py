@@ -1,20 +1,23 @@
+import asyncio
 from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import security, database
 from app.core.config import settings
 from app.models.user import User
 from app.schemas.user import Token, UserCreate, UserUpdate, User as UserSchema, LoginRequest
+from app.utils.profiler import ProfiledRoute
 from jose import jwt, JWTError
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 http_bearer = HTTPBearer()
 
 @router.post("/login/access-token", response_model=Token, include_in_schema=False)
-async def login_access_token(request: Request, db: Session = Depends(database.get_db)) -> Any:
+async def login_access_token(request: Request, db: AsyncSession = Depends(database.get_async_db)) -> Any:
     login_in = None
     content_type = request.headers.get("content-type", "")
     if "application/json" in content_type:
@@ -35,11 +38,12 @@ async def login_access_token(request: Request, db: Session = Depends(database.ge
     if not login_in:
         raise HTTPException(status_code=422, detail="Invalid login payload. Provide email and password.")
 
-    user = db.query(User).filter(User.email == login_in.email).first()
+    result = await db.execute(select(User).where(User.email == login_in.email))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     
-    if not security.verify_password(login_in.password, user.hashed_password):
+    if not await asyncio.to_thread(security.verify_password, login_in.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     access_token_expires = timedelta(minutes=security.settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
@@ -48,12 +52,13 @@ async def login_access_token(request: Request, db: Session = Depends(database.ge
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login_user(login_in: LoginRequest, db: Session = Depends(database.get_db)) -> Any:
-    user = db.query(User).filter(User.email == login_in.email).first()
+async def login_user(login_in: LoginRequest, db: AsyncSession = Depends(database.get_async_db)) -> Any:
+    result = await db.execute(select(User).where(User.email == login_in.email))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
 
-    if not security.verify_password(login_in.password, user.hashed_password):
+    if not await asyncio.to_thread(security.verify_password, login_in.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
 
     access_token_expires = timedelta(minutes=security.settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -63,8 +68,8 @@ def login_user(login_in: LoginRequest, db: Session = Depends(database.get_db)) -
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/users/me", response_model=UserSchema)
-def read_current_user(
-    db: Session = Depends(database.get_db),
+async def read_current_user(
+    db: AsyncSession = Depends(database.get_async_db),
     credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
 ) -> Any:
     try:
@@ -72,7 +77,7 @@ def read_current_user(
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        user = db.query(User).filter(User.id == int(user_id)).first()
+        user = await db.get(User, int(user_id))
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return user
@@ -80,9 +85,9 @@ def read_current_user(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
 @router.put("/users/me", response_model=UserSchema)
-def update_current_user(
+async def update_current_user(
     *,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
     credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
     user_in: UserUpdate,
 ) -> Any:
@@ -91,12 +96,13 @@ def update_current_user(
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        user = db.query(User).filter(User.id == int(user_id)).first()
+        user = await db.get(User, int(user_id))
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
         if user_in.email and user_in.email != user.email:
-            existing_user = db.query(User).filter(User.email == user_in.email).first()
+            result = await db.execute(select(User).where(User.email == user_in.email))
+            existing_user = result.scalars().first()
             if existing_user:
                 raise HTTPException(status_code=400, detail="Email already in use")
             user.email = user_in.email
@@ -110,25 +116,26 @@ def update_current_user(
         if user_in.new_password:
             if not user_in.current_password:
                 raise HTTPException(status_code=400, detail="Current password required")
-            if not security.verify_password(user_in.current_password, user.hashed_password):
+            if not await asyncio.to_thread(security.verify_password, user_in.current_password, user.hashed_password):
                 raise HTTPException(status_code=400, detail="Incorrect current password")
-            user.hashed_password = security.get_password_hash(user_in.new_password)
+            user.hashed_password = await asyncio.to_thread(security.get_password_hash, user_in.new_password)
 
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         return user
     except (JWTError, ValueError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
 @router.post("/signup", response_model=UserSchema)
-def create_user(
+async def create_user(
     *,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
     user_in: UserCreate,
 ) -> Any:
     # user = db.query(User).filter(User.email == user_in.email).first()
-    user = db.query(User).filter(User.email == user_in.email).first()
+    result = await db.execute(select(User).where(User.email == user_in.email))
+    user = result.scalars().first()
     if user:
         raise HTTPException(
             status_code=400,
@@ -147,9 +154,9 @@ def create_user(
     new_user = User(
         email=user_in.email,
         name=user_in.name,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await asyncio.to_thread(security.get_password_hash, user_in.password),
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.readiness import readiness
+
+router = APIRouter()
+
+
+@router.get("/healthz", tags=["Health"])
+def healthz():
+    """
+    Liveness probe. Answers as soon as the process is serving.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/readyz", tags=["Health"])
+def readyz():
+    """
+    Readiness probe. Returns 503 until the warmup phase has finished.
+    """
+    state = readiness.snapshot()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Security, Request, Body
-from typing import Optional, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Security, Request, Body
+from typing import Any, Dict, Iterator, List, Optional
+import asyncio
+import json
 from pydantic import BaseModel, Field, validator
 from app.core import database
 from app.controllers.market_data_controller import market_controller
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from app.core.config import settings
+from app.utils.profiler import ProfiledRoute
 from app.utils.rate_limiter import SimpleRateLimiter
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 http_bearer = HTTPBearer(auto_error=False)
-rate_limiter = SimpleRateLimiter(limit=60, window_seconds=60)
+rate_limiter = SimpleRateLimiter(limit=60, window_seconds=60, name="api")
 
 
 class OrderRequest(BaseModel):
@@ -45,6 +49,17 @@ class OrderRequest(BaseModel):
             return "regular"
         return str(value).strip().lower()
 
+class BasketOrderRequest(BaseModel):
+    orders: List[OrderRequest] = Field(..., min_length=1, max_length=50)
+
+class ExportRequest(BaseModel):
+    # Either explicit instrument tokens or an index key (e.g. NIFTY50, NSE_UNIVERSE).
+    instrument_tokens: Optional[List[int]] = None
+    index: Optional[str] = None
+    scale: str = "1d"
+    start: str
+    end: str
+
 def get_current_user_optional(credentials: Optional[HTTPAuthorizationCredentials] = Security(http_bearer)):
     """
     Optional authentication - returns user_id if valid token provided, None otherwise.
@@ -80,26 +95,65 @@ def apply_rate_limit(user_id: Optional[str]) -> None:
     key = f"user:{user_id}" if user_id else "anonymous"
     rate_limiter.check(key)
 
+def _json_array(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[str]:
+    # One JSON array overall, written out a chunk at a time as chunks arrive.
+    opened = False
+    for chunk in chunks:
+        if chunk:
+            yield ("," if opened else "[") + ",".join(json.dumps(item) for item in chunk)
+            opened = True
+    yield "]" if opened else "[]"
+
 @router.get("/instruments", tags=["Market Data"])
-async def get_instruments(
-    db: Any = Depends(database.get_db),
+def get_instruments(
     current_user: Optional[str] = Security(get_current_user_optional)
 ):
     """
     Get list of available instruments. Authentication is optional.
     """
     apply_rate_limit(current_user)
-    return await market_controller.get_instruments(db)
+    return market_controller.get_instruments()
 
 @router.get("/nse-universe/zerodha", tags=["Market Data"])
-async def get_nse_universe_zerodha(
+def get_nse_universe_zerodha(
     current_user: Optional[str] = Security(get_current_user_optional)
 ):
     """
     Check NSE universe list against Zerodha NSE equity instruments.
     """
     apply_rate_limit(current_user)
-    return await market_controller.get_nse_universe_zerodha()
+    return market_controller.get_nse_universe_zerodha()
+
+@router.get("/indices/freshness", tags=["Market Data"])
+def get_index_freshness(
+    current_user: Optional[str] = Security(get_current_user_optional)
+):
+    """
+    Report when each NSE index constituents list was last refreshed.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.get_index_freshness()
+
+@router.get("/snapshot/status", tags=["Market Data"])
+def get_snapshot_status(
+    current_user: Optional[str] = Security(get_current_user_optional)
+):
+    """
+    Age and coverage of the background full-universe quote snapshot.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.get_snapshot_status()
+
+@router.get("/movers", tags=["Market Data"])
+def get_market_movers(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: Optional[str] = Security(get_current_user_optional)
+):
+    """
+    Top gainers/losers, volume spikes, 52-week-high proximity and advance/decline breadth.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.get_movers(limit)
 
 @router.get("/scales", tags=["Market Data"])
 def get_scales(current_user: Optional[str] = Security(get_current_user_optional)):
@@ -116,27 +170,140 @@ def get_strategies(current_user: Optional[str] = Security(get_current_user_optio
     return []
 
 @router.get("/historical-data", tags=["Market Data"])
-async def get_historical_data(
+def get_historical_data(
     instrument_token: int,
     scale: str = "5m",
     start: Optional[str] = None,
     end: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    max_points: Optional[int] = Query(None, ge=3, le=10000),
+    series: str = Query("candle", pattern="^(candle|line)$"),
     current_user: str = Security(get_current_user)
 ):
     """
     Get historical candle data for an instrument.
+    Long ranges are fetched in chunks and streamed as they arrive, either as one
+    JSON array or (format=ndjson) one candle per line. max_points downsamples the
+    range for display: OHLC buckets for candle series, LTTB for line series.
     """
     apply_rate_limit(current_user)
-    return await market_controller.get_historical_data(
+    chunks = market_controller.get_historical_data(
         instrument_token=instrument_token,
         interval=scale,
         from_date=start,
-        to_date=end
+        to_date=end,
+        max_points=max_points,
+        series=series
+    )
+    if format == "ndjson":
+        lines = ("".join(json.dumps(candle) + "\n" for candle in chunk) for chunk in chunks)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    return StreamingResponse(_json_array(chunks), media_type="application/json")
+
+@router.get("/candles", tags=["Market Data"])
+def get_candles(
+    instrument_token: int,
+    scale: str = "5m",
+    limit: int = Query(100, ge=1, le=500),
+    current_user: str = Security(get_current_user)
+):
+    """
+    Completed candles plus the forming bar, built from live ticks while the stream is up.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.get_candles(instrument_token, scale, limit)
+
+@router.post("/exports", tags=["Market Data"], status_code=202)
+def create_export(
+    export: ExportRequest,
+    current_user: str = Security(get_current_user)
+):
+    """
+    Queue a bulk historical export to a Parquet file, one row group per symbol.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.start_export(
+        current_user,
+        export.instrument_tokens,
+        export.index,
+        export.scale,
+        export.start,
+        export.end,
     )
 
+@router.get("/exports", tags=["Market Data"])
+def list_exports(current_user: str = Security(get_current_user)):
+    """
+    Recent export jobs for the current user.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.list_exports(current_user)
+
+@router.get("/exports/{job_id}", tags=["Market Data"])
+def get_export(job_id: str, current_user: str = Security(get_current_user)):
+    """
+    Progress of an export job.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.get_export(current_user, job_id)
+
+@router.get("/exports/{job_id}/download", tags=["Market Data"])
+def download_export(job_id: str, current_user: str = Security(get_current_user)):
+    """
+    Stream the finished Parquet file.
+    """
+    apply_rate_limit(current_user)
+    path = market_controller.export_file(current_user, job_id)
+    return FileResponse(path, media_type="application/vnd.apache.parquet", filename=f"history-{job_id}.parquet")
+
+@router.delete("/exports/{job_id}", tags=["Market Data"])
+def cancel_export(job_id: str, current_user: str = Security(get_current_user)):
+    """
+    Cancel a queued or running export.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.cancel_export(current_user, job_id)
+
+@router.get("/option-chain/expiries", tags=["Market Data"])
+def get_option_expiries(
+    underlying: str = "NIFTY",
+    current_user: str = Security(get_current_user)
+):
+    """
+    Upcoming option expiries for an underlying.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.get_option_expiries(underlying)
+
+@router.get("/option-chain", tags=["Market Data"])
+def get_option_chain(
+    underlying: str = "NIFTY",
+    expiry: Optional[str] = None,
+    strike_count: Optional[int] = Query(None, ge=1, le=500),
+    current_user: str = Security(get_current_user)
+):
+    """
+    Option chain with quotes, implied volatility and Greeks. Defaults to the
+    nearest expiry; strike_count keeps that many strikes around the money.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.get_option_chain(underlying, expiry, strike_count)
+
+@router.get("/iv-surface", tags=["Market Data"])
+def get_iv_surface(
+    underlying: str = "NIFTY",
+    max_expiries: int = Query(12, ge=1, le=60),
+    include_points: bool = False,
+    current_user: str = Security(get_current_user)
+):
+    """
+    Smoothed implied-volatility surface and ATM term structure for an underlying.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.get_iv_surface(underlying, max_expiries, include_points)
+
 @router.get("/nifty-50", tags=["Market Data"])
-async def get_nifty_50(
-    db: Any = Depends(database.get_db),
+def get_nifty_50(
     scale: str = "5m",
     search: Optional[str] = None,
     position: Optional[str] = None,
@@ -152,8 +319,8 @@ async def get_nifty_50(
     Get Nifty 50 constituents.
     """
     apply_rate_limit(current_user)
-    return await market_controller.get_nifty50(
-        db=db,
+    return market_controller.get_nifty50(
+        current_user,
         scale=scale,
         search=search,
         position=position,
@@ -166,8 +333,7 @@ async def get_nifty_50(
     )
 
 @router.get("/bank-nifty", tags=["Market Data"])
-async def get_bank_nifty(
-    db: Any = Depends(database.get_db),
+def get_bank_nifty(
     scale: str = "5m",
     search: Optional[str] = None,
     position: Optional[str] = None,
@@ -182,8 +348,8 @@ async def get_bank_nifty(
     Get Bank Nifty constituents.
     """
     apply_rate_limit(current_user)
-    return await market_controller.get_banknifty(
-        db=db,
+    return market_controller.get_banknifty(
+        current_user,
         scale=scale,
         search=search,
         position=position,
@@ -195,24 +361,34 @@ async def get_bank_nifty(
     )
 
 @router.get("/positions", tags=["Portfolio"])
-async def get_positions(
+def get_positions(
     current_user: str = Security(get_current_user)
 ):
     """
     Get Open Positions.
     """
     apply_rate_limit(current_user)
-    return await market_controller.get_positions()
+    return market_controller.get_positions(current_user)
 
 @router.get("/holdings", tags=["Portfolio"])
-async def get_holdings(
+def get_holdings(
     current_user: str = Security(get_current_user)
 ):
     """
     Get Holdings.
     """
     apply_rate_limit(current_user)
-    return await market_controller.get_holdings()
+    return market_controller.get_holdings(current_user)
+
+@router.get("/pnl", tags=["Portfolio"])
+def get_pnl(
+    current_user: str = Security(get_current_user)
+):
+    """
+    Day and total P&L for positions and holdings, revalued from live ticks.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.get_pnl_summary(current_user)
 
 @router.get("/margins", tags=["Portfolio"])
 def get_margins(
@@ -222,7 +398,7 @@ def get_margins(
     Get account margins and available balance.
     """
     apply_rate_limit(current_user)
-    return market_controller.get_margins()
+    return market_controller.get_margins(current_user)
 
 @router.get("/quote", tags=["Market Data"])
 def get_quote(
@@ -238,13 +414,60 @@ def get_quote(
 
 @router.get("/orders", tags=["Orders"])
 def get_orders(
+    since: Optional[str] = Query(None, max_length=64),
+    current_user: str = Security(get_current_user)
+):
+    """
+    Get recent orders. With since=<cursor> from a previous response, only orders
+    changed after it; reset=true means the cursor is stale and all orders follow.
+    """
+    apply_rate_limit(current_user)
+    return market_controller.get_orders(current_user, since)
+
+@router.get("/orders/stream", tags=["Orders"])
+async def stream_orders(
     current_user: str = Security(get_current_user)
 ):
     """
-    Get recent orders.
+    Server-sent events stream with one event per order state change.
     """
     apply_rate_limit(current_user)
-    return market_controller.get_orders()
+    # Creating the session can hit the database; keep it off the event loop.
+    order_book = await asyncio.to_thread(market_controller.order_book_for, current_user)
+    queue = order_book.subscribe()
+
+    async def events():
+        try:
+            while True:
+                try:
+                    order = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: order\ndata: {json.dumps(order, default=str)}\n\n"
+        finally:
+            order_book.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.get("/orders/{order_id}/wait", tags=["Orders"])
+async def wait_for_order_change(
+    order_id: str,
+    since_version: int = 0,
+    timeout: float = Query(25, gt=0, le=60),
+    current_user: str = Security(get_current_user)
+):
+    """
+    Long-poll: resolves as soon as the order's version moves past since_version.
+    """
+    apply_rate_limit(current_user)
+    order_book = await asyncio.to_thread(market_controller.order_book_for, current_user)
+    if order_book.get(order_id) is None:
+        await asyncio.to_thread(market_controller.get_order_status, current_user, order_id)
+    order = await order_book.wait_for_change(order_id, since_version, timeout)
+    if order is None:
+        return {"changed": False, "order": order_book.get(order_id)}
+    return {"changed": True, "order": order}
 
 @router.get("/orders/{order_id}", tags=["Orders"])
 def get_order_status(
@@ -255,7 +478,7 @@ def get_order_status(
     Get latest status for an order.
     """
     apply_rate_limit(current_user)
-    return market_controller.get_order_status(order_id)
+    return market_controller.get_order_status(current_user, order_id)
 
 @router.post("/order-margins", tags=["Orders"])
 def get_order_margins(
@@ -266,7 +489,7 @@ def get_order_margins(
     Estimate order margin requirements and charges.
     """
     apply_rate_limit(current_user)
-    return market_controller.get_order_margins(order.dict())
+    return market_controller.get_order_margins(current_user, order.dict())
 
 @router.get("/zerodha/login-url", tags=["Zerodha"])
 def get_zerodha_login_url(
@@ -283,13 +506,23 @@ def get_zerodha_login_url_post(
     apply_rate_limit(current_user)
     return {"login_url": market_controller.get_login_url()}
 
+@router.post("/zerodha/postback", tags=["Zerodha"])
+async def zerodha_postback(request: Request):
+    """
+    Order update postbacks from Zerodha. Authenticated by the payload checksum.
+    """
+    payload = await request.json()
+    # Routing can look up the order's owner in the database.
+    await asyncio.to_thread(market_controller.ingest_postback, payload)
+    return {"status": "ok"}
+
 @router.post("/zerodha/session", tags=["Zerodha"])
 def create_zerodha_session(
     request_token: str,
     current_user: Optional[str] = Security(get_current_user_optional)
 ):
     apply_rate_limit(current_user)
-    return market_controller.create_session(request_token)
+    return market_controller.create_session(request_token, current_user)
 
 @router.post("/orders", tags=["Orders"])
 def place_order(
@@ -297,10 +530,24 @@ def place_order(
     current_user: str = Security(get_current_user)
 ):
     apply_rate_limit(current_user)
-    return market_controller.place_order(order.dict())
+    return market_controller.place_order(current_user, order.dict())
+
+@router.post("/orders/basket", tags=["Orders"])
+def place_basket_order(
+    basket: BasketOrderRequest,
+    current_user: str = Security(get_current_user)
+):
+    """
+    Validate, margin-check and submit a basket of orders.
+    Streams one NDJSON line per leg as each submission completes.
+    """
+    apply_rate_limit(current_user)
+    prepared = market_controller.prepare_basket(current_user, [order.dict() for order in basket.orders])
+    lines = (json.dumps(result, default=str) + "\n" for result in market_controller.submit_basket(prepared))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 @router.post("/sync-instruments", tags=["Zerodha"])
-async def sync_instruments(
+def sync_instruments(
     db: Any = Depends(database.get_db),
     current_user: Optional[str] = Security(get_current_user_optional)
 ):
@@ -370,5 +617,6 @@ async def sync_instruments(
         db.bulk_save_objects(instruments)
         
     db.commit()
+    market_controller.invalidate_option_index()
     
     return {"message": "Instruments synced successfully", "count": db.query(Instrument).count()}
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.utils.metrics import registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus scrape endpoint (text exposition format 0.0.4).
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,320 @@
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+IST = timezone(timedelta(hours=5, minutes=30))
+SESSION_OPEN_SECONDS = (9 * 60 + 15) * 60
+SESSION_CLOSE_SECONDS = (15 * 60 + 30) * 60
+SESSION_SECONDS = SESSION_CLOSE_SECONDS - SESSION_OPEN_SECONDS
+DAY_SECONDS = 86400
+
+# Kite interval name -> bar length in seconds. Day bars start at midnight IST, as
+# Kite stamps its day candles, and close with the session.
+INTERVALS: Dict[str, int] = {
+    "minute": 60,
+    "3minute": 180,
+    "5minute": 300,
+    "10minute": 600,
+    "15minute": 900,
+    "30minute": 1800,
+    "60minute": 3600,
+    "day": DAY_SECONDS,
+}
+DEFAULT_INTERVALS = ("minute", "5minute", "15minute", "30minute", "60minute", "day")
+
+# (start epoch, open, high, low, close, volume)
+Bar = Tuple[float, float, float, float, float, int]
+
+
+def _epoch(value: Any) -> Optional[float]:
+    if isinstance(value, datetime):
+        # Kite's ticker sends naive exchange (IST) timestamps.
+        return (value if value.tzinfo else value.replace(tzinfo=IST)).timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def _day_start(ts: np.ndarray) -> np.ndarray:
+    """Epoch of midnight IST on the trading day of each timestamp."""
+    ist = ts + 5.5 * 3600
+    return ist - np.mod(ist, DAY_SECONDS) - 5.5 * 3600
+
+
+def _session_open(ts: np.ndarray) -> np.ndarray:
+    """Epoch of 09:15 IST on the trading day of each timestamp."""
+    return _day_start(ts) + SESSION_OPEN_SECONDS
+
+
+class _IntervalState:
+    """Forming bar per instrument row as column arrays, plus completed bars per row."""
+
+    def __init__(self, seconds: int, capacity: int, max_bars: int, session_hours: bool = True) -> None:
+        self.seconds = seconds
+        self.session_hours = session_hours
+        self.max_bars = max_bars
+        self.start = np.full(capacity, np.nan)
+        self.open = np.zeros(capacity)
+        self.high = np.zeros(capacity)
+        self.low = np.zeros(capacity)
+        self.close = np.zeros(capacity)
+        # Cumulative day volume when the bar opened, and at the latest tick.
+        self.volume_base = np.zeros(capacity)
+        self.volume_last = np.full(capacity, np.nan)
+        self.history: Dict[int, Deque[Bar]] = {}
+
+    def grow(self, capacity: int) -> None:
+        for name, fill in (("start", np.nan), ("open", 0), ("high", 0), ("low", 0), ("close", 0), ("volume_base", 0), ("volume_last", np.nan)):
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.full(capacity - column.size, fill)]))
+
+    def bar_start(self, ts: np.ndarray) -> np.ndarray:
+        if self.seconds >= DAY_SECONDS:
+            return _day_start(ts)
+        opened = _session_open(ts)
+        return opened + np.floor((ts - opened) / self.seconds) * self.seconds
+
+    def bar_end(self, start: float) -> float:
+        if not self.session_hours:
+            return start + self.seconds
+        closes = float(_session_open(np.array([start]))[0]) + SESSION_SECONDS
+        return min(start + self.seconds, closes)
+
+    def forming(self, row: int) -> Optional[Bar]:
+        if np.isnan(self.start[row]):
+            return None
+        volume = max(0, int((self.volume_last[row] if np.isfinite(self.volume_last[row]) else 0) - self.volume_base[row]))
+        return (float(self.start[row]), float(self.open[row]), float(self.high[row]), float(self.low[row]), float(self.close[row]), volume)
+
+    def complete(self, row: int) -> None:
+        bar = self.forming(row)
+        if bar is None:
+            return
+        self.history.setdefault(row, deque(maxlen=self.max_bars)).append(bar)
+        self.start[row] = np.nan
+        # The next bar's volume counts from where this one stopped.
+        self.volume_base[row] = self.volume_last[row] if np.isfinite(self.volume_last[row]) else 0
+
+
+class CandleAggregator:
+    """
+    Streaming OHLCV bars for every instrument that ticks, at every supported interval.
+
+    Each tick batch is turned into arrays once; per interval the bar start of every
+    tick is computed in one vector operation (intraday bars are anchored to the
+    09:15 IST open, day bars to midnight IST like Kite's day candles, and the last
+    bar of the day is cut at 15:30), and the forming bar of each
+    instrument is updated with grouped first/last/max/min reductions. A bar is
+    completed when a tick lands in a later bar or, lazily on read, once its end
+    time has passed. Ticks outside the session are ignored unless
+    ``session_hours`` is off, as for the simulated feed, which trades around the
+    clock; bars then run their full length.
+
+    Bar volume comes from the feed's cumulative day volume, so it is exact even
+    when ticks are conflated. History from the historical API is seeded once per
+    instrument and interval; after that the aggregator extends it on its own.
+    """
+
+    def __init__(
+        self,
+        intervals: Iterable[str] = DEFAULT_INTERVALS,
+        max_bars: int = 500,
+        capacity: int = 256,
+        session_hours: bool = True,
+    ) -> None:
+        self._rows: Dict[int, int] = {}
+        self._capacity = capacity
+        self.session_hours = session_hours
+        self._states = {name: _IntervalState(INTERVALS[name], capacity, max_bars, session_hours) for name in intervals}
+        # (token, interval) -> trading day the historical seed covers.
+        self._seeded: Dict[Tuple[int, str], date] = {}
+        self._lock = threading.Lock()
+        self.ticks_seen = 0
+
+    def supports(self, interval: str) -> bool:
+        return interval in self._states
+
+    def _row(self, token: int) -> int:
+        row = self._rows.get(token)
+        if row is None:
+            row = self._rows[token] = len(self._rows)
+            if row >= self._capacity:
+                self._capacity *= 2
+                for state in self._states.values():
+                    state.grow(self._capacity)
+        return row
+
+    def on_ticks(self, ticks: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        parsed = []
+        for tick in ticks:
+            token = tick.get("instrument_token")
+            price = tick.get("last_price")
+            if token is None or price is None:
+                continue
+            ts = _epoch(tick.get("exchange_timestamp")) or _epoch(tick.get("last_trade_time")) or now
+            volume = tick.get("volume_traded")
+            parsed.append((token, ts, price, np.nan if volume is None else volume))
+        if not parsed:
+            return
+
+        with self._lock:
+            rows = np.array([self._row(int(item[0])) for item in parsed], dtype=np.int64)
+            ts = np.array([item[1] for item in parsed], dtype=float)
+            price = np.array([item[2] for item in parsed], dtype=float)
+            volume = np.array([item[3] for item in parsed], dtype=float)
+            if self.session_hours:
+                opened = _session_open(ts)
+                in_session = (ts >= opened) & (ts < opened + SESSION_SECONDS)
+                if not in_session.all():
+                    rows, ts, price, volume = rows[in_session], ts[in_session], price[in_session], volume[in_session]
+            if rows.size == 0:
+                return
+            # Stable time order keeps first/last tick semantics within the batch.
+            order = np.argsort(ts, kind="stable")
+            rows, ts, price, volume = rows[order], ts[order], price[order], volume[order]
+            for state in self._states.values():
+                self._apply(state, rows, state.bar_start(ts), price, volume)
+            self.ticks_seen += int(rows.size)
+
+    def _apply(self, state: _IntervalState, rows: np.ndarray, starts: np.ndarray, price: np.ndarray, volume: np.ndarray) -> None:
+        # A batch almost always falls in a single bar; at a boundary it spans two.
+        for bar in np.unique(starts):
+            sel = starts == bar
+            bar_rows, bar_price, bar_volume = rows[sel], price[sel], volume[sel]
+            unique_rows, first = np.unique(bar_rows, return_index=True)
+            last = bar_rows.size - 1 - np.unique(bar_rows[::-1], return_index=True)[1]
+            high = np.full(unique_rows.size, -np.inf)
+            low = np.full(unique_rows.size, np.inf)
+            slot = np.searchsorted(unique_rows, bar_rows)
+            np.maximum.at(high, slot, bar_price)
+            np.minimum.at(low, slot, bar_price)
+
+            current = state.start[unique_rows]
+            late = current > bar
+            if late.any():
+                # Out-of-order ticks for a bar already completed are dropped.
+                keep = ~late
+                unique_rows, first, last, high, low, current = (
+                    unique_rows[keep], first[keep], last[keep], high[keep], low[keep], current[keep],
+                )
+            for row in unique_rows[current < bar].tolist():
+                state.complete(row)
+            fresh = np.isnan(state.start[unique_rows])
+            if fresh.any():
+                new_rows = unique_rows[fresh]
+                state.start[new_rows] = bar
+                state.open[new_rows] = bar_price[first[fresh]]
+                state.high[new_rows] = -np.inf
+                state.low[new_rows] = np.inf
+                # Never-seen instruments start counting from their first tick.
+                unseen = ~np.isfinite(state.volume_last[new_rows])
+                state.volume_base[new_rows[unseen]] = np.nan_to_num(bar_volume[first[fresh]][unseen])
+            # A bar seeded from the API holds minus its volume so far until the first tick
+            # gives the cumulative volume to count from.
+            seeded = ~fresh & ~np.isfinite(state.volume_last[unique_rows])
+            if seeded.any():
+                state.volume_base[unique_rows[seeded]] += np.nan_to_num(bar_volume[first[seeded]])
+
+            state.high[unique_rows] = np.maximum(state.high[unique_rows], high)
+            state.low[unique_rows] = np.minimum(state.low[unique_rows], low)
+            state.close[unique_rows] = bar_price[last]
+            last_volume = bar_volume[last]
+            known = np.isfinite(last_volume)
+            # Cumulative volume restarts each day.
+            reset = known & (last_volume < state.volume_base[unique_rows])
+            state.volume_base[unique_rows[reset]] = 0
+            state.volume_last[unique_rows[known]] = last_volume[known]
+
+    def _close_due(self, state: _IntervalState, row: int, now: float) -> None:
+        start = state.start[row]
+        if not np.isnan(start) and state.bar_end(float(start)) <= now:
+            state.complete(row)
+
+    def needs_seed(self, token: int, interval: str) -> bool:
+        return self._seeded.get((int(token), interval)) != datetime.now(IST).date()
+
+    def seed(self, token: int, interval: str, candles: List[Dict[str, Any]]) -> None:
+        """
+        Load completed history from the historical API. Bars the aggregator has
+        already built take precedence; a bar it only saw part of is merged with
+        the API's version of it.
+        """
+        state = self._states.get(interval)
+        if state is None:
+            return
+        bars = []
+        for candle in candles:
+            start = _epoch(candle["date"])
+            if start is not None:
+                bars.append((start, candle["open"], candle["high"], candle["low"], candle["close"], int(candle["volume"] or 0)))
+        with self._lock:
+            row = self._row(int(token))
+            built = list(state.history.get(row, ()))
+            first_built = built[0][0] if built else state.start[row]
+            if not np.isnan(first_built):
+                earlier = [bar for bar in bars if bar[0] < first_built]
+                overlap = next((bar for bar in bars if bar[0] == first_built), None)
+                if overlap is not None:
+                    if built:
+                        built[0] = _merge(overlap, built[0])
+                    else:
+                        start, o, h, low, c, v = overlap
+                        state.open[row] = o
+                        state.high[row] = max(state.high[row], h)
+                        state.low[row] = min(state.low[row], low)
+                        # The API's bar includes volume from before the first streamed tick.
+                        state.volume_base[row] -= max(0, v - (state.volume_last[row] - state.volume_base[row]))
+                bars = earlier
+            elif bars and state.bar_end(bars[-1][0]) > time.time():
+                # Nothing streamed yet and the API's newest bar is still forming: it
+                # becomes the forming bar that ticks extend.
+                start, o, h, low, c, v = bars.pop()
+                state.start[row], state.open[row], state.high[row], state.low[row], state.close[row] = start, o, h, low, c
+                state.volume_base[row] = -v
+            merged = bars + built
+            state.history[row] = deque(merged[-state.max_bars:], maxlen=state.max_bars)
+            self._seeded[(int(token), interval)] = datetime.now(IST).date()
+
+    def candles(self, token: int, interval: str, limit: int = 100) -> Tuple[List[Bar], Optional[Bar]]:
+        """Up to ``limit`` most recent completed bars and the forming bar, if any."""
+        state = self._states.get(interval)
+        if state is None:
+            return [], None
+        with self._lock:
+            row = self._rows.get(int(token))
+            if row is None:
+                return [], None
+            self._close_due(state, row, time.time())
+            history = state.history.get(row) or ()
+            completed = list(history)[-limit:] if limit else []
+            return completed, state.forming(row)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "instruments": len(self._rows),
+            "intervals": list(self._states),
+            "ticks_seen": self.ticks_seen,
+            "seeded": len(self._seeded),
+        }
+
+
+def _merge(api_bar: Bar, streamed: Bar) -> Bar:
+    start, o, h, low, _c, v = api_bar
+    return (start, o, max(h, streamed[2]), min(low, streamed[3]), streamed[4], max(v, streamed[5]))
+
+
+def bar_to_candle(bar: Bar) -> Dict[str, Any]:
+    start, o, h, low, c, v = bar
+    return {
+        "date": datetime.fromtimestamp(start, IST).isoformat(),
+        "open": o,
+        "high": h,
+        "low": low,
+        "close": c,
+        "volume": v,
+    }
@@ -0,0 +1,221 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# (instrument_token, interval, start, end) -> candle chunks in date order, as Kite returns them.
+HistoryFetch = Callable[[int, str, datetime, datetime], Iterable[List[Dict[str, Any]]]]
+
+
+def export_schema() -> "pa.Schema":
+    # pyarrow is imported on first export, not with the app: few workers ever need it.
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("symbol", pa.dictionary(pa.int32(), pa.string())),
+            ("instrument_token", pa.int64()),
+            ("date", pa.timestamp("ms", tz="Asia/Kolkata")),
+            ("open", pa.float64()),
+            ("high", pa.float64()),
+            ("low", pa.float64()),
+            ("close", pa.float64()),
+            ("volume", pa.int64()),
+        ]
+    )
+
+TERMINAL_STATES = {"done", "failed", "cancelled"}
+
+
+class ExportJob:
+    def __init__(
+        self,
+        owner: str,
+        instruments: List[Tuple[int, str]],
+        interval: str,
+        start: datetime,
+        end: datetime,
+    ) -> None:
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.instruments = instruments
+        self.interval = interval
+        self.start = start
+        self.end = end
+        self.state = "queued"
+        self.completed = 0
+        self.rows = 0
+        self.failures: Dict[str, str] = {}
+        self.error: Optional[str] = None
+        self.path: Optional[Path] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancelled = threading.Event()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "interval": self.interval,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "instruments": len(self.instruments),
+            "completed": self.completed,
+            "failed": len(self.failures),
+            "failures": self.failures,
+            "rows": self.rows,
+            "bytes": self.path.stat().st_size if self.state == "done" and self.path else None,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class HistoryExporter:
+    """
+    Runs bulk historical exports into one Parquet file per job.
+
+    Jobs run one at a time in submission order; inside a job up to
+    ``concurrency`` instruments are fetched at once on the exporter's own
+    threads (upstream calls are still paced by the caller's rate limiter). Each instrument is written as its own
+    row group as soon as it completes, sorted by date, so readers can pull one
+    symbol without scanning the rest and memory stays bounded to the
+    instruments in flight. The file is zstd-compressed and only renamed into
+    place once every instrument has been written.
+    """
+
+    def __init__(self, fetch: HistoryFetch, directory: Path, concurrency: int = 4, keep_jobs: int = 20) -> None:
+        self.fetch = fetch
+        self.directory = directory
+        self.concurrency = concurrency
+        self.keep_jobs = keep_jobs
+        self._jobs: Dict[str, ExportJob] = {}
+        self._lock = threading.Lock()
+        self._runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-export")
+
+    def submit(
+        self,
+        owner: str,
+        instruments: List[Tuple[int, str]],
+        interval: str,
+        start: datetime,
+        end: datetime,
+    ) -> ExportJob:
+        job = ExportJob(owner, instruments, interval, start, end)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune_locked()
+        self._runner.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        return self._jobs.get(job_id)
+
+    def jobs(self, owner: str) -> List[ExportJob]:
+        return [job for job in self._jobs.values() if job.owner == owner]
+
+    def cancel(self, job: ExportJob) -> None:
+        job.cancelled.set()
+        if job.state == "queued":
+            job.state = "cancelled"
+            job.finished_at = time.time()
+
+    def shutdown(self) -> None:
+        for job in list(self._jobs.values()):
+            job.cancelled.set()
+        self._runner.shutdown(wait=False, cancel_futures=True)
+
+    def _prune_locked(self) -> None:
+        finished = sorted(
+            (job for job in self._jobs.values() if job.state in TERMINAL_STATES),
+            key=lambda job: job.created_at,
+        )
+        for job in finished[: max(0, len(self._jobs) - self.keep_jobs)]:
+            del self._jobs[job.id]
+            if job.path is not None:
+                job.path.unlink(missing_ok=True)
+
+    def _table(self, schema: "pa.Schema", token: int, symbol: str, candles: List[Dict[str, Any]]) -> "pa.Table":
+        import pyarrow as pa
+
+        count = len(candles)
+        return pa.Table.from_pydict(
+            {
+                "symbol": pa.DictionaryArray.from_arrays(pa.array([0] * count, pa.int32()), pa.array([symbol])),
+                "instrument_token": [token] * count,
+                "date": [c["date"] for c in candles],
+                "open": [c["open"] for c in candles],
+                "high": [c["high"] for c in candles],
+                "low": [c["low"] for c in candles],
+                "close": [c["close"] for c in candles],
+                "volume": [c["volume"] for c in candles],
+            },
+            schema=schema,
+        )
+
+    def _fetch_all(self, job: ExportJob, token: int) -> List[Dict[str, Any]]:
+        candles: List[Dict[str, Any]] = []
+        chunks = iter(self.fetch(token, job.interval, job.start, job.end))
+        try:
+            for chunk in chunks:
+                if job.cancelled.is_set():
+                    break
+                candles.extend(chunk)
+        finally:
+            # Lets the fetcher drop windows it queued ahead.
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+        return candles
+
+    def _run(self, job: ExportJob) -> None:
+        if job.cancelled.is_set():
+            return
+        import pyarrow.parquet as pq
+
+        job.state = "running"
+        job.started_at = time.time()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        partial = self.directory / f"{job.id}.parquet.part"
+        schema = export_schema()
+        try:
+            with pq.ParquetWriter(partial, schema, compression="zstd") as writer:
+                with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="history-export-fetch") as pool:
+                    futures = {pool.submit(self._fetch_all, job, token): (token, symbol) for token, symbol in job.instruments}
+                    for future in as_completed(futures):
+                        token, symbol = futures[future]
+                        if job.cancelled.is_set():
+                            for pending in futures:
+                                pending.cancel()
+                            break
+                        try:
+                            candles = future.result()
+                        except Exception as exc:
+                            job.failures[symbol] = getattr(exc, "detail", None) or str(exc)
+                            continue
+                        if candles:
+                            writer.write_table(self._table(schema, token, symbol, candles))
+                            job.rows += len(candles)
+                        job.completed += 1
+            if job.cancelled.is_set():
+                partial.unlink(missing_ok=True)
+                job.state = "cancelled"
+            else:
+                job.path = partial.with_suffix("")
+                partial.replace(job.path)
+                job.state = "done"
+        except Exception as exc:
+            partial.unlink(missing_ok=True)
+            job.state = "failed"
+            job.error = str(exc)
+            print(f"History export {job.id} failed: {exc}")
+        finally:
+            job.finished_at = time.time()
@@ -0,0 +1,161 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+import requests
+
+from app.utils.metrics import Histogram
+
+NSE_INDEX_URL = "https://www.nseindia.com/api/equity-stockIndices?index={index}"
+
+NSE_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/91.0.4472.124 Safari/537.36"
+    ),
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://www.nseindia.com/market-data/live-equity-market",
+}
+
+# Cache key -> NSE index name
+NSE_INDICES: Dict[str, str] = {
+    "NIFTY50": "NIFTY 50",
+    "BANKNIFTY": "NIFTY BANK",
+    "NIFTYNEXT50": "NIFTY NEXT 50",
+    "FINNIFTY": "NIFTY FINANCIAL SERVICES",
+    "MIDCPNIFTY": "NIFTY MIDCAP SELECT",
+    "NIFTYIT": "NIFTY IT",
+    "NIFTYAUTO": "NIFTY AUTO",
+    "NIFTYPHARMA": "NIFTY PHARMA",
+    "NIFTYFMCG": "NIFTY FMCG",
+    "NIFTYMETAL": "NIFTY METAL",
+}
+
+
+NSE_FETCH_SECONDS = Histogram(
+    "nse_fetch_duration_seconds",
+    "Latency of nseindia.com index constituent fetches.",
+    ("index", "outcome"),
+)
+
+
+class IndexConstituentsRefresher:
+    """
+    Keeps NSE index constituents fresh from a background task.
+
+    Readers only ever see the last good list held in ``cache`` (the controller's
+    ``_index_cache``), so a slow or failing nseindia.com never reaches the request
+    path. Failed refreshes back off exponentially with jitter.
+    """
+
+    def __init__(
+        self,
+        cache: Dict[str, Dict[str, Any]],
+        indices: Optional[Dict[str, str]] = None,
+        ttl_seconds: int = 3600,
+        base_backoff_seconds: int = 30,
+        max_backoff_seconds: int = 900,
+        timeout_seconds: int = 10,
+    ) -> None:
+        self.cache = cache
+        self.indices = indices or dict(NSE_INDICES)
+        self.ttl_seconds = ttl_seconds
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self._state: Dict[str, Dict[str, Any]] = {
+            key: {"failures": 0, "last_error": None, "last_attempt": None, "next_refresh_at": 0.0}
+            for key in self.indices
+        }
+
+    def get(self, key: str) -> List[str]:
+        cached = self.cache.get(key)
+        return cached["data"] if cached else []
+
+    def _url(self, key: str) -> str:
+        return NSE_INDEX_URL.format(index=quote(self.indices[key]))
+
+    def _schedule_success(self, key: str, now: float) -> None:
+        # +/-10% spread so workers started together don't refresh in lockstep.
+        spread = self.ttl_seconds * 0.1
+        self._state[key]["next_refresh_at"] = now + self.ttl_seconds + random.uniform(-spread, spread)
+
+    def _schedule_failure(self, key: str, now: float) -> None:
+        state = self._state[key]
+        delay = min(self.max_backoff_seconds, self.base_backoff_seconds * (2 ** (state["failures"] - 1)))
+        state["next_refresh_at"] = now + random.uniform(delay / 2, delay)
+
+    def fetch(self, key: str) -> bool:
+        now = time.time()
+        state = self._state[key]
+        state["last_attempt"] = now
+        started = time.perf_counter()
+        try:
+            response = requests.get(self._url(key), headers=NSE_HEADERS, timeout=self.timeout_seconds)
+            if response.status_code != 200:
+                raise ValueError(f"Bad status {response.status_code}")
+            data = response.json()
+            symbols = [stock.get("symbol") for stock in data.get("data", []) if stock.get("symbol")]
+            # NSE lists the index itself as the first row.
+            symbols = [symbol for symbol in symbols if symbol != self.indices[key]]
+            if not symbols:
+                raise ValueError("Empty constituents list")
+        except Exception as exc:
+            NSE_FETCH_SECONDS.observe(time.perf_counter() - started, index=key, outcome="error")
+            print(f"NSE index fetch failed ({key}): {exc}")
+            state["failures"] += 1
+            state["last_error"] = str(exc)
+            self._schedule_failure(key, now)
+            return False
+        NSE_FETCH_SECONDS.observe(time.perf_counter() - started, index=key, outcome="ok")
+        self.cache[key] = {"data": symbols, "ts": now}
+        state["failures"] = 0
+        state["last_error"] = None
+        self._schedule_success(key, now)
+        return True
+
+    def ensure_loaded(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            if not self.cache.get(key):
+                self.fetch(key)
+
+    def refresh_due(self) -> None:
+        now = time.time()
+        for key, state in self._state.items():
+            cached = self.cache.get(key)
+            if state["last_attempt"] is None and cached:
+                # Restored from a snapshot: honour the original fetch time.
+                state["next_refresh_at"] = cached["ts"] + self.ttl_seconds
+            if state["next_refresh_at"] <= now:
+                self.fetch(key)
+
+    async def run(self, poll_seconds: float = 5.0) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh_due)
+            except Exception as exc:
+                print(f"Index refresher error: {exc}")
+            await asyncio.sleep(poll_seconds)
+
+    def freshness(self) -> Dict[str, Any]:
+        now = time.time()
+        report: Dict[str, Any] = {}
+        for key, name in self.indices.items():
+            state = self._state[key]
+            cached = self.cache.get(key)
+            fetched_at = cached["ts"] if cached else None
+            report[key] = {
+                "index": name,
+                "count": len(cached["data"]) if cached else 0,
+                "fetched_at": fetched_at,
+                "age_seconds": round(now - fetched_at, 1) if fetched_at else None,
+                "stale": fetched_at is None or now - fetched_at > self.ttl_seconds,
+                "consecutive_failures": state["failures"],
+                "last_error": state["last_error"],
+                "next_refresh_in_seconds": max(0.0, round(state["next_refresh_at"] - now, 1)),
+            }
+        return report
@@ -0,0 +1,234 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.option_chain import ExpiryChain, option_premium, years_to_expiry
+from app.utils import black_scholes
+
+# Log-moneyness ln(K/F) at which the smoothed surface is reported.
+MONEYNESS_GRID = np.round(np.linspace(-0.2, 0.2, 21), 4)
+# Expiries need this many solved strikes before a smile is fitted.
+MIN_FIT_POINTS = 3
+
+
+class SurfaceOptions:
+    """The out-of-the-money side of every strike across the selected expiries, as flat arrays."""
+
+    def __init__(self, chains: List[ExpiryChain], spot: float, rate: float, now: Optional[datetime] = None) -> None:
+        self.chains = chains
+        self.years = np.array([years_to_expiry(chain.expiry, now) for chain in chains])
+        self.forwards = spot * np.exp(rate * self.years)
+        expiry, strikes, tokens, is_call, symbols = [], [], [], [], []
+        for position, chain in enumerate(chains):
+            # Puts below the forward and calls above it: the liquid, time-value-only side.
+            calls = chain.strikes >= self.forwards[position]
+            side_tokens = np.where(calls, chain.ce_tokens, chain.pe_tokens)
+            side_symbols = [ce if call else pe for ce, pe, call in zip(chain.ce_symbols, chain.pe_symbols, calls.tolist())]
+            present = side_tokens >= 0
+            expiry.append(np.full(int(present.sum()), position))
+            strikes.append(chain.strikes[present])
+            tokens.append(side_tokens[present])
+            is_call.append(calls[present])
+            symbols.extend(symbol for symbol, keep in zip(side_symbols, present.tolist()) if keep)
+        self.expiry = np.concatenate(expiry) if expiry else np.zeros(0, np.int64)
+        self.strikes = np.concatenate(strikes) if strikes else np.zeros(0)
+        self.tokens = np.concatenate(tokens) if tokens else np.zeros(0, np.int64)
+        self.is_call = np.concatenate(is_call) if is_call else np.zeros(0, bool)
+        self.symbols = symbols
+
+    def quote_keys(self) -> List[str]:
+        return [f"NFO:{symbol}" for symbol in self.symbols]
+
+
+class _SurfaceState:
+    __slots__ = ("tokens", "premiums", "iv", "spot", "solved_at", "result")
+
+    def __init__(self, tokens, premiums, iv, spot, solved_at, result) -> None:
+        self.tokens = tokens
+        self.premiums = premiums
+        self.iv = iv
+        self.spot = spot
+        self.solved_at = solved_at
+        self.result = result
+
+
+def fit_smiles(expiry: np.ndarray, k: np.ndarray, total_variance: np.ndarray, weight: np.ndarray, expiries: int) -> np.ndarray:
+    """
+    Weighted quadratic fit w(k) = a + b k + c k^2 of total variance per expiry,
+    solved for every expiry at once from grouped normal equations. Rows are NaN
+    where an expiry has too few points.
+    """
+    powers = k[:, None] ** np.arange(5)
+    moments = np.stack([np.bincount(expiry, weight * powers[:, p], expiries) for p in range(5)], axis=1)
+    targets = np.stack([np.bincount(expiry, weight * total_variance * powers[:, p], expiries) for p in range(3)], axis=1)
+    normal = moments[:, [[0, 1, 2], [1, 2, 3], [2, 3, 4]]]
+    counts = np.bincount(expiry, minlength=expiries)
+    usable = (counts >= MIN_FIT_POINTS) & (np.abs(np.linalg.det(normal)) > 1e-18)
+    coefficients = np.full((expiries, 3), np.nan)
+    if usable.any():
+        coefficients[usable] = np.linalg.solve(normal[usable], targets[usable][..., None])[..., 0]
+    return coefficients
+
+
+class IVSurfaceEngine:
+    """
+    Implied-volatility surfaces per underlying, rebuilt incrementally.
+
+    Each build solves IV only for options whose premium changed since the last
+    solve, warm-started from their previous IV; unchanged options keep theirs.
+    Everything is re-solved when spot has moved more than ``spot_tolerance``
+    (relative) or the last full solve is older than ``full_refresh_seconds``,
+    since both shift every option's IV. Smiles are then refitted for all
+    expiries in one batched least-squares solve.
+    """
+
+    def __init__(self, rate: float, spot_tolerance: float = 0.0005, full_refresh_seconds: float = 60) -> None:
+        self.rate = rate
+        self.spot_tolerance = spot_tolerance
+        self.full_refresh_seconds = full_refresh_seconds
+        self._states: Dict[str, _SurfaceState] = {}
+        self._lock = threading.Lock()
+
+    def options(self, chains: List[ExpiryChain], spot: float, now: Optional[datetime] = None) -> SurfaceOptions:
+        return SurfaceOptions(chains, spot, self.rate, now)
+
+    def build(
+        self,
+        underlying: str,
+        options: SurfaceOptions,
+        spot: float,
+        quotes: Dict[str, Dict[str, Any]],
+        include_points: bool = False,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        premiums = np.array([option_premium(quotes.get(key))[0] for key in options.quote_keys()], dtype=np.float64)
+        with self._lock:
+            state = self._states.get(underlying)
+        now = time.time()
+        iv = np.full(len(premiums), np.nan)
+        changed = np.ones(len(premiums), bool)
+        solved_spot, solved_at = spot, now
+        if (
+            state is not None
+            and len(state.tokens)
+            and abs(spot / state.spot - 1) <= self.spot_tolerance
+            and now - state.solved_at < self.full_refresh_seconds
+        ):
+            order = np.argsort(state.tokens)
+            previous = order[np.minimum(np.searchsorted(state.tokens, options.tokens, sorter=order), len(order) - 1)]
+            known = state.tokens[previous] == options.tokens
+            iv[known] = state.iv[previous[known]]
+            before = state.premiums[previous]
+            changed = ~known | ~((before == premiums) | (np.isnan(before) & np.isnan(premiums)))
+            solved_spot, solved_at = state.spot, state.solved_at
+            if not changed.any() and state.result is not None and not include_points:
+                return dict(state.result, recomputed=0, reused=len(premiums), build_ms=_elapsed_ms(started))
+
+        years = options.years[options.expiry]
+        with np.errstate(all="ignore"):
+            iv[changed] = black_scholes.implied_volatility(
+                premiums[changed],
+                spot,
+                options.strikes[changed],
+                years[changed],
+                self.rate,
+                options.is_call[changed],
+                initial=iv[changed],
+            )
+            result = self._surface(underlying, options, spot, iv, years, include_points)
+        with self._lock:
+            self._states[underlying] = _SurfaceState(
+                options.tokens, premiums, iv, solved_spot, solved_at, None if include_points else result
+            )
+        return dict(
+            result,
+            recomputed=int(changed.sum()),
+            reused=int((~changed).sum()),
+            build_ms=_elapsed_ms(started),
+        )
+
+    def _surface(
+        self,
+        underlying: str,
+        options: SurfaceOptions,
+        spot: float,
+        iv: np.ndarray,
+        years: np.ndarray,
+        include_points: bool,
+    ) -> Dict[str, Any]:
+        count = len(options.chains)
+        k = np.log(options.strikes / options.forwards[options.expiry])
+        solved = np.isfinite(iv)
+        total_variance = iv * iv * years
+        # Vega weights favour near-the-money strikes, whose quotes are tightest; the
+        # floor keeps the wings in the fit.
+        vega = np.where(solved, norm_vega(k, iv, years), 0)
+        vega_max = np.zeros(count)
+        np.maximum.at(vega_max, options.expiry, vega)
+        weight = np.maximum(vega / np.where(vega_max > 0, vega_max, 1)[options.expiry], 0.05)
+        coefficients = fit_smiles(options.expiry[solved], k[solved], total_variance[solved], weight[solved], count)
+
+        k_min = np.full(count, np.inf)
+        k_max = np.full(count, -np.inf)
+        np.minimum.at(k_min, options.expiry[solved], k[solved])
+        np.maximum.at(k_max, options.expiry[solved], k[solved])
+        grid_variance = coefficients[:, [0]] + coefficients[:, [1]] * MONEYNESS_GRID + coefficients[:, [2]] * MONEYNESS_GRID ** 2
+        grid_iv = np.sqrt(np.maximum(grid_variance, 0) / options.years[:, None])
+        # Report the fit only inside the strikes it was fitted on.
+        grid_iv[(MONEYNESS_GRID < k_min[:, None]) | (MONEYNESS_GRID > k_max[:, None])] = np.nan
+        atm_variance = coefficients[:, 0]
+        atm_iv = np.sqrt(np.maximum(atm_variance, 0) / options.years)
+        skew = coefficients[:, 1] / (2 * options.years * atm_iv)
+        points = np.bincount(options.expiry[solved], minlength=count)
+
+        result: Dict[str, Any] = {
+            "underlying": underlying,
+            "spot": spot,
+            "rate": self.rate,
+            "moneyness": MONEYNESS_GRID.tolist(),
+            "term_structure": [
+                {
+                    "expiry": chain.expiry.isoformat(),
+                    "days": round(float(options.years[i]) * 365, 2),
+                    "forward": round(float(options.forwards[i]), 2),
+                    "atm_iv": _percent(atm_iv[i]),
+                    "skew": _percent(skew[i]),
+                    "points": int(points[i]),
+                }
+                for i, chain in enumerate(options.chains)
+            ],
+            "surface": [
+                {"expiry": chain.expiry.isoformat(), "iv": [_percent(value) for value in grid_iv[i]]}
+                for i, chain in enumerate(options.chains)
+            ],
+        }
+        if include_points:
+            result["points"] = [
+                {
+                    "expiry": options.chains[int(options.expiry[i])].expiry.isoformat(),
+                    "strike": float(options.strikes[i]),
+                    "moneyness": round(float(k[i]), 4),
+                    "side": "CE" if options.is_call[i] else "PE",
+                    "iv": _percent(iv[i]),
+                }
+                for i in range(len(iv))
+            ]
+        return result
+
+
+def norm_vega(k: np.ndarray, iv: np.ndarray, years: np.ndarray) -> np.ndarray:
+    """Black vega per unit forward at log-moneyness ``k``."""
+    root_t = np.sqrt(years)
+    d1 = -k / (iv * root_t) + 0.5 * iv * root_t
+    return black_scholes.norm_pdf(d1) * root_t
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _percent(value: float) -> Optional[float]:
+    return None if not np.isfinite(value) else round(float(value) * 100, 2)
@@ -0,0 +1,26 @@
+import time
+
+from kiteconnect import KiteConnect
+
+from app.utils.metrics import Histogram
+
+KITE_REQUEST_SECONDS = Histogram(
+    "kite_request_duration_seconds",
+    "Latency of Kite Connect API calls by route.",
+    ("route", "outcome"),
+)
+
+
+class KiteClient(KiteConnect):
+    """KiteConnect that records the latency of every API call it makes."""
+
+    def _request(self, route, method, *args, **kwargs):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return super()._request(route, method, *args, **kwargs)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            KITE_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, outcome=outcome)
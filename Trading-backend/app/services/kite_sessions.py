@@ -0,0 +1,259 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from kiteconnect import KiteConnect
+from kiteconnect.exceptions import KiteException
+
+from app.core.config import settings
+from app.services.kite_client import KiteClient
+from app.services.order_book import TERMINAL_STATUSES, OrderBook
+from app.services.pnl_engine import PnLEngine
+from app.utils.rate_limiter import TokenBucket
+from app.utils.swr_cache import SWRCache, swr_cached
+
+# (access_token, shared) where shared marks the deployment-wide fallback token.
+TokenLoader = Callable[[str], Tuple[Optional[str], bool]]
+# Builds the broker client for a user id; defaults to a live ``KiteClient``.
+ClientFactory = Callable[[str], KiteConnect]
+
+
+class UserSession:
+    """
+    One app user's broker session: a lazily built Kite client plus the caches that
+    hold that user's private account data (positions, holdings, funds, orders, P&L).
+    """
+
+    _TOKEN_RETRY_SECONDS = 30
+
+    def __init__(
+        self,
+        user_id: str,
+        api_key: str,
+        token_loader: TokenLoader,
+        client_factory: Optional[ClientFactory] = None,
+    ) -> None:
+        self.user_id = user_id
+        self.api_key = api_key
+        self._client_factory = client_factory
+        self.broker_user_id: Optional[str] = None
+        self.last_used = time.time()
+        self._token_loader = token_loader
+        self._token_checked_at = 0.0
+        self.access_token: Optional[str] = None
+        self.shared = False
+        self._kite: Optional[KiteConnect] = None
+
+        self._positions_cache = SWRCache(soft_ttl=5, hard_ttl=30, negative_ttl=5, name="positions")
+        self._holdings_cache = SWRCache(soft_ttl=10, hard_ttl=60, negative_ttl=10, name="holdings")
+        # Funds are never served stale: placements and fills invalidate the entry.
+        self._margins_cache = SWRCache(soft_ttl=5, hard_ttl=5, name="margins")
+        # Zerodha allows 10 order placements per second per session.
+        self.order_rate = TokenBucket(rate=10, capacity=10, name="orders")
+        self.order_book = OrderBook()
+        self.order_book.add_listener(self._on_order_change)
+        self.pnl_engine = PnLEngine()
+        self._orders_synced_at = 0.0
+        self._orders_sync_lock = threading.Lock()
+
+    @property
+    def kite(self) -> Optional[KiteConnect]:
+        if self._kite is None and self.api_key:
+            if self._client_factory is not None:
+                self._kite = self._client_factory(self.user_id)
+            else:
+                self._kite = KiteClient(api_key=self.api_key, root=settings.ZERODHA_API_ROOT or None)
+        return self._kite
+
+    def set_access_token(self, token: Optional[str], shared: bool = False) -> None:
+        self.access_token = token
+        self.shared = shared
+        self._token_checked_at = time.time()
+        if token and self.kite:
+            self.kite.set_access_token(token)
+        for cache in (self._positions_cache, self._holdings_cache, self._margins_cache):
+            cache.invalidate()
+
+    def _ensure_token(self) -> Optional[str]:
+        if not self.access_token and time.time() - self._token_checked_at > self._TOKEN_RETRY_SECONDS:
+            token, shared = self._token_loader(self.user_id)
+            self._token_checked_at = time.time()
+            if token:
+                self.set_access_token(token, shared)
+        return self.access_token
+
+    def require_kite(self) -> KiteConnect:
+        if not self.kite:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Zerodha API key is not configured.",
+            )
+        if not self._ensure_token():
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Zerodha access token missing. Please connect Zerodha and try again.",
+            )
+        return self.kite
+
+    def use_streaming_ttls(self) -> None:
+        # Live ticks revalue P&L and fills invalidate these caches, so the
+        # snapshots themselves only need an occasional refresh.
+        self._positions_cache.soft_ttl = self._positions_cache.hard_ttl = 60
+        self._holdings_cache.soft_ttl = self._holdings_cache.hard_ttl = 300
+
+    @swr_cached("_positions_cache")
+    def get_positions(self) -> List[Dict[str, Any]]:
+        if not self._ensure_token():
+            return []
+        kite = self.require_kite()
+        try:
+            return kite.positions().get("net", [])
+        except KiteException as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Unable to fetch positions from Zerodha.",
+            ) from exc
+
+    @swr_cached("_holdings_cache")
+    def get_holdings(self) -> List[Dict[str, Any]]:
+        if not self._ensure_token():
+            return []
+        kite = self.require_kite()
+        try:
+            return kite.holdings()
+        except KiteException as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Unable to fetch holdings from Zerodha.",
+            ) from exc
+
+    @swr_cached("_margins_cache")
+    def get_margins(self) -> Dict[str, Any]:
+        kite = self.require_kite()
+        try:
+            return kite.margins()
+        except KiteException as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Unable to fetch margins from Zerodha.",
+            ) from exc
+
+    def invalidate_funds(self) -> None:
+        self._margins_cache.invalidate()
+
+    def sync_order_book(self, stream_connected: bool) -> None:
+        # With the stream connected kite.orders() is only a periodic reconciliation.
+        max_age = 60 if stream_connected else 3
+        if time.time() - self._orders_synced_at < max_age:
+            return
+        if not self._orders_sync_lock.acquire(blocking=self._orders_synced_at == 0):
+            return
+        try:
+            kite = self.require_kite()
+            try:
+                orders = kite.orders()
+            except KiteException as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail="Unable to fetch orders from Zerodha.",
+                ) from exc
+            for order in orders:
+                self.order_book.apply(order)
+            self._orders_synced_at = time.time()
+        finally:
+            self._orders_sync_lock.release()
+
+    def fetch_order_status(self, order_id: str) -> Dict[str, Any]:
+        kite = self.require_kite()
+        try:
+            history = kite.order_history(order_id)
+        except KiteException as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Unable to fetch order status from Zerodha.",
+            ) from exc
+        if not history:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Order not found.",
+            )
+        self.order_book.apply(history[-1])
+        return self.order_book.get(order_id) or history[-1]
+
+    def _on_order_change(self, order: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> None:
+        filled = order.get("filled_quantity") or 0
+        previously_filled = (previous or {}).get("filled_quantity") or 0
+        if filled != previously_filled or order.get("status") in TERMINAL_STATUSES:
+            # Fills and cancellations move funds and positions.
+            self._margins_cache.invalidate()
+            self._positions_cache.invalidate()
+
+
+class KiteSessionPool:
+    """
+    LRU pool of ``UserSession``s keyed by app user id.
+
+    Sessions are created on first use and evicted when the pool is full or when
+    they have been idle longer than ``idle_ttl_seconds``.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        token_loader: TokenLoader,
+        max_sessions: int = 256,
+        idle_ttl_seconds: int = 3600,
+        client_factory: Optional[ClientFactory] = None,
+    ) -> None:
+        self.api_key = api_key
+        self.token_loader = token_loader
+        self.client_factory = client_factory
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._sessions: "OrderedDict[str, UserSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._on_create: List[Callable[[UserSession], None]] = []
+
+    def add_create_hook(self, hook: Callable[[UserSession], None]) -> None:
+        self._on_create.append(hook)
+
+    def get(self, user_id: str) -> UserSession:
+        user_id = str(user_id)
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is not None:
+                self._sessions.move_to_end(user_id)
+                session.last_used = now
+                return session
+            session = UserSession(user_id, self.api_key, self.token_loader, self.client_factory)
+            self._sessions[user_id] = session
+            self._evict(now)
+        for hook in self._on_create:
+            hook(session)
+        return session
+
+    def _evict(self, now: float) -> None:
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        for user_id, session in list(self._sessions.items()):
+            if now - session.last_used <= self.idle_ttl_seconds:
+                break
+            del self._sessions[user_id]
+
+    def active(self) -> List[UserSession]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def for_broker_user(self, broker_user_id: Optional[str]) -> List[UserSession]:
+        if not broker_user_id:
+            return []
+        return [session for session in self.active() if session.broker_user_id == broker_user_id]
+
+    def shared_sessions(self) -> List[UserSession]:
+        return [session for session in self.active() if session.shared]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,182 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services.market_snapshot import SnapshotFrame
+
+MAX_MOVERS = 50
+REFERENCE_RETRY_SECONDS = 900
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# symbol -> {"high_52w", "low_52w", "avg_volume", "ts"} or None when unavailable.
+ReferenceLoader = Callable[[str], Optional[Dict[str, Any]]]
+IndexMembers = Callable[[], Dict[str, List[str]]]
+
+
+def _trading_day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, IST).date().isoformat()
+
+
+def _top(values: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """Row indices of the ``k`` largest (or smallest) finite values, best first."""
+    rows = np.flatnonzero(np.isfinite(values))
+    if rows.size == 0 or k <= 0:
+        return rows[:0]
+    keyed = -values[rows] if largest else values[rows]
+    k = min(k, rows.size)
+    # argpartition is O(n); only the k winners get fully sorted.
+    picked = np.argpartition(keyed, k - 1)[:k]
+    return rows[picked[np.argsort(keyed[picked], kind="stable")]]
+
+
+def _number(value: float, digits: Optional[int] = None) -> Optional[float]:
+    # JSON responses reject NaN; symbols missing a quote or close report null instead.
+    if not np.isfinite(value):
+        return None
+    return float(value) if digits is None else round(float(value), digits)
+
+
+class MarketMovers:
+    """
+    Cross-sectional market context recomputed once per snapshot frame.
+
+    Gainers/losers and breadth come straight from the frame's columns. Volume
+    spikes and 52-week-high proximity also need daily reference stats (average
+    volume, 52-week range), which are fetched in the background once per IST
+    trading day.
+    """
+
+    def __init__(
+        self,
+        reference: Dict[str, Dict[str, Any]],
+        reference_loader: ReferenceLoader,
+        index_members: IndexMembers,
+        session_progress: Callable[[], float],
+        submit: Callable[..., Any],
+    ) -> None:
+        self.reference = reference
+        self.reference_loader = reference_loader
+        self.index_members = index_members
+        self.session_progress = session_progress
+        self.submit = submit
+        self._result: Optional[Dict[str, Any]] = None
+        self._reference_lock = threading.Lock()
+        self._reference_failed_at: Dict[str, float] = {}
+
+    def on_frame(self, frame: SnapshotFrame) -> None:
+        self._result = self.compute(frame)
+        stale = [symbol for symbol in frame.symbols.tolist() if self._reference_stale(symbol)]
+        if stale and not self._reference_lock.locked():
+            self.submit(self._refresh_reference, stale)
+
+    def _reference_stale(self, symbol: str) -> bool:
+        now = time.time()
+        if now - self._reference_failed_at.get(symbol, 0) < REFERENCE_RETRY_SECONDS:
+            return False
+        entry = self.reference.get(symbol)
+        return entry is None or entry.get("day") != _trading_day(now)
+
+    def _refresh_reference(self, symbols: List[str]) -> None:
+        if not self._reference_lock.acquire(blocking=False):
+            return
+        try:
+            for symbol in symbols:
+                try:
+                    stats = self.reference_loader(symbol)
+                except Exception as exc:
+                    print(f"Reference stats fetch failed ({symbol}): {exc}")
+                    stats = None
+                if stats:
+                    now = time.time()
+                    self.reference[symbol] = {**stats, "ts": now, "day": _trading_day(now)}
+                    self._reference_failed_at.pop(symbol, None)
+                else:
+                    self._reference_failed_at[symbol] = time.time()
+        finally:
+            self._reference_lock.release()
+
+    def _reference_column(self, frame: SnapshotFrame, field: str) -> np.ndarray:
+        values = [(self.reference.get(symbol) or {}).get(field) for symbol in frame.symbols.tolist()]
+        return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+    def _items(self, frame: SnapshotFrame, rows: np.ndarray, **extra: np.ndarray) -> List[Dict[str, Any]]:
+        price = frame.columns["price"]
+        change = frame.columns["change"]
+        change_pct = frame.columns["change_pct"]
+        volume = frame.columns["volume"]
+        items = []
+        for row in rows.tolist():
+            item = {
+                "tradingsymbol": frame.symbols[row],
+                "name": frame.names[row],
+                "price": _number(price[row]),
+                "change": _number(change[row]),
+                "change_pct": _number(change_pct[row], 2),
+                "volume": int(volume[row]) if np.isfinite(volume[row]) else None,
+            }
+            for key, column in extra.items():
+                item[key] = _number(column[row], 2)
+            items.append(item)
+        return items
+
+    def compute(self, frame: SnapshotFrame) -> Dict[str, Any]:
+        change_pct = frame.columns["change_pct"]
+        price = frame.columns["price"]
+
+        # Volume pace: today's volume against the share of an average day elapsed so far.
+        avg_volume = self._reference_column(frame, "avg_volume")
+        expected = avg_volume * max(self.session_progress(), 0.05)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            volume_ratio = np.where(expected > 0, frame.columns["volume"] / expected, np.nan)
+
+        # Today's high counts towards the 52-week range once the reference is known.
+        high_52w = np.fmax(self._reference_column(frame, "high_52w"), frame.columns["high"])
+        high_52w[~np.isfinite(avg_volume)] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            from_high_pct = np.where(high_52w > 0, (high_52w - price) / high_52w * 100, np.nan)
+        from_high_pct = np.clip(from_high_pct, 0, None)
+
+        breadth: Dict[str, Dict[str, Any]] = {}
+        members = {"UNIVERSE": frame.symbols.tolist(), **self.index_members()}
+        for index, symbols in members.items():
+            change = frame.columns["change"][frame.mask(symbols)]
+            change = change[np.isfinite(change)]
+            advances = int((change > 0).sum())
+            declines = int((change < 0).sum())
+            breadth[index] = {
+                "advances": advances,
+                "declines": declines,
+                "unchanged": int(change.size) - advances - declines,
+                "ratio": round(advances / declines, 2) if declines else None,
+            }
+
+        return {
+            "fetched_at": frame.fetched_at,
+            "gainers": self._items(frame, _top(np.where(change_pct > 0, change_pct, np.nan), MAX_MOVERS)),
+            "losers": self._items(frame, _top(np.where(change_pct < 0, change_pct, np.nan), MAX_MOVERS, largest=False)),
+            "volume_spikes": self._items(
+                frame,
+                _top(volume_ratio, MAX_MOVERS),
+                volume_ratio=volume_ratio,
+            ),
+            "near_52w_high": self._items(
+                frame,
+                _top(from_high_pct, MAX_MOVERS, largest=False),
+                high_52w=high_52w,
+                from_high_pct=from_high_pct,
+            ),
+            "breadth": breadth,
+            "reference_coverage": int(np.isfinite(avg_volume).sum()),
+        }
+
+    def get(self, limit: int) -> Optional[Dict[str, Any]]:
+        result = self._result
+        if result is None:
+            return None
+        trimmed = dict(result)
+        for key in ("gainers", "losers", "volume_spikes", "near_52w_high"):
+            trimmed[key] = result[key][:limit]
+        return trimmed
@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+QUOTE_BATCH_SIZE = 500
+
+# Sortable columns and how each is read from a Kite quote.
+COLUMNS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "price": lambda quote: quote.get("last_price"),
+    "close": lambda quote: (quote.get("ohlc") or {}).get("close"),
+    "open": lambda quote: (quote.get("ohlc") or {}).get("open"),
+    "high": lambda quote: (quote.get("ohlc") or {}).get("high"),
+    "low": lambda quote: (quote.get("ohlc") or {}).get("low"),
+    "volume": lambda quote: quote.get("volume"),
+}
+
+UniverseLoader = Callable[[], Dict[str, str]]
+QuoteLoader = Callable[[List[str]], Dict[str, Any]]
+FrameListener = Callable[["SnapshotFrame"], None]
+
+
+class SnapshotFrame:
+    """
+    Immutable cross-section of the universe at one point in time.
+
+    Prices live in column arrays and every sortable column keeps a precomputed
+    ascending and descending ``argsort``, so ordering any subset of the universe is
+    a mask over the precomputed order instead of a fresh sort.
+    """
+
+    def __init__(self, names: Dict[str, str], quotes: Dict[str, Dict[str, Any]], fetched_at: float) -> None:
+        self.fetched_at = fetched_at
+        self.symbols = np.array(list(names), dtype=object)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols.tolist())}
+        self.names = [names[symbol] or symbol for symbol in self.symbols.tolist()]
+        self.quotes = quotes
+        self.columns: Dict[str, np.ndarray] = {}
+        for column, read in COLUMNS.items():
+            values = [read(quotes.get(symbol) or {}) for symbol in self.symbols.tolist()]
+            self.columns[column] = np.array([np.nan if v is None else v for v in values], dtype=float)
+        close = self.columns["close"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.columns["change"] = self.columns["price"] - close
+            self.columns["change_pct"] = np.where(close > 0, self.columns["change"] / close * 100, np.nan)
+
+        self._orders: Dict[Tuple[str, bool], np.ndarray] = {}
+        for column, values in self.columns.items():
+            # Missing values sort last in both directions.
+            missing = np.isnan(values)
+            self._orders[(column, False)] = np.lexsort((values, missing))
+            self._orders[(column, True)] = np.lexsort((-values, missing))
+        lowered = np.array([name.lower() for name in self.names], dtype=object)
+        name_order = np.argsort(lowered, kind="stable")
+        self._orders[("name", False)] = name_order
+        self._orders[("name", True)] = name_order[::-1]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def sortable(self, column: str) -> bool:
+        return (column, False) in self._orders
+
+    def quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self.quotes.get(symbol)
+
+    def mask(self, symbols: List[str]) -> np.ndarray:
+        mask = np.zeros(len(self.symbols), dtype=bool)
+        rows = [self.index[symbol] for symbol in symbols if symbol in self.index]
+        mask[rows] = True
+        return mask
+
+    def sort(self, symbols: List[str], column: str, descending: bool = False) -> List[str]:
+        """
+        Return ``symbols`` in global ``column`` order. Symbols outside the
+        snapshot keep their relative order at the end.
+        """
+        order = self._orders[(column, descending)]
+        ordered = self.symbols[order[self.mask(symbols)[order]]].tolist()
+        return ordered + [symbol for symbol in symbols if symbol not in self.index]
+
+
+class MarketSnapshot:
+    """
+    Background quote snapshot of the whole tracked universe.
+
+    ``refresh`` quotes every symbol in batches of up to ``QUOTE_BATCH_SIZE`` and
+    swaps in a new ``SnapshotFrame``; readers always see a complete frame. A frame
+    counts as current for ``max_age_seconds`` or 1.5 refresh intervals, whichever
+    is longer, so the slower idle cadence does not leave readers without one.
+    """
+
+    def __init__(
+        self,
+        universe_loader: UniverseLoader,
+        quote_loader: QuoteLoader,
+        interval_seconds: float = 5,
+        idle_interval_seconds: float = 60,
+        max_age_seconds: float = 30,
+        market_open: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        self.universe_loader = universe_loader
+        self.quote_loader = quote_loader
+        self.interval_seconds = interval_seconds
+        self.idle_interval_seconds = idle_interval_seconds
+        self.max_age_seconds = max_age_seconds
+        self.market_open = market_open
+        self._frame: Optional[SnapshotFrame] = None
+        self._lock = threading.Lock()
+        self._listeners: List[FrameListener] = []
+        self.last_error: Optional[str] = None
+
+    def add_listener(self, listener: FrameListener) -> None:
+        self._listeners.append(listener)
+
+    def _idle(self) -> bool:
+        return self.market_open is not None and not self.market_open()
+
+    def interval(self) -> float:
+        return self.idle_interval_seconds if self._idle() else self.interval_seconds
+
+    def max_age(self) -> float:
+        return max(self.max_age_seconds, 1.5 * self.interval())
+
+    def latest(self) -> Optional[SnapshotFrame]:
+        """The last frame whatever its age, for uses where a slightly old order is fine."""
+        return self._frame
+
+    def current(self) -> Optional[SnapshotFrame]:
+        frame = self._frame
+        if frame is None or frame.age() > self.max_age():
+            return None
+        return frame
+
+    def refresh(self) -> Optional[SnapshotFrame]:
+        if not self._lock.acquire(blocking=False):
+            return self._frame
+        try:
+            names = self.universe_loader()
+            symbols = list(names)
+            quotes: Dict[str, Dict[str, Any]] = {}
+            for start in range(0, len(symbols), QUOTE_BATCH_SIZE):
+                batch = symbols[start:start + QUOTE_BATCH_SIZE]
+                response = self.quote_loader([f"NSE:{symbol}" for symbol in batch]) or {}
+                for symbol in batch:
+                    quote = response.get(f"NSE:{symbol}")
+                    if quote:
+                        quotes[symbol] = quote
+            if symbols and not quotes:
+                # No session yet (or an empty upstream reply): keep the previous frame.
+                return self._frame
+            frame = SnapshotFrame(names, quotes, time.time())
+            self._frame = frame
+            self.last_error = None
+        finally:
+            self._lock.release()
+
+        for listener in self._listeners:
+            try:
+                listener(frame)
+            except Exception as exc:
+                print(f"Snapshot listener failed: {exc}")
+        return frame
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as exc:
+                self.last_error = str(exc)
+                print(f"Market snapshot refresh failed: {exc}")
+            await asyncio.sleep(self.interval())
+
+    def status(self) -> Dict[str, Any]:
+        frame = self._frame
+        return {
+            "symbols": len(frame) if frame else 0,
+            "fetched_at": frame.fetched_at if frame else None,
+            "age_seconds": round(frame.age(), 1) if frame else None,
+            "stale": self.current() is None,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,97 @@
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+TickListener = Callable[[List[Dict[str, Any]]], None]
+OrderListener = Callable[[Dict[str, Any]], None]
+
+
+class MarketStream:
+    """
+    Single ingestion path for streaming data.
+
+    Ticks and order updates from the Kite websocket (or any other producer, such as
+    Zerodha postbacks) are pushed through ``ingest_ticks`` / ``ingest_order_update``
+    and fanned out to the registered listeners.
+    """
+
+    def __init__(self) -> None:
+        self._ticker: Optional[Any] = None
+        self._tick_listeners: List[TickListener] = []
+        self._order_listeners: List[OrderListener] = []
+        self._tokens: Set[int] = set()
+        self._lock = threading.Lock()
+        # Set to a TickJournal to record every batch received from the feed.
+        self.journal: Optional[Any] = None
+
+    @property
+    def connected(self) -> bool:
+        return bool(self._ticker and self._ticker.is_connected())
+
+    def add_tick_listener(self, listener: TickListener) -> None:
+        self._tick_listeners.append(listener)
+
+    def add_order_listener(self, listener: OrderListener) -> None:
+        self._order_listeners.append(listener)
+
+    def ingest_ticks(self, ticks: List[Dict[str, Any]]) -> None:
+        for listener in self._tick_listeners:
+            try:
+                listener(ticks)
+            except Exception as exc:
+                print(f"Tick listener failed: {exc}")
+
+    def _on_feed_ticks(self, ticks: List[Dict[str, Any]]) -> None:
+        # Only feed ticks are journaled, so replaying a journal never re-records it.
+        if self.journal is not None:
+            try:
+                self.journal.record(ticks)
+            except Exception as exc:
+                print(f"Tick journal record failed: {exc}")
+        self.ingest_ticks(ticks)
+
+    def ingest_order_update(self, update: Dict[str, Any]) -> None:
+        for listener in self._order_listeners:
+            try:
+                listener(update)
+            except Exception as exc:
+                print(f"Order listener failed: {exc}")
+
+    def subscribe(self, tokens: Iterable[int]) -> None:
+        with self._lock:
+            new_tokens = [int(token) for token in tokens if token and int(token) not in self._tokens]
+            self._tokens.update(new_tokens)
+        if new_tokens and self.connected:
+            self._ticker.subscribe(new_tokens)
+            self._ticker.set_mode(self._ticker.MODE_FULL, new_tokens)
+
+    def start(self, api_key: str, access_token: str, ticker_factory: Optional[Callable[[], Any]] = None) -> None:
+        if self._ticker is not None:
+            return
+        if ticker_factory is not None:
+            ticker = ticker_factory()
+        else:
+            from kiteconnect import KiteTicker
+
+            ticker = KiteTicker(api_key, access_token)
+
+        def on_connect(ws, _response):
+            with self._lock:
+                tokens = list(self._tokens)
+            if tokens:
+                ws.subscribe(tokens)
+                ws.set_mode(ws.MODE_FULL, tokens)
+
+        ticker.on_connect = on_connect
+        ticker.on_ticks = lambda _ws, ticks: self._on_feed_ticks(ticks)
+        ticker.on_order_update = lambda _ws, data: self.ingest_order_update(data)
+        ticker.on_error = lambda _ws, code, reason: print(f"Market stream error ({code}): {reason}")
+        self._ticker = ticker
+        ticker.connect(threaded=True)
+
+    def stop(self) -> None:
+        if self._ticker is None:
+            return
+        try:
+            self._ticker.close()
+        finally:
+            self._ticker = None
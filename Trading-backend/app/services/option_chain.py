@@ -0,0 +1,180 @@
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils import black_scholes
+
+IST = timezone(timedelta(hours=5, minutes=30))
+EXPIRY_CLOSE = dt_time(15, 30)
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+# Quote keys for index underlyings; stock options use NSE:<underlying>.
+INDEX_SPOT_KEYS = {
+    "NIFTY": "NSE:NIFTY 50",
+    "BANKNIFTY": "NSE:NIFTY BANK",
+    "FINNIFTY": "NSE:NIFTY FIN SERVICE",
+    "MIDCPNIFTY": "NSE:NIFTY MID SELECT",
+    "NIFTYNXT50": "NSE:NIFTY NEXT 50",
+}
+
+# (instrument_token, tradingsymbol, underlying, expiry, strike, instrument_type, lot_size)
+OptionRow = Tuple[int, str, str, date, float, str, int]
+
+
+def spot_key(underlying: str) -> str:
+    return INDEX_SPOT_KEYS.get(underlying, f"NSE:{underlying}")
+
+
+def years_to_expiry(expiry: date, now: Optional[datetime] = None) -> float:
+    now = now or datetime.now(IST)
+    close = datetime.combine(expiry, EXPIRY_CLOSE, IST)
+    # Floor at one minute so expiry-day Greeks stay finite.
+    return max((close - now).total_seconds(), 60) / SECONDS_PER_YEAR
+
+
+class ExpiryChain:
+    """Calls and puts of one expiry, aligned by ascending strike (-1 where a side is missing)."""
+
+    __slots__ = ("underlying", "expiry", "lot_size", "strikes", "ce_tokens", "pe_tokens", "ce_symbols", "pe_symbols")
+
+    def __init__(self, underlying: str, expiry: date, rows: List[OptionRow]) -> None:
+        self.underlying = underlying
+        self.expiry = expiry
+        self.lot_size = max(row[6] for row in rows)
+        strikes = np.array([row[4] for row in rows], dtype=np.float64)
+        self.strikes, position = np.unique(strikes, return_inverse=True)
+        size = len(self.strikes)
+        self.ce_tokens = np.full(size, -1, dtype=np.int64)
+        self.pe_tokens = np.full(size, -1, dtype=np.int64)
+        self.ce_symbols: List[Optional[str]] = [None] * size
+        self.pe_symbols: List[Optional[str]] = [None] * size
+        for row, index in zip(rows, position.tolist()):
+            if row[5] == "CE":
+                self.ce_tokens[index] = row[0]
+                self.ce_symbols[index] = row[1]
+            else:
+                self.pe_tokens[index] = row[0]
+                self.pe_symbols[index] = row[1]
+
+    def quote_keys(self) -> List[str]:
+        return [f"NFO:{symbol}" for symbol in self.ce_symbols + self.pe_symbols if symbol]
+
+
+class OptionIndex:
+    """
+    Derivatives lookup built once from the synced instrument table:
+    underlying -> expiry -> strike-aligned CE/PE tokens and symbols.
+    """
+
+    def __init__(self, rows: Iterable[OptionRow]) -> None:
+        grouped: Dict[Tuple[str, date], List[OptionRow]] = {}
+        for row in rows:
+            if row[5] in ("CE", "PE") and row[3] is not None:
+                grouped.setdefault((row[2], row[3]), []).append(row)
+        self.chains: Dict[str, Dict[date, ExpiryChain]] = {}
+        for (underlying, expiry), chain_rows in sorted(grouped.items()):
+            self.chains.setdefault(underlying, {})[expiry] = ExpiryChain(underlying, expiry, chain_rows)
+        self.built_at = datetime.now(IST)
+
+    def underlyings(self) -> List[str]:
+        return sorted(self.chains)
+
+    def expiries(self, underlying: str, today: Optional[date] = None) -> List[date]:
+        today = today or datetime.now(IST).date()
+        return [expiry for expiry in self.chains.get(underlying, {}) if expiry >= today]
+
+    def chain(self, underlying: str, expiry: Optional[date] = None) -> Optional[ExpiryChain]:
+        expiries = self.expiries(underlying)
+        if not expiries:
+            return None
+        return self.chains[underlying].get(expiry or expiries[0])
+
+
+def option_premium(quote: Optional[Dict[str, Any]]) -> Tuple[float, float, float]:
+    """(premium used for IV, best bid, best ask); mid when both sides are quoted."""
+    if not quote:
+        return np.nan, np.nan, np.nan
+    depth = quote.get("depth") or {}
+    bid = ((depth.get("buy") or [{}])[0]).get("price") or 0
+    ask = ((depth.get("sell") or [{}])[0]).get("price") or 0
+    last = quote.get("last_price") or 0
+    if bid > 0 and ask > 0:
+        premium = (bid + ask) / 2
+    else:
+        premium = last or np.nan
+    return premium, bid or np.nan, ask or np.nan
+
+
+def _number(value: float, digits: int) -> Optional[float]:
+    return None if not np.isfinite(value) else round(float(value), digits)
+
+
+def build_chain(
+    chain: ExpiryChain,
+    spot: float,
+    quotes: Dict[str, Dict[str, Any]],
+    rate: float,
+    strike_count: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Quote and Greeks rows for a chain. Implied volatility is solved from each
+    option's mid (or last) price and the Greeks for all strikes and both sides
+    are computed in a single vectorised pass.
+    """
+    strikes = chain.strikes
+    selected = np.arange(len(strikes))
+    if strike_count and strike_count < len(strikes):
+        atm = int(np.argmin(np.abs(strikes - spot)))
+        first = min(max(atm - strike_count // 2, 0), len(strikes) - strike_count)
+        selected = selected[first:first + strike_count]
+
+    symbols = [chain.ce_symbols[i] for i in selected] + [chain.pe_symbols[i] for i in selected]
+    option_quotes = [quotes.get(f"NFO:{symbol}") if symbol else None for symbol in symbols]
+    premium, bid, ask = (np.array(column, dtype=np.float64) for column in zip(*map(option_premium, option_quotes)))
+    strike = np.concatenate([strikes[selected], strikes[selected]])
+    is_call = np.arange(len(strike)) < len(selected)
+    t = years_to_expiry(chain.expiry, now)
+
+    with np.errstate(all="ignore"):
+        iv = black_scholes.implied_volatility(premium, spot, strike, t, rate, is_call)
+        values = black_scholes.greeks(spot, strike, t, rate, iv, is_call)
+
+    tokens = np.concatenate([chain.ce_tokens[selected], chain.pe_tokens[selected]])
+    sides: List[Optional[Dict[str, Any]]] = []
+    for i, symbol in enumerate(symbols):
+        if symbol is None:
+            sides.append(None)
+            continue
+        quote = option_quotes[i] or {}
+        sides.append(
+            {
+                "instrument_token": int(tokens[i]),
+                "tradingsymbol": symbol,
+                "last_price": quote.get("last_price"),
+                "bid": _number(bid[i], 2),
+                "ask": _number(ask[i], 2),
+                "volume": quote.get("volume"),
+                "oi": quote.get("oi"),
+                "iv": _number(iv[i] * 100, 2),
+                "delta": _number(values["delta"][i], 4),
+                "gamma": _number(values["gamma"][i], 6),
+                "theta": _number(values["theta"][i], 4),
+                "vega": _number(values["vega"][i], 4),
+                "rho": _number(values["rho"][i], 4),
+            }
+        )
+    count = len(selected)
+    return {
+        "underlying": chain.underlying,
+        "expiry": chain.expiry.isoformat(),
+        "spot": spot,
+        "lot_size": chain.lot_size,
+        "years_to_expiry": round(t, 6),
+        "rate": rate,
+        "strikes": [
+            {"strike": float(strikes[index]), "call": sides[i], "put": sides[count + i]}
+            for i, index in enumerate(selected.tolist())
+        ],
+    }
@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+TERMINAL_STATUSES = {"COMPLETE", "CANCELLED", "REJECTED"}
+
+OrderListener = Callable[[Dict[str, Any], Optional[Dict[str, Any]]], None]
+
+
+def _timestamp(order: Dict[str, Any]) -> str:
+    value = order.get("exchange_update_timestamp") or order.get("order_timestamp") or ""
+    return str(value)
+
+
+class OrderBook:
+    """
+    In-memory order state machine fed by streaming order updates and postbacks.
+
+    Each accepted change bumps the order's ``version``. Versions restart with every
+    book, so ``epoch`` identifies the book a version came from. Async callers can
+    wait for the next change of a single order or subscribe to every change.
+    """
+
+    def __init__(self) -> None:
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        # order_id -> version, kept in version order so change scans stop early.
+        self._changes: "OrderedDict[str, int]" = OrderedDict()
+        self._version = 0
+        self.epoch = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._listeners: List[OrderListener] = []
+
+    def add_listener(self, listener: OrderListener) -> None:
+        self._listeners.append(listener)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def cursor(self) -> str:
+        return f"{self.epoch}.{self._version}"
+
+    def list_orders(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(order) for order in self._orders.values()]
+
+    def changes_since(self, version: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            changed = []
+            for order_id, order_version in reversed(self._changes.items()):
+                if order_version <= version:
+                    break
+                changed.append(dict(self._orders[order_id]))
+        changed.reverse()
+        return changed
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        order = self._orders.get(str(order_id))
+        return dict(order) if order else None
+
+    def _accepts(self, current: Optional[Dict[str, Any]], update: Dict[str, Any]) -> bool:
+        if current is None:
+            return True
+        if current.get("status") in TERMINAL_STATUSES:
+            return False
+        if _timestamp(update) and _timestamp(current) and _timestamp(update) < _timestamp(current):
+            return False
+        if (update.get("filled_quantity") or 0) < (current.get("filled_quantity") or 0):
+            return False
+        return any(current.get(key) != value for key, value in update.items() if key not in {"version", "updated_at", "pushed_at"})
+
+    def seed(self, order: Dict[str, Any]) -> bool:
+        # Record a freshly placed order unless the stream already reported it.
+        if str(order.get("order_id")) in self._orders:
+            return False
+        return self.apply(order)
+
+    def apply(self, update: Dict[str, Any], pushed: bool = False) -> bool:
+        """
+        Merge an update into the book. ``pushed`` marks updates delivered by the
+        order stream or a postback, as opposed to ones read back from the API.
+        """
+        order_id = update.get("order_id")
+        if not order_id:
+            return False
+        order_id = str(order_id)
+        with self._lock:
+            previous = self._orders.get(order_id)
+            if not self._accepts(previous, update):
+                return False
+            self._version += 1
+            order = {**(previous or {}), **update, "order_id": order_id}
+            order["version"] = self._version
+            order["updated_at"] = time.time()
+            if pushed:
+                order["pushed_at"] = order["updated_at"]
+            self._orders[order_id] = order
+            self._changes[order_id] = self._version
+            self._changes.move_to_end(order_id)
+            waiters = self._waiters.pop(order_id, [])
+            subscribers = list(self._subscribers)
+
+        snapshot = dict(order)
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future, snapshot)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, snapshot)
+        for listener in self._listeners:
+            try:
+                listener(snapshot, previous)
+            except Exception as exc:
+                print(f"Order book listener failed: {exc}")
+        return True
+
+    async def wait_for_change(self, order_id: str, since_version: int, timeout: float) -> Optional[Dict[str, Any]]:
+        order_id = str(order_id)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            current = self._orders.get(order_id)
+            if current and current["version"] > since_version:
+                return dict(current)
+            self._waiters.setdefault(order_id, []).append((loop, future))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(order_id)
+                if waiters and (loop, future) in waiters:
+                    waiters.remove((loop, future))
+                    if not waiters:
+                        self._waiters.pop(order_id, None)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+        with self._lock:
+            self._subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = [(loop, q) for loop, q in self._subscribers if q is not queue]
+
+
+def _resolve(future: asyncio.Future, value: Dict[str, Any]) -> None:
+    if not future.done():
+        future.set_result(value)
+
+
+def _offer(queue: asyncio.Queue, value: Dict[str, Any]) -> None:
+    # Slow subscribers lose updates rather than stalling the producer.
+    if not queue.full():
+        queue.put_nowait(value)
@@ -0,0 +1,152 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+POSITION = 0
+HOLDING = 1
+
+
+class PnLEngine:
+    """
+    Mark-to-market P&L for positions and holdings kept in column arrays.
+
+    ``rebuild`` loads quantities and average prices from the latest Kite snapshot;
+    ``on_ticks`` revalues every affected row with one fancy-indexed assignment, so
+    P&L follows the live feed without refetching positions or holdings.
+
+    Per row:
+        total P&L = (ltp - avg) * qty * multiplier
+        day P&L   = day_base + qty * ltp * multiplier
+    where ``day_base`` folds in the day's realised cash flows and the overnight
+    quantity carried at the previous close.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sources: Dict[int, Any] = {}
+        self._entries: Dict[int, List[tuple]] = {POSITION: [], HOLDING: []}
+        self._items: List[Dict[str, Any]] = []
+        self._token_rows: Dict[int, np.ndarray] = {}
+        self.tokens = np.zeros(0, dtype=np.int64)
+        self.kind = np.zeros(0, dtype=np.int8)
+        self.qty = np.zeros(0)
+        self.avg = np.zeros(0)
+        self.ltp = np.zeros(0)
+        self.multiplier = np.ones(0)
+        self.day_base = np.zeros(0)
+        self.updated_at: Optional[float] = None
+
+    def is_current(self, kind: int, source: Any) -> bool:
+        return self._sources.get(kind) is source
+
+    def rebuild(self, kind: int, source: List[Dict[str, Any]]) -> None:
+        entries = []
+        for item in source:
+            qty = item.get("quantity")
+            if qty is None:
+                qty = item.get("net_quantity") or 0
+            avg = item.get("average_price") or 0
+            ltp = item.get("last_price") or (item.get("close_price") if kind == HOLDING else None) or avg
+            close = item.get("close_price") or 0
+            multiplier = item.get("multiplier") or 1
+            if kind == POSITION:
+                overnight = item.get("overnight_quantity") or 0
+                day_base = (item.get("day_sell_value") or 0) - (item.get("day_buy_value") or 0)
+                day_base -= overnight * close * multiplier
+            else:
+                day_base = -qty * close
+            token = int(item.get("instrument_token") or 0)
+            entries.append((item, kind, token, qty, avg, ltp, multiplier, day_base))
+
+        with self._lock:
+            # Prices already streamed in are newer than the snapshot's last_price.
+            live = dict(zip(self.tokens.tolist(), self.ltp.tolist())) if self.updated_at else {}
+            self._entries[kind] = entries
+            self._sources[kind] = source
+            merged = self._entries[POSITION] + self._entries[HOLDING]
+            self._items = [entry[0] for entry in merged]
+            self.kind = np.array([entry[1] for entry in merged], dtype=np.int8)
+            self.tokens = np.array([entry[2] for entry in merged], dtype=np.int64)
+            self.qty = np.array([entry[3] for entry in merged], dtype=float)
+            self.avg = np.array([entry[4] for entry in merged], dtype=float)
+            self.ltp = np.array([live.get(entry[2], entry[5]) for entry in merged], dtype=float)
+            self.multiplier = np.array([entry[6] for entry in merged], dtype=float)
+            self.day_base = np.array([entry[7] for entry in merged], dtype=float)
+            self._token_rows = {int(token): np.flatnonzero(self.tokens == token) for token in np.unique(self.tokens)}
+
+    def clone(self) -> "PnLEngine":
+        """Independent copy of the current rows, e.g. to revalue them against replayed ticks."""
+        engine = PnLEngine()
+        with self._lock:
+            engine._sources = dict(self._sources)
+            engine._entries = {kind: list(entries) for kind, entries in self._entries.items()}
+            engine._items = list(self._items)
+            engine._token_rows = dict(self._token_rows)
+            for name in ("tokens", "kind", "qty", "avg", "ltp", "multiplier", "day_base"):
+                setattr(engine, name, getattr(self, name).copy())
+            engine.updated_at = self.updated_at
+        return engine
+
+    def instrument_tokens(self) -> List[int]:
+        return [token for token in self._token_rows if token]
+
+    def on_ticks(self, ticks: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            index_parts = []
+            price_parts = []
+            for tick in ticks:
+                rows = self._token_rows.get(tick.get("instrument_token"))
+                price = tick.get("last_price")
+                if rows is None or price is None:
+                    continue
+                index_parts.append(rows)
+                price_parts.append(np.full(rows.shape[0], price, dtype=float))
+            if not index_parts:
+                return
+            self.ltp[np.concatenate(index_parts)] = np.concatenate(price_parts)
+            self.updated_at = time.time()
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        total = (self.ltp - self.avg) * self.qty * self.multiplier
+        day = self.day_base + self.qty * self.ltp * self.multiplier
+        return {"total": total, "day": day}
+
+    def rows(self, kind: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            columns = self._columns()
+            mask = np.flatnonzero(self.kind == kind)
+            return [
+                {
+                    "item": self._items[i],
+                    "qty": float(self.qty[i]),
+                    "avg": float(self.avg[i]),
+                    "ltp": float(self.ltp[i]),
+                    "pnl": float(columns["total"][i]),
+                    "day_pnl": float(columns["day"][i]),
+                }
+                for i in mask
+            ]
+
+    def aggregates(self) -> Dict[str, Any]:
+        with self._lock:
+            columns = self._columns()
+            is_position = self.kind == POSITION
+            is_holding = self.kind == HOLDING
+            summary = {
+                "positions": {
+                    "day": float(columns["day"][is_position].sum()),
+                    "total": float(columns["total"][is_position].sum()),
+                },
+                "holdings": {
+                    "day": float(columns["day"][is_holding].sum()),
+                    "total": float(columns["total"][is_holding].sum()),
+                },
+            }
+        summary["total"] = {
+            "day": summary["positions"]["day"] + summary["holdings"]["day"],
+            "total": summary["positions"]["total"] + summary["holdings"]["total"],
+        }
+        summary["updated_at"] = self.updated_at
+        return summary
@@ -0,0 +1,722 @@
+import itertools
+import threading
+import time
+import zlib
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+from kiteconnect.exceptions import InputException, OrderException
+
+IST = timezone(timedelta(hours=5, minutes=30))
+SESSION_OPEN = dtime(9, 15)
+SESSION_CLOSE = dtime(15, 30)
+SESSION_SECONDS = 375 * 60
+# Volatility is annualised over trading time only.
+TRADING_SECONDS_PER_YEAR = 252 * SESSION_SECONDS
+TICK_SIZE = 0.05
+DEPTH_LEVELS = 5
+INSTRUMENT_TOKEN_BASE = 900_001
+
+INTERVAL_SECONDS = {
+    "minute": 60,
+    "3minute": 180,
+    "5minute": 300,
+    "10minute": 600,
+    "15minute": 900,
+    "30minute": 1800,
+    "60minute": 3600,
+    "day": SESSION_SECONDS,
+}
+
+OrderListener = Callable[[Dict[str, Any]], None]
+DateLike = Union[str, datetime, date]
+
+
+def _round_tick(values: np.ndarray) -> np.ndarray:
+    return np.round(values / TICK_SIZE) * TICK_SIZE
+
+
+def _to_ist(value: DateLike) -> datetime:
+    # Kite reads naive timestamps as exchange (IST) time; so does the simulator.
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif not isinstance(value, datetime):
+        value = datetime.combine(value, dtime())
+    if value.tzinfo is None:
+        return value.replace(tzinfo=IST)
+    return value.astimezone(IST)
+
+
+def _seed(*parts: Any) -> int:
+    return zlib.crc32(":".join(str(part) for part in parts).encode("utf-8"))
+
+
+class SimulatedMarket:
+    """
+    Synthetic NSE equity market for running the app without a broker account.
+
+    Prices for the whole instrument set live in column arrays and move as one
+    correlated geometric random walk: every ``advance`` draws a single market
+    factor plus one idiosyncratic shock per instrument, so a step costs a handful
+    of vector operations however many instruments there are. Trades arrive as a
+    Poisson process at ``ticks_per_second`` across the universe; instruments that
+    traded during a step are the ones reported as ticks, with their traded volume.
+
+    Historical candles are generated on demand from the same volatility and
+    correlation parameters, seeded per instrument and interval, and anchored so
+    the latest bar closes at the live price.
+    """
+
+    def __init__(
+        self,
+        universe: Dict[str, str],
+        ticks_per_second: float = 20000,
+        volatility: float = 0.25,
+        correlation: float = 0.3,
+        seed: Optional[int] = None,
+        starting_cash: float = 1_000_000,
+    ) -> None:
+        self.ticks_per_second = ticks_per_second
+        self.correlation = correlation
+        self.seed = seed if seed is not None else int(time.time())
+        self.starting_cash = starting_cash
+        self.symbols = list(universe)
+        self.names = [universe[symbol] or symbol for symbol in self.symbols]
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        size = len(self.symbols)
+        self.tokens = np.arange(size, dtype=np.int64) + INSTRUMENT_TOKEN_BASE
+        self.token_index = {int(token): i for i, token in enumerate(self.tokens.tolist())}
+
+        rng = np.random.default_rng(self.seed)
+        self._rng = rng
+        self.sigma = volatility * rng.uniform(0.6, 1.6, size)
+        self.base_volume = np.exp(rng.uniform(np.log(5e4), np.log(2e7), size))
+        self.close = _round_tick(np.exp(rng.uniform(np.log(50), np.log(5000), size)))
+        self._latent = self.close.copy()
+        self.open = self.close.copy()
+        self.high = self.close.copy()
+        self.low = self.close.copy()
+        self.volume = np.zeros(size, dtype=np.int64)
+        self.turnover = np.zeros(size)
+        self.last_quantity = np.zeros(size, dtype=np.int64)
+        self.last_trade_at = np.full(size, time.time())
+        self.tick_count = 0
+
+        self._lock = threading.Lock()
+        self._clock = time.monotonic()
+        self._session_day: Optional[date] = None
+        self._order_listeners: List[OrderListener] = []
+        self.accounts: Dict[str, "SimulatedAccount"] = {}
+        self._roll_session()
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def add_order_listener(self, listener: OrderListener) -> None:
+        self._order_listeners.append(listener)
+
+    def remove_order_listener(self, listener: OrderListener) -> None:
+        if listener in self._order_listeners:
+            self._order_listeners.remove(listener)
+
+    def publish_order(self, order: Dict[str, Any]) -> None:
+        for listener in list(self._order_listeners):
+            try:
+                listener(dict(order))
+            except Exception as exc:
+                print(f"Simulated order listener failed: {exc}")
+
+    def _roll_session(self) -> None:
+        today = datetime.now(IST).date()
+        if self._session_day == today:
+            return
+        if self._session_day is not None:
+            self.close = _round_tick(self._latent)
+        gap = self._rng.normal(0, 0.004, len(self))
+        self._latent = self.close * np.exp(gap)
+        self.open = _round_tick(self._latent)
+        self.high = self.open.copy()
+        self.low = self.open.copy()
+        self.volume[:] = 0
+        self.turnover[:] = 0
+        self._session_day = today
+
+    @property
+    def price(self) -> np.ndarray:
+        return _round_tick(self._latent)
+
+    def advance(self) -> np.ndarray:
+        """Move every price to the current time; returns the rows that traded."""
+        with self._lock:
+            now = time.monotonic()
+            dt = now - self._clock
+            if dt <= 0:
+                return np.zeros(0, dtype=np.int64)
+            self._clock = now
+            self._roll_session()
+            rng = self._rng
+            tau = dt / TRADING_SECONDS_PER_YEAR
+            shocks = np.sqrt(self.correlation) * rng.standard_normal() + np.sqrt(1 - self.correlation) * rng.standard_normal(len(self))
+            self._latent *= np.exp(self.sigma * np.sqrt(tau) * shocks - 0.5 * self.sigma**2 * tau)
+            price = _round_tick(self._latent)
+
+            trades = rng.poisson(self.ticks_per_second * dt / max(len(self), 1), len(self))
+            rows = np.flatnonzero(trades)
+            if rows.size:
+                # Volume per trade scales with the instrument's average daily volume.
+                per_trade = np.maximum(1, self.base_volume[rows] / (SESSION_SECONDS * self.ticks_per_second / len(self)))
+                quantity = np.maximum(1, rng.poisson(per_trade * trades[rows])).astype(np.int64)
+                self.volume[rows] += quantity
+                self.turnover[rows] += quantity * price[rows]
+                self.last_quantity[rows] = np.maximum(1, quantity // trades[rows])
+                self.last_trade_at[rows] = time.time()
+                self.tick_count += int(trades.sum())
+            np.maximum(self.high, price, out=self.high)
+            np.minimum(self.low, price, out=self.low)
+            return rows
+
+    def _rows(self, instruments: Iterable[Any]) -> Dict[str, int]:
+        rows = {}
+        for key in instruments:
+            if isinstance(key, (int, np.integer)):
+                row = self.token_index.get(int(key))
+            else:
+                row = self.index.get(str(key).split(":", 1)[-1])
+                if row is None and str(key).isdigit():
+                    row = self.token_index.get(int(key))
+            if row is not None:
+                rows[str(key)] = row
+        return rows
+
+    def _depth(self, rows: np.ndarray, price: np.ndarray) -> List[Dict[str, List[Dict[str, Any]]]]:
+        steps = np.arange(1, DEPTH_LEVELS + 1) * TICK_SIZE
+        bids = np.round(price[:, None] - steps, 2).tolist()
+        asks = np.round(price[:, None] + steps, 2).tolist()
+        quantities = self._rng.integers(1, 2000, (rows.size, 2, DEPTH_LEVELS)).tolist()
+        orders = self._rng.integers(1, 20, (rows.size, 2, DEPTH_LEVELS)).tolist()
+        return [
+            {
+                "buy": [{"price": p, "quantity": q, "orders": o} for p, q, o in zip(bids[i], quantities[i][0], orders[i][0])],
+                "sell": [{"price": p, "quantity": q, "orders": o} for p, q, o in zip(asks[i], quantities[i][1], orders[i][1])],
+            }
+            for i in range(rows.size)
+        ]
+
+    def _snapshot(self, rows: np.ndarray) -> Dict[str, List[Any]]:
+        price = _round_tick(self._latent[rows])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average = np.where(self.volume[rows] > 0, self.turnover[rows] / self.volume[rows], price)
+        return {
+            "token": self.tokens[rows].tolist(),
+            "price": price.round(2).tolist(),
+            "open": self.open[rows].round(2).tolist(),
+            "high": self.high[rows].round(2).tolist(),
+            "low": self.low[rows].round(2).tolist(),
+            "close": self.close[rows].round(2).tolist(),
+            "volume": self.volume[rows].tolist(),
+            "average": average.round(2).tolist(),
+            "last_quantity": self.last_quantity[rows].tolist(),
+            "last_trade_at": self.last_trade_at[rows].tolist(),
+            "buy_quantity": (self.base_volume[rows] * 0.01).astype(np.int64).tolist(),
+            "sell_quantity": (self.base_volume[rows] * 0.011).astype(np.int64).tolist(),
+            "depth": self._depth(rows, price),
+        }
+
+    def quote(self, instruments: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        self.advance()
+        keyed = self._rows(instruments)
+        rows = np.array(list(keyed.values()), dtype=np.int64)
+        data = self._snapshot(rows)
+        now = datetime.now(IST)
+        result = {}
+        for i, key in enumerate(keyed):
+            price, close = data["price"][i], data["close"][i]
+            result[key] = {
+                "instrument_token": data["token"][i],
+                "timestamp": now,
+                "last_trade_time": datetime.fromtimestamp(data["last_trade_at"][i], IST),
+                "last_price": price,
+                "last_quantity": data["last_quantity"][i],
+                "buy_quantity": data["buy_quantity"][i],
+                "sell_quantity": data["sell_quantity"][i],
+                "volume": data["volume"][i],
+                "average_price": data["average"][i],
+                "oi": 0,
+                "oi_day_high": 0,
+                "oi_day_low": 0,
+                "net_change": round(price - close, 2),
+                "lower_circuit_limit": round(close * 0.8, 2),
+                "upper_circuit_limit": round(close * 1.2, 2),
+                "ohlc": {"open": data["open"][i], "high": data["high"][i], "low": data["low"][i], "close": close},
+                "depth": data["depth"][i],
+            }
+        return result
+
+    def ticks(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """Kite ticker full-mode packets for ``rows``."""
+        data = self._snapshot(rows)
+        now = datetime.now(IST)
+        ticks = []
+        for i in range(rows.size):
+            price, close = data["price"][i], data["close"][i]
+            ticks.append(
+                {
+                    "tradable": True,
+                    "mode": "full",
+                    "instrument_token": data["token"][i],
+                    "last_price": price,
+                    "last_traded_quantity": data["last_quantity"][i],
+                    "average_traded_price": data["average"][i],
+                    "volume_traded": data["volume"][i],
+                    "total_buy_quantity": data["buy_quantity"][i],
+                    "total_sell_quantity": data["sell_quantity"][i],
+                    "ohlc": {"open": data["open"][i], "high": data["high"][i], "low": data["low"][i], "close": close},
+                    "change": round((price - close) / close * 100, 4) if close else 0,
+                    "last_trade_time": datetime.fromtimestamp(data["last_trade_at"][i], IST),
+                    "exchange_timestamp": now,
+                    "oi": 0,
+                    "depth": data["depth"][i],
+                }
+            )
+        return ticks
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        row = self.index.get(symbol)
+        return None if row is None else round(float(_round_tick(self._latent[row])), 2)
+
+    def instruments(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "instrument_token": int(token),
+                "exchange_token": int(token) // 256,
+                "tradingsymbol": symbol,
+                "name": name,
+                "last_price": 0.0,
+                "expiry": "",
+                "strike": 0.0,
+                "tick_size": TICK_SIZE,
+                "lot_size": 1,
+                "instrument_type": "EQ",
+                "segment": "NSE",
+                "exchange": "NSE",
+            }
+            for token, symbol, name in zip(self.tokens.tolist(), self.symbols, self.names)
+        ]
+
+    def _bar_times(self, start: datetime, end: datetime, interval: str) -> List[datetime]:
+        seconds = INTERVAL_SECONDS.get(interval)
+        if seconds is None:
+            raise InputException(f"Invalid interval: {interval}")
+        days = [start.date() + timedelta(days=n) for n in range((end.date() - start.date()).days + 1)]
+        days = [day for day in days if day.weekday() < 5]
+        if interval == "day":
+            times = [datetime.combine(day, dtime(), IST) for day in days]
+            return [ts for ts in times if start.replace(hour=0, minute=0, second=0, microsecond=0) <= ts <= end]
+        per_day = SESSION_SECONDS // seconds + (1 if SESSION_SECONDS % seconds else 0)
+        offsets = [timedelta(seconds=seconds * n) for n in range(per_day)]
+        times = [datetime.combine(day, SESSION_OPEN, IST) + offset for day in days for offset in offsets]
+        return [ts for ts in times if start <= ts <= end]
+
+    def historical(self, instrument_token: int, from_date: DateLike, to_date: DateLike, interval: str) -> List[Dict[str, Any]]:
+        row = self.token_index.get(int(instrument_token))
+        if row is None:
+            raise InputException("Invalid instrument token.")
+        now = datetime.now(IST)
+        times = self._bar_times(_to_ist(from_date), min(_to_ist(to_date), now), interval)
+        if not times:
+            return []
+        count = len(times)
+        bar_sigma = self.sigma[row] * np.sqrt(min(INTERVAL_SECONDS[interval], SESSION_SECONDS) / TRADING_SECONDS_PER_YEAR)
+        # The market factor is shared by every instrument for the same interval and bars,
+        # which keeps generated histories correlated like the live walk.
+        first = times[0].isoformat()
+        market = np.random.default_rng(_seed(self.seed, interval, first)).standard_normal(count)
+        rng = np.random.default_rng(_seed(self.seed, interval, first, instrument_token))
+        own = rng.standard_normal(count)
+        returns = bar_sigma * (np.sqrt(self.correlation) * market + np.sqrt(1 - self.correlation) * own)
+
+        # Walk backwards from the live price so the newest bar closes where the market is.
+        closes = float(self._latent[row]) * np.exp(-np.concatenate(([0.0], np.cumsum(returns[::-1][:-1])))[::-1])
+        opens = np.concatenate(([closes[0] * np.exp(-returns[0])], closes[:-1]))
+        wick = np.abs(rng.standard_normal((2, count))) * bar_sigma * 0.5
+        highs = np.maximum(opens, closes) * np.exp(wick[0])
+        lows = np.minimum(opens, closes) * np.exp(-wick[1])
+        share = min(INTERVAL_SECONDS[interval], SESSION_SECONDS) / SESSION_SECONDS
+        volumes = (self.base_volume[row] * share * rng.lognormal(0, 0.4, count)).astype(np.int64)
+
+        columns = [_round_tick(column).round(2).tolist() for column in (opens, highs, lows, closes)]
+        return [
+            {"date": ts, "open": o, "high": h, "low": low, "close": c, "volume": v}
+            for ts, o, h, low, c, v in zip(times, *columns, volumes.tolist())
+        ]
+
+    def account(self, user_id: str) -> "SimulatedAccount":
+        with self._lock:
+            account = self.accounts.get(user_id)
+            if account is None:
+                account = self.accounts[user_id] = SimulatedAccount(self, user_id)
+            return account
+
+
+class SimulatedAccount:
+    """Paper-trading account: cash, net positions, a few seeded holdings and orders."""
+
+    _order_ids = itertools.count(int(time.time()) * 1000)
+
+    def __init__(self, market: SimulatedMarket, user_id: str) -> None:
+        self.market = market
+        self.user_id = user_id
+        self.cash = market.starting_cash
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        self.orders: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        rng = np.random.default_rng(_seed(market.seed, "holdings", user_id))
+        picks = rng.choice(len(market), size=min(5, len(market)), replace=False) if len(market) else []
+        self.holdings = [
+            {
+                "tradingsymbol": market.symbols[row],
+                "exchange": "NSE",
+                "instrument_token": int(market.tokens[row]),
+                "isin": "",
+                "product": "CNC",
+                "quantity": int(rng.integers(1, 50)),
+                "t1_quantity": 0,
+                "average_price": round(float(market.close[row]) * float(rng.uniform(0.7, 1.2)), 2),
+            }
+            for row in picks
+        ]
+
+    def _position(self, symbol: str) -> Dict[str, Any]:
+        position = self.positions.get(symbol)
+        if position is None:
+            row = self.market.index[symbol]
+            position = self.positions[symbol] = {
+                "tradingsymbol": symbol,
+                "exchange": "NSE",
+                "instrument_token": int(self.market.tokens[row]),
+                "product": "CNC",
+                "quantity": 0,
+                "overnight_quantity": 0,
+                "multiplier": 1,
+                "average_price": 0.0,
+                "buy_quantity": 0,
+                "buy_value": 0.0,
+                "sell_quantity": 0,
+                "sell_value": 0.0,
+                "day_buy_quantity": 0,
+                "day_buy_value": 0.0,
+                "day_sell_quantity": 0,
+                "day_sell_value": 0.0,
+            }
+        return position
+
+    def _fill(self, order: Dict[str, Any], price: float) -> None:
+        quantity = order["quantity"]
+        position = self._position(order["tradingsymbol"])
+        value = price * quantity
+        if order["transaction_type"] == "BUY":
+            held = max(position["quantity"], 0)
+            position["average_price"] = round((position["average_price"] * held + value) / (held + quantity), 2)
+            position["quantity"] += quantity
+            for prefix in ("", "day_"):
+                position[f"{prefix}buy_quantity"] += quantity
+                position[f"{prefix}buy_value"] += value
+            self.cash -= value
+        else:
+            if position["quantity"] <= 0:
+                position["average_price"] = price
+            position["quantity"] -= quantity
+            for prefix in ("", "day_"):
+                position[f"{prefix}sell_quantity"] += quantity
+                position[f"{prefix}sell_value"] += value
+            self.cash += value
+        order.update(
+            status="COMPLETE",
+            filled_quantity=quantity,
+            pending_quantity=0,
+            average_price=price,
+            exchange_timestamp=datetime.now(IST).replace(tzinfo=None),
+            status_message=None,
+        )
+
+    def _record(self, order: Dict[str, Any]) -> None:
+        order["order_timestamp"] = datetime.now(IST).replace(tzinfo=None)
+        self.orders.setdefault(order["order_id"], []).append(dict(order))
+        self.market.publish_order(order)
+
+    def match_open_orders(self) -> None:
+        """Fill resting limit orders the market has traded through."""
+        self.market.advance()
+        with self._lock:
+            for history in self.orders.values():
+                order = dict(history[-1])
+                if order["status"] != "OPEN":
+                    continue
+                price = self.market.last_price(order["tradingsymbol"])
+                limit = order.get("price") or 0
+                if price is None or (order["transaction_type"] == "BUY" and price > limit) or (
+                    order["transaction_type"] == "SELL" and price < limit
+                ):
+                    continue
+                self._fill(order, limit)
+                self._record(order)
+
+    def place_order(self, params: Dict[str, Any]) -> str:
+        symbol = params.get("tradingsymbol")
+        price = self.market.last_price(symbol) if symbol else None
+        if price is None:
+            raise InputException("Invalid tradingsymbol.")
+        order_type = params.get("order_type") or "MARKET"
+        quantity = int(params.get("quantity") or 0)
+        if quantity <= 0:
+            raise InputException("Invalid quantity.")
+        limit = params.get("price")
+        if order_type == "LIMIT" and not limit:
+            raise InputException("Limit orders need a price.")
+        fill_price = float(limit) if order_type == "LIMIT" else price
+        if params.get("transaction_type") == "BUY" and fill_price * quantity > self.cash:
+            raise OrderException("Insufficient funds. Required margin exceeds available cash.")
+
+        with self._lock:
+            order = {
+                "order_id": str(next(self._order_ids)),
+                "exchange_order_id": None,
+                "placed_by": self.user_id,
+                "user_id": self.user_id,
+                "variety": params.get("variety") or "regular",
+                "status": "OPEN",
+                "tradingsymbol": symbol,
+                "exchange": params.get("exchange") or "NSE",
+                "instrument_token": int(self.market.tokens[self.market.index[symbol]]),
+                "transaction_type": params.get("transaction_type"),
+                "order_type": order_type,
+                "product": params.get("product") or "CNC",
+                "validity": params.get("validity") or "DAY",
+                "price": float(limit or 0),
+                "trigger_price": float(params.get("trigger_price") or 0),
+                "quantity": quantity,
+                "filled_quantity": 0,
+                "pending_quantity": quantity,
+                "cancelled_quantity": 0,
+                "average_price": 0.0,
+                "tag": params.get("tag"),
+                "status_message": None,
+            }
+            self._record(order)
+            marketable = order_type == "MARKET" or (
+                (order["transaction_type"] == "BUY" and price <= fill_price)
+                or (order["transaction_type"] == "SELL" and price >= fill_price)
+            )
+            if marketable:
+                self._fill(order, price if order_type == "MARKET" else fill_price)
+                self._record(order)
+            return order["order_id"]
+
+    def net_positions(self) -> List[Dict[str, Any]]:
+        self.market.advance()
+        with self._lock:
+            positions = []
+            for symbol, position in self.positions.items():
+                price = self.market.last_price(symbol) or 0
+                row = self.market.index[symbol]
+                item = dict(position, last_price=price, close_price=float(self.market.close[row]))
+                item["value"] = round(position["sell_value"] - position["buy_value"], 2)
+                item["pnl"] = round(item["value"] + position["quantity"] * price, 2)
+                item["m2m"] = item["pnl"]
+                positions.append(item)
+            return positions
+
+    def holding_rows(self) -> List[Dict[str, Any]]:
+        self.market.advance()
+        rows = []
+        for holding in self.holdings:
+            price = self.market.last_price(holding["tradingsymbol"])
+            close = float(self.market.close[self.market.index[holding["tradingsymbol"]]])
+            rows.append(
+                dict(
+                    holding,
+                    last_price=price,
+                    close_price=close,
+                    pnl=round((price - holding["average_price"]) * holding["quantity"], 2),
+                    day_change=round(price - close, 2),
+                    day_change_percentage=round((price - close) / close * 100, 2) if close else 0,
+                )
+            )
+        return rows
+
+    def margins(self) -> Dict[str, Any]:
+        with self._lock:
+            cash = round(self.cash, 2)
+        used = round(max(self.market.starting_cash - cash, 0), 2)
+        return {
+            "equity": {
+                "enabled": True,
+                "net": cash,
+                "available": {"adhoc_margin": 0, "cash": cash, "opening_balance": self.market.starting_cash, "live_balance": cash, "collateral": 0, "intraday_payin": 0},
+                "utilised": {"debits": used, "exposure": 0, "m2m_realised": 0, "m2m_unrealised": 0, "option_premium": 0, "payout": 0, "span": 0, "holding_sales": 0, "turnover": 0},
+            },
+            "commodity": {"enabled": False, "net": 0, "available": {"cash": 0, "live_balance": 0}, "utilised": {}},
+        }
+
+
+class SimulatedKite:
+    """
+    Drop-in for the subset of ``KiteConnect`` the backend calls, served from a
+    ``SimulatedMarket``. Market data is shared; account calls act on the paper
+    account for ``user_id``.
+    """
+
+    def __init__(self, market: SimulatedMarket, user_id: str) -> None:
+        self.market = market
+        self.user_id = user_id
+        self.access_token: Optional[str] = None
+
+    @property
+    def account(self) -> SimulatedAccount:
+        return self.market.account(self.user_id)
+
+    def set_access_token(self, access_token: str) -> None:
+        self.access_token = access_token
+
+    def login_url(self) -> str:
+        return "simulated://login?request_token=simulated"
+
+    def generate_session(self, request_token: str, api_secret: str) -> Dict[str, Any]:
+        self.access_token = f"simulated-{self.user_id}"
+        return {"user_id": self.user_id, "user_name": "Simulated Trader", "access_token": self.access_token}
+
+    def instruments(self, exchange: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.market.instruments() if exchange in (None, "NSE") else []
+
+    def quote(self, *instruments: Any) -> Dict[str, Dict[str, Any]]:
+        keys = instruments[0] if len(instruments) == 1 and isinstance(instruments[0], (list, tuple)) else instruments
+        return self.market.quote(keys)
+
+    def ltp(self, *instruments: Any) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {"instrument_token": quote["instrument_token"], "last_price": quote["last_price"]}
+            for key, quote in self.quote(*instruments).items()
+        }
+
+    def ohlc(self, *instruments: Any) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {"instrument_token": quote["instrument_token"], "last_price": quote["last_price"], "ohlc": quote["ohlc"]}
+            for key, quote in self.quote(*instruments).items()
+        }
+
+    def historical_data(self, instrument_token, from_date, to_date, interval, continuous=False, oi=False):
+        return self.market.historical(instrument_token, from_date, to_date, interval)
+
+    def positions(self) -> Dict[str, List[Dict[str, Any]]]:
+        net = self.account.net_positions()
+        return {"net": net, "day": net}
+
+    def holdings(self) -> List[Dict[str, Any]]:
+        return self.account.holding_rows()
+
+    def margins(self, segment: Optional[str] = None) -> Dict[str, Any]:
+        margins = self.account.margins()
+        return margins[segment] if segment else margins
+
+    def orders(self) -> List[Dict[str, Any]]:
+        account = self.account
+        account.match_open_orders()
+        return [dict(history[-1]) for history in account.orders.values()]
+
+    def order_history(self, order_id: str) -> List[Dict[str, Any]]:
+        account = self.account
+        account.match_open_orders()
+        return [dict(entry) for entry in account.orders.get(order_id, [])]
+
+    def place_order(self, variety: str, **params: Any) -> str:
+        return self.account.place_order({"variety": variety, **params})
+
+    def order_margins(self, params: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        margins = []
+        for order in params:
+            price = order.get("price") or self.market.last_price(order.get("tradingsymbol")) or 0
+            value = float(price) * int(order.get("quantity") or 0)
+            # Intraday products are margined at 20%; delivery needs full value.
+            total = value * (0.2 if order.get("product") == "MIS" else 1.0)
+            charges = round(value * 0.0005, 2)
+            margins.append(
+                {
+                    "type": "equity",
+                    "tradingsymbol": order.get("tradingsymbol"),
+                    "exchange": order.get("exchange") or "NSE",
+                    "span": 0,
+                    "exposure": 0,
+                    "var": round(total, 2),
+                    "total": round(total, 2),
+                    "charges": {"total": charges},
+                }
+            )
+        return margins
+
+
+class SimulatedTicker:
+    """
+    ``KiteTicker`` stand-in: a thread advances the market every ``interval``
+    seconds and delivers full-mode ticks for subscribed instruments that traded,
+    plus order updates from the paper accounts.
+    """
+
+    MODE_FULL = "full"
+    MODE_QUOTE = "quote"
+    MODE_LTP = "ltp"
+
+    def __init__(self, market: SimulatedMarket, interval: float = 0.1) -> None:
+        self.market = market
+        self.interval = interval
+        self.on_connect: Optional[Callable[..., None]] = None
+        self.on_ticks: Optional[Callable[..., None]] = None
+        self.on_order_update: Optional[Callable[..., None]] = None
+        self.on_error: Optional[Callable[..., None]] = None
+        self._subscribed = np.zeros(len(market), dtype=bool)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def is_connected(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self, instrument_tokens: Iterable[int]) -> None:
+        rows = [self.market.token_index[int(token)] for token in instrument_tokens if int(token) in self.market.token_index]
+        self._subscribed[rows] = True
+
+    def unsubscribe(self, instrument_tokens: Iterable[int]) -> None:
+        rows = [self.market.token_index[int(token)] for token in instrument_tokens if int(token) in self.market.token_index]
+        self._subscribed[rows] = False
+
+    def set_mode(self, mode: str, instrument_tokens: Iterable[int]) -> None:
+        # Every packet is full mode.
+        pass
+
+    def _forward_order(self, order: Dict[str, Any]) -> None:
+        if self.on_order_update:
+            self.on_order_update(self, order)
+
+    def connect(self, threaded: bool = True) -> None:
+        self._stop.clear()
+        self.market.add_order_listener(self._forward_order)
+        self._thread = threading.Thread(target=self._run, name="simulated-ticker", daemon=True)
+        self._thread.start()
+        if not threaded:
+            self._thread.join()
+
+    def _run(self) -> None:
+        if self.on_connect:
+            self.on_connect(self, None)
+        while not self._stop.wait(self.interval):
+            try:
+                rows = self.market.advance()
+                rows = rows[self._subscribed[rows]]
+                if rows.size and self.on_ticks:
+                    self.on_ticks(self, self.market.ticks(rows))
+            except Exception as exc:
+                if self.on_error:
+                    self.on_error(self, 0, str(exc))
+
+    def close(self, code: Optional[int] = None, reason: Optional[str] = None) -> None:
+        self._stop.set()
+        self.market.remove_order_listener(self._forward_order)
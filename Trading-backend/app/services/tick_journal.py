@@ -0,0 +1,356 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.utils.cache_snapshot import json_default, json_object_hook
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# Chunk header in the data file: magic, first/last receive time, batches, ticks, payload bytes.
+CHUNK_HEADER = struct.Struct("<4sddIII")
+# TKJ1 chunks held pickles and are no longer read.
+CHUNK_MAGIC = b"TKJ2"
+# Index record: data file offset, first/last receive time, batches, ticks.
+INDEX_RECORD = struct.Struct("<QddII")
+
+# (receive time, ticks as delivered in one feed callback)
+Batch = Tuple[float, List[Dict[str, Any]]]
+TickSink = Callable[[List[Dict[str, Any]]], None]
+
+# Decoded batches the replay reader may run ahead of the sink.
+PREFETCH_BATCHES = 256
+
+
+def journal_day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, IST).strftime("%Y-%m-%d")
+
+
+class ChunkInfo:
+    __slots__ = ("offset", "first_ts", "last_ts", "batches", "ticks")
+
+    def __init__(self, offset: int, first_ts: float, last_ts: float, batches: int, ticks: int) -> None:
+        self.offset = offset
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+        self.batches = batches
+        self.ticks = ticks
+
+
+class TickJournal:
+    """
+    Append-only journal of every tick batch received from the live feed.
+
+    Batches are buffered and written as zlib-compressed JSON chunks of about
+    ``chunk_ticks`` ticks, one data file per IST trading day. A fixed-width
+    ``.idx`` file next to each day records where every chunk starts and the time
+    range it covers, so a reader can seek to a timestamp by bisecting the index
+    and decompressing only the chunks it needs. Chunk headers repeat the index
+    fields, so a missing or short index is rebuilt by scanning the data file.
+
+    ``record`` only appends to an in-memory buffer; compression and disk writes
+    happen on a writer thread so the feed callback is never blocked on I/O. The
+    writer also flushes a buffer older than ``flush_seconds`` when the feed goes
+    quiet, so the last batches never wait for the next tick to reach disk.
+    """
+
+    def __init__(self, directory: Path, chunk_ticks: int = 5000, flush_seconds: float = 1.0) -> None:
+        self.directory = directory
+        self.chunk_ticks = chunk_ticks
+        self.flush_seconds = flush_seconds
+        self._buffer: List[Batch] = []
+        self._buffer_ticks = 0
+        self._buffer_day: Optional[str] = None
+        self._buffer_started = 0.0
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[str, List[Batch]]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self.recorded_ticks = 0
+        self.written_chunks = 0
+
+    def _paths(self, day: str) -> Tuple[Path, Path]:
+        return self.directory / f"{day}.ticks", self.directory / f"{day}.idx"
+
+    def record(self, ticks: List[Dict[str, Any]]) -> None:
+        if not ticks:
+            return
+        now = time.time()
+        day = journal_day(now)
+        with self._lock:
+            self._ensure_writer_locked()
+            if self._buffer and (day != self._buffer_day or now - self._buffer_started >= self.flush_seconds):
+                self._flush_locked()
+            if not self._buffer:
+                self._buffer_day = day
+                self._buffer_started = now
+            self._buffer.append((now, ticks))
+            self._buffer_ticks += len(ticks)
+            self.recorded_ticks += len(ticks)
+            if self._buffer_ticks >= self.chunk_ticks:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _ensure_writer_locked(self) -> None:
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name="tick-journal", daemon=True)
+            self._writer.start()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        self._ensure_writer_locked()
+        self._queue.put((self._buffer_day, self._buffer))
+        self._buffer = []
+        self._buffer_ticks = 0
+
+    def close(self) -> None:
+        """Flush buffered ticks and wait for the writer to finish."""
+        self.flush()
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=10)
+        self._writer = None
+
+    def _flush_stale(self) -> None:
+        with self._lock:
+            if self._buffer and time.time() - self._buffer_started >= self.flush_seconds:
+                self._flush_locked()
+
+    def _write_loop(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                self._flush_stale()
+                continue
+            if item is None:
+                return
+            day, batches = item
+            try:
+                self._write_chunk(day, batches)
+            except Exception as exc:
+                print(f"Tick journal write failed ({day}): {exc}")
+
+    def _write_chunk(self, day: str, batches: List[Batch]) -> None:
+        data_path, index_path = self._paths(day)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        encoded = json.dumps(batches, default=json_default, separators=(",", ":")).encode("utf-8")
+        payload = zlib.compress(encoded, 6)
+        first_ts, last_ts = batches[0][0], batches[-1][0]
+        ticks = sum(len(ticks) for _, ticks in batches)
+        header = CHUNK_HEADER.pack(CHUNK_MAGIC, first_ts, last_ts, len(batches), ticks, len(payload))
+        with data_path.open("ab") as handle:
+            offset = handle.tell()
+            handle.write(header + payload)
+            handle.flush()
+            os.fsync(handle.fileno())
+        # The index is written after the data, so it never points past a partial chunk.
+        with index_path.open("ab") as handle:
+            handle.write(INDEX_RECORD.pack(offset, first_ts, last_ts, len(batches), ticks))
+        self.written_chunks += 1
+
+    def days(self) -> List[str]:
+        if not self.directory.exists():
+            return []
+        return sorted(path.stem for path in self.directory.glob("*.ticks"))
+
+    def chunks(self, day: str) -> List[ChunkInfo]:
+        data_path, index_path = self._paths(day)
+        if not data_path.exists():
+            return []
+        chunks: List[ChunkInfo] = []
+        if index_path.exists():
+            raw = index_path.read_bytes()
+            usable = len(raw) - len(raw) % INDEX_RECORD.size
+            chunks = [ChunkInfo(*fields) for fields in INDEX_RECORD.iter_unpack(raw[:usable])]
+        indexed_end = 0
+        if chunks:
+            last = chunks[-1]
+            with data_path.open("rb") as handle:
+                handle.seek(last.offset)
+                header = handle.read(CHUNK_HEADER.size)
+            indexed_end = last.offset + CHUNK_HEADER.size + CHUNK_HEADER.unpack(header)[5]
+        if indexed_end < data_path.stat().st_size:
+            chunks += self._scan(data_path, indexed_end)
+        return chunks
+
+    def _scan(self, data_path: Path, offset: int) -> List[ChunkInfo]:
+        chunks = []
+        size = data_path.stat().st_size
+        with data_path.open("rb") as handle:
+            handle.seek(offset)
+            while offset + CHUNK_HEADER.size <= size:
+                magic, first_ts, last_ts, batches, ticks, length = CHUNK_HEADER.unpack(handle.read(CHUNK_HEADER.size))
+                if magic != CHUNK_MAGIC or offset + CHUNK_HEADER.size + length > size:
+                    # Torn write at the tail: everything before it is still readable.
+                    break
+                chunks.append(ChunkInfo(offset, first_ts, last_ts, batches, ticks))
+                offset += CHUNK_HEADER.size + length
+                handle.seek(offset)
+        return chunks
+
+    def read(self, day: str, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Batch]:
+        """Batches for ``day`` received between ``start`` and ``end`` (epoch seconds)."""
+        chunks = self.chunks(day)
+        first = 0
+        if start is not None:
+            # Chunks are in receive order; skip those that ended before ``start``.
+            first = bisect_left([chunk.last_ts for chunk in chunks], start)
+        data_path, _ = self._paths(day)
+        with data_path.open("rb") as handle:
+            for chunk in chunks[first:]:
+                if end is not None and chunk.first_ts > end:
+                    return
+                handle.seek(chunk.offset)
+                magic, *_, length = CHUNK_HEADER.unpack(handle.read(CHUNK_HEADER.size))
+                if magic != CHUNK_MAGIC:
+                    raise ValueError(f"Unsupported tick journal chunk format {magic!r} in {data_path.name}")
+                batches = json.loads(zlib.decompress(handle.read(length)), object_hook=json_object_hook)
+                for received_at, ticks in batches:
+                    if start is not None and received_at < start:
+                        continue
+                    if end is not None and received_at > end:
+                        return
+                    yield received_at, ticks
+
+    def summary(self) -> List[Dict[str, Any]]:
+        days = []
+        for day in self.days():
+            chunks = self.chunks(day)
+            data_path, _ = self._paths(day)
+            days.append(
+                {
+                    "day": day,
+                    "chunks": len(chunks),
+                    "batches": sum(chunk.batches for chunk in chunks),
+                    "ticks": sum(chunk.ticks for chunk in chunks),
+                    "first_ts": chunks[0].first_ts if chunks else None,
+                    "last_ts": chunks[-1].last_ts if chunks else None,
+                    "bytes": data_path.stat().st_size,
+                }
+            )
+        return days
+
+
+class TickReplayer:
+    """
+    Feeds journaled batches back through the live ingestion path.
+
+    ``speed`` scales the recorded gaps between batches (1 = real time, 10 = ten
+    times faster); ``None`` replays as fast as the sink accepts batches, which is
+    how market-open bursts are used as a benchmark.
+    """
+
+    def __init__(self, journal: TickJournal, sink: TickSink) -> None:
+        self.journal = journal
+        self.sink = sink
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._state: Dict[str, Any] = {"running": False}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, day: str, start: Optional[float] = None, end: Optional[float] = None, speed: Optional[float] = 1.0) -> None:
+        if self.running:
+            raise RuntimeError("A replay is already running.")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, args=(day, start, end, speed), name="tick-replay", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def run(self, day: str, start: Optional[float] = None, end: Optional[float] = None, speed: Optional[float] = 1.0) -> Dict[str, Any]:
+        state = self._state = {
+            "running": True,
+            "day": day,
+            "speed": speed,
+            "start": start,
+            "end": end,
+            "position": None,
+            "batches": 0,
+            "ticks": 0,
+            "started_at": time.time(),
+            "finished_at": None,
+            "error": None,
+        }
+        wall_start = time.perf_counter()
+        paced_from = wall_start
+        recorded_start: Optional[float] = None
+        try:
+            for received_at, ticks in self._prefetch(day, start, end):
+                if self._stop.is_set():
+                    break
+                if recorded_start is None:
+                    recorded_start = received_at
+                    paced_from = time.perf_counter()
+                if speed:
+                    delay = (received_at - recorded_start) / speed - (time.perf_counter() - paced_from)
+                    if delay > 0 and self._stop.wait(delay):
+                        break
+                self.sink(ticks)
+                state["position"] = received_at
+                state["batches"] += 1
+                state["ticks"] += len(ticks)
+        except Exception as exc:
+            state["error"] = str(exc)
+            print(f"Tick replay failed ({day}): {exc}")
+        finally:
+            state["running"] = False
+            state["finished_at"] = time.time()
+            state["elapsed_seconds"] = round(time.perf_counter() - wall_start, 3)
+        return state
+
+    def _prefetch(self, day: str, start: Optional[float], end: Optional[float]) -> Iterator[Batch]:
+        # Decompressing and decoding a chunk takes long enough to stall pacing, so a
+        # reader thread decodes ahead while the replay waits for the next batch's time.
+        batches: "queue.Queue[Any]" = queue.Queue(maxsize=PREFETCH_BATCHES)
+        done = object()
+
+        def put(item: Any) -> bool:
+            while not self._stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read() -> None:
+            try:
+                for batch in self.journal.read(day, start, end):
+                    if not put(batch):
+                        return
+            except Exception as exc:
+                put(exc)
+                return
+            put(done)
+
+        threading.Thread(target=read, name="tick-replay-reader", daemon=True).start()
+        while not self._stop.is_set():
+            try:
+                item = batches.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def status(self) -> Dict[str, Any]:
+        return dict(self._state, running=self.running)
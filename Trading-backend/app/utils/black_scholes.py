@@ -0,0 +1,111 @@
+from typing import Dict
+
+import numpy as np
+
+SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    # 0.5 * erfc(-x / sqrt(2)) using the Numerical Recipes erfc fit (relative error < 1.2e-7).
+    z = np.abs(x) / np.sqrt(2)
+    t = 1 / (1 + 0.5 * z)
+    poly = -1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (-0.18628806 + t * (
+        0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277))))))))
+    erfc = t * np.exp(-z * z + poly)
+    return np.where(x >= 0, 1 - 0.5 * erfc, 0.5 * erfc)
+
+
+def _d1_d2(spot, strike, t, rate, sigma):
+    root_t = np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * sigma * sigma) * t) / (sigma * root_t)
+    return d1, d1 - sigma * root_t
+
+
+def price(spot, strike, t, rate, sigma, is_call) -> np.ndarray:
+    """Black-Scholes premium; every argument broadcasts against the others."""
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma)
+    discount = strike * np.exp(-rate * t)
+    call = spot * norm_cdf(d1) - discount * norm_cdf(d2)
+    return np.where(is_call, call, call - spot + discount)
+
+
+def greeks(spot, strike, t, rate, sigma, is_call) -> Dict[str, np.ndarray]:
+    """
+    Black-Scholes premium and Greeks for a whole chain in one pass.
+
+    Theta is per calendar day, vega and rho per one percentage point, which is
+    how Indian broker terminals quote them.
+    """
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma)
+    root_t = np.sqrt(t)
+    pdf = norm_pdf(d1)
+    discount = strike * np.exp(-rate * t)
+    cdf_d1, cdf_d2 = norm_cdf(d1), norm_cdf(d2)
+    call = spot * cdf_d1 - discount * cdf_d2
+    decay = -spot * pdf * sigma / (2 * root_t)
+    return {
+        "price": np.where(is_call, call, call - spot + discount),
+        "delta": np.where(is_call, cdf_d1, cdf_d1 - 1),
+        "gamma": pdf / (spot * sigma * root_t),
+        "theta": np.where(is_call, decay - rate * discount * cdf_d2, decay + rate * discount * (1 - cdf_d2)) / 365,
+        "vega": spot * pdf * root_t / 100,
+        "rho": np.where(is_call, discount * t * cdf_d2, -discount * t * (1 - cdf_d2)) / 100,
+    }
+
+
+def implied_volatility(
+    premium,
+    spot,
+    strike,
+    t,
+    rate,
+    is_call,
+    initial=None,
+    iterations: int = 60,
+    tolerance: float = 1e-6,
+) -> np.ndarray:
+    """
+    Implied volatility for every option at once.
+
+    Each option keeps a volatility bracket that every evaluation tightens (the
+    premium is increasing in volatility). A Newton step on vega is taken when it
+    lands inside the bracket and a bisection step otherwise, so near-the-money
+    options converge in a few Newton steps while deep out-of-the-money ones,
+    where vega vanishes, still converge. ``initial`` warm-starts the solve, e.g.
+    from the previous surface. Premiums outside the no-arbitrage bounds, or
+    that do not converge, come back as NaN.
+    """
+    premium, spot, strike, t, is_call = np.broadcast_arrays(
+        np.asarray(premium, float), np.asarray(spot, float), np.asarray(strike, float), np.asarray(t, float), np.asarray(is_call, bool)
+    )
+    discount = strike * np.exp(-rate * t)
+    intrinsic = np.maximum(np.where(is_call, spot - discount, discount - spot), 0)
+    upper = np.where(is_call, spot, discount)
+    valid = (premium > intrinsic) & (premium < upper) & (t > 0)
+    low = np.full(premium.shape, 1e-4)
+    high = np.full(premium.shape, 5.0)
+    # Brenner-Subrahmanyam starting point unless a warm start is given.
+    sigma = np.sqrt(2 * np.pi / np.where(t > 0, t, 1)) * premium / spot
+    if initial is not None:
+        initial = np.broadcast_to(np.asarray(initial, float), premium.shape)
+        sigma = np.where(np.isfinite(initial), initial, sigma)
+    sigma = np.clip(np.nan_to_num(sigma, nan=0.2), 0.01, 3.0)
+    converged = np.zeros(premium.shape, bool)
+    for _ in range(iterations):
+        d1, _ = _d1_d2(spot, strike, t, rate, sigma)
+        diff = price(spot, strike, t, rate, sigma, is_call) - premium
+        converged = (np.abs(diff) < tolerance * np.maximum(premium, 1)) | (high - low < tolerance)
+        active = valid & ~converged
+        if not active.any():
+            break
+        high = np.where(active & (diff > 0), sigma, high)
+        low = np.where(active & (diff < 0), sigma, low)
+        vega = spot * norm_pdf(d1) * np.sqrt(t)
+        newton = sigma - diff / np.where(vega > 1e-12, vega, np.nan)
+        inside = (newton > low) & (newton < high)
+        sigma = np.where(active, np.where(inside, newton, 0.5 * (low + high)), sigma)
+    return np.where(valid & converged, sigma, np.nan)
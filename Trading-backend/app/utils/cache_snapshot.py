@@ -0,0 +1,71 @@
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+SNAPSHOT_VERSION = 3
+
+
+def json_default(value: Any) -> Any:
+    # Kite payloads carry dates and datetimes; everything else is plain JSON.
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Cannot encode {type(value).__name__} as JSON")
+
+
+def json_object_hook(value: Dict[str, Any]) -> Any:
+    if len(value) == 1:
+        if "$datetime" in value:
+            return datetime.fromisoformat(value["$datetime"])
+        if "$date" in value:
+            return date.fromisoformat(value["$date"])
+    return value
+
+
+def _valid_cache(entries: Any) -> bool:
+    # Every snapshotted cache maps a string key to a dict stamped with its fetch time.
+    return isinstance(entries, dict) and all(
+        isinstance(key, str) and isinstance(entry, dict) and isinstance(entry.get("ts"), (int, float))
+        for key, entry in entries.items()
+    )
+
+
+def save_snapshot(path: Path, caches: Dict[str, Any]) -> None:
+    """
+    Write caches to gzip-compressed JSON. The file is written next to the target
+    and renamed into place so a crash never leaves a truncated snapshot.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"version": SNAPSHOT_VERSION, "saved_at": time.time(), "caches": caches}
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as handle:
+        json.dump(payload, handle, default=json_default, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            payload = json.load(handle, object_hook=json_object_hook)
+    except Exception as exc:
+        print(f"Ignoring unreadable cache snapshot ({path}): {exc}")
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != SNAPSHOT_VERSION:
+        return None
+    caches = payload.get("caches")
+    if not isinstance(caches, dict):
+        return None
+    valid = {}
+    for name, entries in caches.items():
+        if _valid_cache(entries):
+            valid[name] = entries
+        else:
+            print(f"Ignoring malformed cache {name!r} in snapshot ({path})")
+    return valid
@@ -0,0 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared pool for blocking upstream calls (Kite, NSE) issued off the request path.
+background_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="background")
+# Order placement, its pre-trade checks and basket legs, kept clear of bulk work.
+order_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="orders")
+# Historical data fetches block on Zerodha's 3/s limit; they wait here, not in the shared pool.
+history_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="history")
@@ -0,0 +1,62 @@
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+def ohlc_buckets(candles: List[Dict[str, Any]], max_points: int) -> List[Dict[str, Any]]:
+    """
+    Merge consecutive candles into at most ``max_points`` buckets of near-equal
+    size. Each bucket keeps its first open and date, last close, extreme
+    high/low and summed volume, so the shape of the range is preserved.
+    """
+    count = len(candles)
+    if count <= max_points:
+        return candles
+    starts = np.linspace(0, count, max_points + 1).astype(np.int64)[:-1]
+    ends = np.append(starts[1:], count) - 1
+    high = np.maximum.reduceat(np.fromiter((c["high"] for c in candles), float, count), starts)
+    low = np.minimum.reduceat(np.fromiter((c["low"] for c in candles), float, count), starts)
+    volume = np.add.reduceat(np.fromiter((c["volume"] or 0 for c in candles), np.int64, count), starts)
+    return [
+        {
+            "date": candles[start]["date"],
+            "open": candles[start]["open"],
+            "high": float(high[i]),
+            "low": float(low[i]),
+            "close": candles[end]["close"],
+            "volume": int(volume[i]),
+        }
+        for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist()))
+    ]
+
+
+def lttb(candles: List[Dict[str, Any]], max_points: int, field: str = "close") -> List[Dict[str, Any]]:
+    """
+    Largest-Triangle-Three-Buckets on ``field``: keeps the first and last
+    candle and, from each bucket in between, the candle forming the largest
+    triangle with the previously kept point and the next bucket's average.
+    Returns original candles, so line charts keep exact values and dates.
+    """
+    count = len(candles)
+    if count <= max_points or max_points < 3:
+        return candles
+    x = np.arange(count, dtype=float)
+    y = np.fromiter((c[field] for c in candles), float, count)
+    edges = np.linspace(1, count - 1, max_points - 1).astype(np.int64)
+    selected = [0]
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else count
+        if next_end > end:
+            avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = int(start + np.argmax(area))
+        selected.append(previous)
+    selected.append(count - 1)
+    return [candles[i] for i in selected]
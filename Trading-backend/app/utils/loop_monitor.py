@@ -0,0 +1,107 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from app.utils.metrics import Counter, Gauge, Histogram
+
+LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a loop callback was due and when it ran.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_LAG_CURRENT = Gauge("event_loop_lag_current_seconds", "Most recent event loop lag sample.")
+LOOP_STALLS = Counter("event_loop_stalls_total", "Event loop stalls past the threshold, by route.", ("route",))
+
+
+def _route_from_stack(frame: Any) -> Optional[str]:
+    # ASGI apps thread ``scope`` through every layer, so the innermost frame that
+    # has one names the request that is blocking the loop.
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") in {"http", "websocket"}:
+            return f"{scope.get('method', 'WS')} {scope.get('path')}"
+        frame = frame.f_back
+    return None
+
+
+class LoopLagMonitor:
+    """
+    Continuous event-loop scheduling-delay monitor.
+
+    A task on the loop sleeps for ``interval`` and records how late it woke up. A
+    watchdog thread watches that task's heartbeat; once it is older than
+    ``threshold`` the loop is blocked *right now*, so the watchdog captures the
+    loop thread's stack and the request being served while the stall is ongoing.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, history: int = 50) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls: deque = deque(maxlen=history)
+        self._beat = time.monotonic()
+        self._captured_beat: Optional[float] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _measure(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._beat = now
+            LOOP_LAG_SECONDS.observe(lag)
+            LOOP_LAG_CURRENT.set(lag)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            blocked_for = time.monotonic() - beat - self.interval
+            if blocked_for < self.threshold or self._captured_beat == beat:
+                continue
+            self._captured_beat = beat
+            self._capture(blocked_for)
+
+    def _capture(self, blocked_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        route = _route_from_stack(frame) or "background"
+        stack = traceback.format_stack(frame)
+        LOOP_STALLS.inc(route=route)
+        self.stalls.append(
+            {
+                "at": time.time(),
+                "route": route,
+                # How long the loop had been blocked when the stack was taken.
+                "blocked_ms": round(blocked_for * 1000, 1),
+                "stack": [line.rstrip() for line in stack[-30:]],
+            }
+        )
+        print(f"Event loop blocked for {blocked_for * 1000:.0f}ms in {route}: {stack[-1].strip()}")
+
+    def recent_stalls(self) -> List[Dict[str, Any]]:
+        return list(reversed(self.stalls))
+
+
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,183 @@
+import asyncio
+import functools
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from fastapi.routing import APIRoute
+
+# Leaf frames in these modules are threads parked on I/O or locks, not work.
+_IDLE_MODULES = ("threading.py", "selectors.py", "queue.py", "thread.py")
+
+# Token of the tracked request the current task or threadpool call belongs to.
+_current_request: ContextVar[Optional[int]] = ContextVar("profiled_request", default=None)
+
+
+class SamplingProfiler:
+    """
+    Opt-in wall-clock sampling profiler.
+
+    While enabled, a fraction (``sample_rate``) of requests is tracked. As long as
+    at least one tracked request is in flight, a daemon thread snapshots the stacks
+    of the threads serving tracked requests each ``interval_ms`` and counts them
+    under the request's route: the threadpool worker running a sync endpoint (bound
+    by ``bind``), or otherwise the event loop thread that entered ``track``. Other
+    threads are never sampled. ``collapsed`` renders the counts in the folded
+    format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, max_stacks: int = 20000) -> None:
+        self.max_stacks = max_stacks
+        self.sample_rate = 0.0
+        self.interval_ms = 5.0
+        self.enabled_until: Optional[float] = None
+        self._stacks: Counter = Counter()
+        # token -> (route, thread that entered track, worker threads bound to it)
+        self._active: Dict[int, tuple] = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+        self.tracked_requests = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.enabled_until is not None and time.time() < self.enabled_until
+
+    def enable(self, sample_rate: float, duration_seconds: float, interval_ms: float = 5.0) -> None:
+        self.sample_rate = sample_rate
+        self.interval_ms = interval_ms
+        self.enabled_until = time.time() + duration_seconds
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def disable(self) -> None:
+        self.enabled_until = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+            self.tracked_requests = 0
+
+    def should_sample(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    @contextmanager
+    def track(self, route: str) -> Iterator[None]:
+        with self._lock:
+            token = next(self._tokens)
+            self._active[token] = (route, threading.get_ident(), set())
+            self.tracked_requests += 1
+        context_token = _current_request.set(token)
+        self._wakeup.set()
+        try:
+            yield
+        finally:
+            _current_request.reset(context_token)
+            with self._lock:
+                self._active.pop(token, None)
+
+    def bind(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a sync endpoint so the worker thread running it is sampled for its request."""
+        if getattr(fn, "_profiler_bound", False):
+            # include_router rebuilds routes from already-wrapped endpoints.
+            return fn
+
+        @functools.wraps(fn)
+        def bound(*args: Any, **kwargs: Any) -> Any:
+            token = _current_request.get()
+            entry = self._active.get(token) if token is not None else None
+            if entry is None:
+                return fn(*args, **kwargs)
+            ident = threading.get_ident()
+            with self._lock:
+                entry[2].add(ident)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    entry[2].discard(ident)
+
+        bound._profiler_bound = True
+        return bound
+
+    def _targets(self) -> Dict[int, Set[str]]:
+        # While a worker runs the endpoint, the loop thread is busy with other requests.
+        targets: Dict[int, Set[str]] = {}
+        with self._lock:
+            for route, entered_on, workers in self._active.values():
+                for ident in workers or (entered_on,):
+                    targets.setdefault(ident, set()).add(route)
+        return targets
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while self.enabled:
+            if not self._active:
+                self._wakeup.wait(timeout=1.0)
+                self._wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            for ident, routes in self._targets().items():
+                frame = frames.get(ident)
+                if ident == own or frame is None:
+                    continue
+                if os.path.basename(frame.f_code.co_filename) in _IDLE_MODULES:
+                    continue
+                # Async requests interleaved on the loop thread share its samples.
+                root = "+".join(sorted(routes))
+                stack = self._fold(frame)
+                with self._lock:
+                    if len(self._stacks) < self.max_stacks or (root, stack) in self._stacks:
+                        self._stacks[(root, stack)] += 1
+                    self.samples += 1
+            time.sleep(self.interval_ms / 1000)
+
+    @staticmethod
+    def _fold(frame: Any) -> str:
+        names: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+    def collapsed(self) -> str:
+        with self._lock:
+            items = list(self._stacks.items())
+        lines = [f"{root};{stack} {count}" for (root, stack), count in items]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "enabled_until": self.enabled_until if self.enabled else None,
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval_ms,
+            "tracked_requests": self.tracked_requests,
+            "samples": self.samples,
+            "distinct_stacks": len(self._stacks),
+        }
+
+
+profiler = SamplingProfiler()
+
+
+class ProfiledRoute(APIRoute):
+    """Route class that binds sync endpoints' worker threads to the tracked request."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = profiler.bind(endpoint)
+        super().__init__(path, endpoint, **kwargs)
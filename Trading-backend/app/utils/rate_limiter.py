@@ -1,10 +1,25 @@
+import threading
 import time
 from collections import defaultdict, deque
 from fastapi import HTTPException, status
 
+from app.utils.metrics import Counter, Histogram
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by a rate limiter.",
+    ("limiter",),
+)
+TOKEN_BUCKET_WAIT_SECONDS = Histogram(
+    "token_bucket_wait_seconds",
+    "Time callers spent blocked waiting for a token.",
+    ("bucket",),
+)
+
 
 class SimpleRateLimiter:
-    def __init__(self, limit: int, window_seconds: int) -> None:
+    def __init__(self, limit: int, window_seconds: int, name: str = "default") -> None:
+        self.name = name
         self.limit = limit
         self.window_seconds = window_seconds
         self._requests = defaultdict(deque)
@@ -15,9 +30,45 @@ class SimpleRateLimiter:
         while queue and queue[0] <= now - self.window_seconds:
             queue.popleft()
         if len(queue) >= self.limit:
+            RATE_LIMIT_REJECTIONS.inc(limiter=self.name)
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="Rate limit exceeded. Please wait a moment and try again.",
             )
         queue.append(now)
 
+
+
+class TokenBucket:
+    """
+    Blocking token bucket for pacing outbound calls (e.g. Zerodha's order-rate limit).
+    Unlike SimpleRateLimiter it never rejects: ``acquire`` waits for the next token.
+    """
+
+    def __init__(self, rate: float, capacity: int, name: str = "default") -> None:
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, reserve: int = 0) -> None:
+        """
+        Take one token, waiting as long as needed. Low-priority callers pass
+        ``reserve`` to take a token only while that many more are left for others.
+        """
+        needed = 1 + min(reserve, self.capacity - 1)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= 1
+                    break
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+        TOKEN_BUCKET_WAIT_SECONDS.observe(waited, bucket=self.name)
@@ -0,0 +1,48 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+# name -> [total milliseconds, calls]; None outside a timed request.
+_spans: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("server_timing_spans", default=None)
+
+
+def start() -> Dict[str, List[float]]:
+    """Begin collecting spans for the current request and return the collector."""
+    spans: Dict[str, List[float]] = {}
+    _spans.set(spans)
+    return spans
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a named stage of the current request. Repeated spans with the same name
+    are summed. Outside a timed request this is a no-op.
+
+    The collector is a shared dict, so spans recorded in threads that inherit the
+    request context (``asyncio.to_thread``, sync endpoints) land on the request.
+    """
+    spans = _spans.get()
+    if spans is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        entry = spans.setdefault(name, [0.0, 0])
+        entry[0] += elapsed
+        entry[1] += 1
+
+
+def header(spans: Dict[str, List[float]], total_ms: float) -> str:
+    parts = []
+    for name, (duration, calls) in spans.items():
+        part = f"{name};dur={duration:.1f}"
+        if calls > 1:
+            part += f';desc="{int(calls)} calls"'
+        parts.append(part)
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
@@ -0,0 +1,231 @@
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+from app.utils.concurrency import background_executor
+from app.utils.metrics import Counter
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result (hit, stale, miss).",
+    ("cache", "result"),
+)
+_RESULTS = {"fresh": "hit", "stale": "stale", "miss": "miss"}
+
+DEFAULT_KEY = "default"
+
+
+class SWRCache:
+    """
+    Cache-aside store with stale-while-revalidate semantics.
+
+    - age < soft_ttl: served from cache.
+    - soft_ttl <= age < hard_ttl: served stale while a single background refresh runs.
+    - age >= hard_ttl (or missing): the caller loads synchronously.
+
+    Loader failures are remembered for ``negative_ttl`` seconds. During that window
+    a cold key re-raises the cached error instead of calling upstream again, and a
+    stale key keeps serving its last good value without scheduling more refreshes.
+
+    Entries are plain ``{"data": ..., "ts": ...}`` dicts so they can be snapshotted.
+    """
+
+    def __init__(self, soft_ttl: float, hard_ttl: float, negative_ttl: float = 0, name: Optional[str] = None) -> None:
+        self.name = name
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self.negative_ttl = negative_ttl
+        self.entries: Dict[Hashable, Dict[str, Any]] = {}
+        self._inflight: set = set()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+
+    def timestamp(self, key: Hashable = DEFAULT_KEY) -> float:
+        entry = self.entries.get(key)
+        return entry["ts"] if entry and "data" in entry else 0
+
+    def peek(self, key: Hashable = DEFAULT_KEY) -> Any:
+        entry = self.entries.get(key)
+        return entry.get("data") if entry else None
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+    def clear_errors(self) -> None:
+        for key in list(self.entries):
+            entry = self.entries[key]
+            if "error" not in entry:
+                continue
+            if "data" in entry:
+                self.entries[key] = {"data": entry["data"], "ts": entry["ts"]}
+            else:
+                self.entries.pop(key, None)
+
+    def set(self, key: Hashable, value: Any, ts: Optional[float] = None) -> None:
+        self.entries[key] = {"data": value, "ts": ts if ts is not None else time.time()}
+
+    def snapshot(self) -> Dict[Hashable, Dict[str, Any]]:
+        return {key: {"data": entry["data"], "ts": entry["ts"]} for key, entry in self.entries.items() if "data" in entry}
+
+    def restore(self, entries: Dict[Hashable, Dict[str, Any]]) -> None:
+        self.entries.clear()
+        self.entries.update(entries)
+
+    def _recent_error(self, entry: Optional[Dict[str, Any]], now: float) -> Optional[BaseException]:
+        if not entry or "error" not in entry:
+            return None
+        if now - entry["error_ts"] < self.negative_ttl:
+            return entry["error"]
+        return None
+
+    def _record_error(self, key: Hashable, exc: BaseException) -> None:
+        if self.negative_ttl <= 0:
+            return
+        entry = dict(self.entries.get(key) or {})
+        entry["error"] = exc
+        entry["error_ts"] = time.time()
+        self.entries[key] = entry
+
+    def _classify(self, key: Hashable, now: float) -> str:
+        entry = self.entries.get(key)
+        if entry and "data" in entry:
+            age = now - entry["ts"]
+            if age < self.soft_ttl:
+                return "fresh"
+            if age < self.hard_ttl:
+                return "stale"
+        return "miss"
+
+    def _record_lookup(self, state: str, count: int = 1) -> None:
+        if self.name and count:
+            CACHE_LOOKUPS.inc(count, cache=self.name, result=_RESULTS[state])
+
+    def _claim(self, keys: Iterable[Hashable]) -> List[Hashable]:
+        with self._lock:
+            claimed = [key for key in keys if key not in self._inflight]
+            self._inflight.update(claimed)
+        return claimed
+
+    def _release(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            self._inflight.difference_update(keys)
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        now = time.time()
+        state = self._classify(key, now)
+        self._record_lookup(state)
+        if state == "fresh":
+            return self.entries[key]["data"]
+        if state == "stale":
+            if not self._recent_error(self.entries[key], now) and self._claim([key]):
+                background_executor.submit(self._refresh, key, loader)
+            return self.entries[key]["data"]
+        return self._load(key, loader)
+
+    def _load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another caller may have filled the entry while we waited.
+            now = time.time()
+            if self._classify(key, now) != "miss":
+                return self.entries[key]["data"]
+            error = self._recent_error(self.entries.get(key), now)
+            if error is not None:
+                raise error
+            try:
+                value = loader()
+            except Exception as exc:
+                self._record_error(key, exc)
+                raise
+            self.set(key, value)
+            return value
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        try:
+            self.set(key, loader())
+        except Exception as exc:
+            print(f"Background refresh failed ({key}): {exc}")
+            self._record_error(key, exc)
+        finally:
+            self._release([key])
+
+    def get_many(self, keys: List[Hashable], loader: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> Dict[Hashable, Any]:
+        """
+        Batch variant: ``loader`` receives the keys to fetch and returns a mapping of
+        the ones it found. Missing keys are loaded in one synchronous call, stale keys
+        in one background call.
+        """
+        now = time.time()
+        results: Dict[Hashable, Any] = {}
+        stale: List[Hashable] = []
+        missing: List[Hashable] = []
+        served_stale = 0
+        for key in keys:
+            state = self._classify(key, now)
+            if state == "miss":
+                missing.append(key)
+                continue
+            results[key] = self.entries[key]["data"]
+            if state == "stale":
+                served_stale += 1
+                if not self._recent_error(self.entries[key], now):
+                    stale.append(key)
+        self._record_lookup("fresh", len(results) - served_stale)
+        self._record_lookup("stale", served_stale)
+        self._record_lookup("miss", len(missing))
+
+        stale = self._claim(stale)
+        if stale:
+            background_executor.submit(self._refresh_many, stale, loader)
+
+        if missing:
+            errors = [self._recent_error(self.entries.get(key), now) for key in missing]
+            if all(error is not None for error in errors):
+                raise errors[0]
+            try:
+                fetched = loader(missing)
+            except Exception as exc:
+                for key in missing:
+                    self._record_error(key, exc)
+                raise
+            fetched_at = time.time()
+            for key, value in fetched.items():
+                self.set(key, value, fetched_at)
+                results[key] = value
+        return results
+
+    def _refresh_many(self, keys: List[Hashable], loader: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> None:
+        try:
+            fetched = loader(keys)
+            fetched_at = time.time()
+            for key, value in fetched.items():
+                self.set(key, value, fetched_at)
+        except Exception as exc:
+            print(f"Background refresh failed ({len(keys)} keys): {exc}")
+            for key in keys:
+                self._record_error(key, exc)
+        finally:
+            self._release(keys)
+
+
+def swr_cached(cache_attr: str, key: Optional[Callable[..., Hashable]] = None):
+    """
+    Route a method through the ``SWRCache`` stored on ``self.<cache_attr>``.
+    ``key`` builds the cache key from the call arguments (default: a single entry).
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            cache: SWRCache = getattr(self, cache_attr)
+            cache_key = key(*args, **kwargs) if key else DEFAULT_KEY
+            return cache.get(cache_key, lambda: fn(self, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
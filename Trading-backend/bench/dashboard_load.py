@@ -0,0 +1,282 @@
+"""
+Offline dashboard load test.
+
+Starts ``bench/fake_kite.py`` and the backend in-process (no database, no
+Zerodha credentials), gives every simulated user their own broker session, and
+replays the dashboard's polling pattern:
+
+* ``/market/orders`` every 5s
+* ``/market/nifty-50`` with candles every 15s (the index table)
+* ``/market/margins`` every 30s
+
+and optionally positions/holdings every 15s. ``--speed`` compresses the
+intervals, e.g. ``--speed 5`` polls five times as often.
+
+Reports throughput, p50/p99 latency and errors per route, plus upstream Kite
+calls per user (private account data) and in total (shared market data).
+
+    cd Trading-backend
+    python -m bench.dashboard_load --users 50 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench.fake_kite import FakeKiteConfig, FakeKiteServer  # noqa: E402
+
+SERVICE_TOKEN = "bench-service"
+
+# (label, path, params, interval seconds)
+DASHBOARD = [
+    ("orders", "/market/orders", {}, 5),
+    ("nifty-50", "/market/nifty-50", {"scale": "5m", "page": 1, "page_size": 10, "include_candles": "true"}, 15),
+    ("margins", "/market/margins", {}, 30),
+]
+PORTFOLIO = [
+    ("positions", "/market/positions", {}, 15),
+    ("holdings", "/market/holdings", {}, 15),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def _start_backend(port: int, snapshot: bool) -> Tuple[Any, threading.Thread]:
+    import uvicorn
+
+    from app.main import app
+    from app.controllers.market_data_controller import market_controller
+    from app.utils.loop_monitor import loop_monitor
+
+    # The app lifespan needs a database; run just the pieces the dashboard routes use.
+    for step in (market_controller._nse_universe_entries, market_controller._cached_instruments, market_controller._symbol_map):
+        step()
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+
+    async def serve() -> None:
+        loop_monitor.start()
+        tasks = []
+        if snapshot:
+            tasks.append(asyncio.create_task(market_controller.market_snapshot.run()))
+        try:
+            await server.serve()
+        finally:
+            for task in tasks:
+                task.cancel()
+            loop_monitor.stop()
+
+    thread = threading.Thread(target=lambda: asyncio.run(serve()), name="backend", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Backend failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+class SimulatedUser(threading.Thread):
+    def __init__(
+        self,
+        base_url: str,
+        jwt: str,
+        schedule: List[Tuple[str, str, Dict[str, Any], float]],
+        deadline: float,
+        results: Dict[str, List[Tuple[float, int]]],
+        lock: threading.Lock,
+    ) -> None:
+        super().__init__(daemon=True)
+        import requests
+
+        self.base_url = base_url
+        self.schedule = schedule
+        self.deadline = deadline
+        self.results = results
+        self.lock = lock
+        self.http = requests.Session()
+        self.http.headers["Authorization"] = f"Bearer {jwt}"
+
+    def run(self) -> None:
+        now = time.monotonic()
+        # Users open the dashboard at different moments; the first poll fires on load.
+        offset = random.uniform(0, min(interval for *_, interval in self.schedule))
+        due = {label: now + offset for label, *_ in self.schedule}
+        while True:
+            label, path, params, interval = min(self.schedule, key=lambda item: due[item[0]])
+            wait = due[label] - time.monotonic()
+            if due[label] >= self.deadline:
+                return
+            if wait > 0:
+                time.sleep(wait)
+            started = time.perf_counter()
+            try:
+                status = self.http.get(self.base_url + path, params=params, timeout=30).status_code
+            except Exception:
+                status = 0
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.results[label].append((elapsed, status))
+            due[label] += interval
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    route_latency = {}
+    if args.historical_latency_ms is not None:
+        route_latency["market.historical"] = (args.historical_latency_ms, args.jitter_ms)
+    fake = FakeKiteServer(
+        FakeKiteConfig(args.latency_ms, args.jitter_ms, route_latency, args.error_rate, symbols=args.symbols, seed=1)
+    ).start()
+
+    os.environ.update(
+        {
+            "ZERODHA_API_ROOT": fake.url,
+            "ZERODHA_API_KEY": "bench",
+            "ZERODHA_API_SECRET": "bench",
+            "ZERODHA_ACCESS_TOKEN": SERVICE_TOKEN,
+            "MARKET_STREAM_ENABLED": "false",
+            "SERVER_TIMING_ENABLED": "true",
+            "KITE_SESSION_POOL_SIZE": str(max(256, args.users * 2)),
+        }
+    )
+    from app.core.config import settings
+    from app.core.security import create_access_token
+    from app.controllers.market_data_controller import market_controller
+    from app.routes import market as market_routes
+
+    if not args.keep_rate_limit:
+        # Measure the backend, not the per-user API limiter.
+        market_routes.rate_limiter.limit = 10**9
+
+    port = _free_port()
+    server, thread = _start_backend(port, snapshot=not args.no_snapshot)
+    base_url = f"http://127.0.0.1:{port}{settings.API_V1_STR}"
+
+    users = [f"bench-user-{i}" for i in range(args.users)]
+    tokens = {}
+    for user_id in users:
+        tokens[f"token-{user_id}"] = user_id
+        market_controller.sessions.get(user_id).set_access_token(f"token-{user_id}")
+
+    if not args.no_snapshot:
+        # Let the first full-universe frame land so tables sort from the snapshot.
+        market_controller.market_snapshot.refresh()
+    fake.reset_stats()
+
+    schedule = [(label, path, params, interval / args.speed) for label, path, params, interval in DASHBOARD]
+    if args.portfolio:
+        schedule += [(label, path, params, interval / args.speed) for label, path, params, interval in PORTFOLIO]
+
+    results: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + args.duration
+    workers = [
+        SimulatedUser(base_url, create_access_token(user_id), schedule, deadline, results, lock)
+        for user_id in users
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - started
+
+    upstream = fake.stats()
+    server.should_exit = True
+    thread.join(timeout=10)
+    fake.stop()
+
+    routes = {}
+    for label, samples in sorted(results.items()):
+        latencies = [latency * 1000 for latency, _ in samples]
+        errors = sum(1 for _, status in samples if status >= 400 or status == 0)
+        routes[label] = {
+            "requests": len(samples),
+            "errors": errors,
+            "rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(_percentile(latencies, 50), 1),
+            "p99_ms": round(_percentile(latencies, 99), 1),
+        }
+
+    per_user: Dict[str, float] = defaultdict(float)
+    shared: Dict[str, int] = defaultdict(int)
+    for token, calls in upstream.items():
+        for route, count in calls.items():
+            if token in tokens:
+                per_user[route] += count / len(users)
+            else:
+                shared[route] += count
+
+    return {
+        "users": args.users,
+        "duration_seconds": round(elapsed, 1),
+        "speed": args.speed,
+        "snapshot": not args.no_snapshot,
+        "routes": routes,
+        "upstream_per_user": {route: round(count, 2) for route, count in sorted(per_user.items())},
+        "upstream_shared": dict(sorted(shared.items())),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(
+        f"\n{report['users']} users, {report['duration_seconds']}s, speed x{report['speed']}, "
+        f"snapshot {'on' if report['snapshot'] else 'off'}\n"
+    )
+    print(f"{'route':<12}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, row in report["routes"].items():
+        print(f"{label:<12}{row['requests']:>10}{row['errors']:>8}{row['rps']:>9}{row['p50_ms']:>10}{row['p99_ms']:>10}")
+    print("\nUpstream Kite calls per user")
+    for route, count in report["upstream_per_user"].items():
+        print(f"  {route:<22}{count:>8}")
+    print("Upstream Kite calls on the shared session")
+    for route, count in report["upstream_shared"].items():
+        print(f"  {route:<22}{count:>8}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay dashboard polling against a fake Kite API.")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60, help="Seconds of load.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Poll this many times faster than the dashboard.")
+    parser.add_argument("--portfolio", action="store_true", help="Also poll positions and holdings every 15s.")
+    parser.add_argument("--latency-ms", type=float, default=30, help="Mean fake Kite latency.")
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--historical-latency-ms", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake Kite calls that fail.")
+    parser.add_argument("--symbols", type=int, default=0, help="Synthetic symbols added to the universe.")
+    parser.add_argument("--no-snapshot", action="store_true", help="Disable the background quote snapshot.")
+    parser.add_argument("--keep-rate-limit", action="store_true", help="Leave the per-user API limiter in place.")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file.")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+Local stand-in for the Kite Connect REST API, for load tests and benchmarks.
+
+Serves the routes the backend uses (instruments, quote, historical, positions,
+holdings, orders, margins) with synthetic data, injects configurable latency and
+errors per route, and counts calls per access token so a benchmark can report
+upstream calls per simulated user.
+
+Run standalone with ``python -m bench.fake_kite --port 8765`` and point the
+backend at it with ``ZERODHA_API_ROOT=http://127.0.0.1:8765``.
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+UNIVERSE_CSV = Path(__file__).resolve().parents[1] / "app" / "data" / "nse_universe.csv"
+
+# (method, path pattern, Kite route name) in the order they are matched.
+ROUTES: List[Tuple[str, "re.Pattern[str]", str]] = [
+    ("GET", re.compile(r"^/instruments/historical/(?P<token>\d+)/(?P<interval>\w+)$"), "market.historical"),
+    ("GET", re.compile(r"^/instruments(/(?P<exchange>\w+))?$"), "market.instruments"),
+    ("GET", re.compile(r"^/quote$"), "market.quote"),
+    ("GET", re.compile(r"^/quote/ltp$"), "market.quote.ltp"),
+    ("GET", re.compile(r"^/portfolio/positions$"), "portfolio.positions"),
+    ("GET", re.compile(r"^/portfolio/holdings$"), "portfolio.holdings"),
+    ("GET", re.compile(r"^/user/margins$"), "user.margins"),
+    ("POST", re.compile(r"^/margins/orders$"), "order.margins"),
+    ("GET", re.compile(r"^/orders$"), "orders"),
+    ("GET", re.compile(r"^/orders/(?P<order_id>[\w-]+)$"), "order.info"),
+    ("POST", re.compile(r"^/orders/(?P<variety>\w+)$"), "order.place"),
+    ("POST", re.compile(r"^/session/token$"), "api.token"),
+]
+
+INTERVAL_MINUTES = {"minute": 1, "5minute": 5, "15minute": 15, "30minute": 30, "60minute": 60, "day": 375}
+# Longest from/to span Kite accepts per historical call.
+MAX_HISTORY_DAYS = {"minute": 60, "3minute": 100, "5minute": 100, "10minute": 100, "15minute": 200, "30minute": 200, "60minute": 400, "day": 2000}
+
+
+class FakeKiteConfig:
+    """
+    Latency is ``mean_ms`` plus uniform jitter of ``jitter_ms`` either way, with
+    per-route overrides keyed by Kite route name (e.g. ``market.historical``).
+    ``error_rate`` of calls fail with ``error_status`` and a Kite error body.
+    """
+
+    def __init__(
+        self,
+        mean_ms: float = 30,
+        jitter_ms: float = 10,
+        route_latency: Optional[Dict[str, Tuple[float, float]]] = None,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        symbols: int = 0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+        self.route_latency = route_latency or {}
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.symbols = symbols
+        self.seed = seed
+
+    def latency(self, route: str) -> float:
+        mean, jitter = self.route_latency.get(route, (self.mean_ms, self.jitter_ms))
+        return max(0.0, mean + random.uniform(-jitter, jitter)) / 1000
+
+
+class FakeMarket:
+    """Synthetic instruments with a slow random walk for quotes."""
+
+    def __init__(self, extra_symbols: int = 0, seed: Optional[int] = None) -> None:
+        rng = random.Random(seed)
+        rows: List[Tuple[str, str]] = []
+        if UNIVERSE_CSV.exists():
+            with UNIVERSE_CSV.open(encoding="utf-8") as handle:
+                rows = [(row["symbol"].strip(), row["underlying"].strip()) for row in csv.DictReader(handle)]
+        rows += [(f"SYN{i:04d}", f"Synthetic {i}") for i in range(extra_symbols)]
+        self.instruments = []
+        for index, (symbol, name) in enumerate(rows):
+            self.instruments.append(
+                {
+                    "instrument_token": 100000 + index,
+                    "tradingsymbol": symbol,
+                    "name": name,
+                    "close": round(rng.uniform(50, 5000), 2),
+                }
+            )
+        self.by_symbol = {inst["tradingsymbol"]: inst for inst in self.instruments}
+        self.by_token = {inst["instrument_token"]: inst for inst in self.instruments}
+        self._started = time.time()
+
+    def price(self, inst: Dict[str, Any]) -> float:
+        # Deterministic per instrument and second, so concurrent callers agree.
+        rng = random.Random(inst["instrument_token"] * 100003 + int(time.time()))
+        return round(inst["close"] * (1 + rng.uniform(-0.03, 0.03)), 2)
+
+    def instruments_csv(self) -> str:
+        out = io.StringIO()
+        fields = [
+            "instrument_token", "exchange_token", "tradingsymbol", "name", "last_price", "expiry",
+            "strike", "tick_size", "lot_size", "instrument_type", "segment", "exchange",
+        ]
+        writer = csv.DictWriter(out, fieldnames=fields)
+        writer.writeheader()
+        for inst in self.instruments:
+            writer.writerow(
+                {
+                    "instrument_token": inst["instrument_token"],
+                    "exchange_token": inst["instrument_token"] // 256,
+                    "tradingsymbol": inst["tradingsymbol"],
+                    "name": inst["name"],
+                    "last_price": 0,
+                    "expiry": "",
+                    "strike": 0,
+                    "tick_size": 0.05,
+                    "lot_size": 1,
+                    "instrument_type": "EQ",
+                    "segment": "NSE",
+                    "exchange": "NSE",
+                }
+            )
+        return out.getvalue()
+
+    def quote(self, keys: List[str]) -> Dict[str, Any]:
+        result = {}
+        for key in keys:
+            inst = self.by_symbol.get(key.split(":", 1)[-1])
+            if not inst:
+                continue
+            price = self.price(inst)
+            close = inst["close"]
+            result[key] = {
+                "instrument_token": inst["instrument_token"],
+                "last_price": price,
+                "volume": int(inst["instrument_token"] % 997 * 1000 + int(time.time()) % 1000),
+                "net_change": round(price - close, 2),
+                "ohlc": {"open": close, "high": max(price, close) * 1.01, "low": min(price, close) * 0.99, "close": close},
+                "depth": {
+                    "buy": [{"price": price - 0.05 * (i + 1), "quantity": 100, "orders": 1} for i in range(5)],
+                    "sell": [{"price": price + 0.05 * (i + 1), "quantity": 100, "orders": 1} for i in range(5)],
+                },
+            }
+        return result
+
+    def historical(self, token: int, interval: str, start: datetime, end: datetime) -> List[list]:
+        inst = self.by_token.get(token)
+        if not inst:
+            return []
+        step = timedelta(minutes=INTERVAL_MINUTES.get(interval, 5))
+        if interval == "day":
+            step = timedelta(days=1)
+        count = min(int((end - start) / step) + 1, 2000)
+        rng = random.Random(token)
+        price = inst["close"]
+        candles = []
+        for i in range(count):
+            ts = start + step * i
+            change = rng.gauss(0, 0.004)
+            high = price * (1 + abs(rng.gauss(0, 0.002)))
+            low = price * (1 - abs(rng.gauss(0, 0.002)))
+            close = price * (1 + change)
+            candles.append([ts.strftime("%Y-%m-%dT%H:%M:%S+0530"), price, max(high, close), min(low, close), close, rng.randint(1000, 50000)])
+            price = close
+        return candles
+
+
+class FakeKiteServer:
+    def __init__(self, config: Optional[FakeKiteConfig] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.config = config or FakeKiteConfig()
+        self.market = FakeMarket(self.config.symbols, self.config.seed)
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._orders: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self._order_seq = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeKiteServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-kite", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.errors.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Calls per access token and Kite route."""
+        with self._lock:
+            per_token: Dict[str, Dict[str, int]] = {}
+            for (token, route), count in self.calls.items():
+                per_token.setdefault(token, {})[route] = count
+            return per_token
+
+    def _record(self, token: str, route: str, failed: bool) -> None:
+        with self._lock:
+            self.calls[(token, route)] += 1
+            if failed:
+                self.errors[(token, route)] += 1
+
+    def _dispatch(self, route: str, params: Dict[str, Any], query: Dict[str, List[str]], token: str) -> Any:
+        market = self.market
+        if route == "market.instruments":
+            return market.instruments_csv()
+        if route in {"market.quote", "market.quote.ltp"}:
+            return market.quote(query.get("i", []))
+        if route == "market.historical":
+            start = datetime.fromisoformat(query.get("from", [""])[0] or (datetime.now() - timedelta(days=5)).isoformat())
+            end = datetime.fromisoformat(query.get("to", [""])[0] or datetime.now().isoformat())
+            limit = MAX_HISTORY_DAYS.get(params["interval"], 60)
+            if end - start > timedelta(days=limit):
+                raise ValueError(f"interval exceeds max limit: {limit} days")
+            return {"candles": market.historical(int(params["token"]), params["interval"], start, end)}
+        if route == "portfolio.positions":
+            net = []
+            for inst in market.instruments[:5]:
+                price = market.price(inst)
+                net.append(
+                    {
+                        "tradingsymbol": inst["tradingsymbol"],
+                        "instrument_token": inst["instrument_token"],
+                        "exchange": "NSE",
+                        "product": "CNC",
+                        "quantity": 10,
+                        "average_price": inst["close"],
+                        "last_price": price,
+                        "close_price": inst["close"],
+                        "multiplier": 1,
+                        "pnl": round((price - inst["close"]) * 10, 2),
+                    }
+                )
+            return {"net": net, "day": net}
+        if route == "portfolio.holdings":
+            return [
+                {
+                    "tradingsymbol": inst["tradingsymbol"],
+                    "instrument_token": inst["instrument_token"],
+                    "exchange": "NSE",
+                    "quantity": 25,
+                    "average_price": inst["close"] * 0.9,
+                    "last_price": market.price(inst),
+                    "close_price": inst["close"],
+                }
+                for inst in market.instruments[5:25]
+            ]
+        if route == "user.margins":
+            return {
+                "equity": {"enabled": True, "net": 500000.0, "available": {"cash": 500000.0, "live_balance": 500000.0}},
+                "commodity": {"enabled": False, "net": 0, "available": {"cash": 0}},
+            }
+        if route == "order.margins":
+            return [{"tradingsymbol": leg.get("tradingsymbol"), "total": 1000.0, "charges": {"total": 20.0}} for leg in params.get("body") or []]
+        if route == "orders":
+            with self._lock:
+                return [history[-1] for history in self._orders.get(token, {}).values()]
+        if route == "order.info":
+            with self._lock:
+                history = (self._orders.get(token) or {}).get(params["order_id"])
+            if not history:
+                raise LookupError("Order not found")
+            return history
+        if route == "order.place":
+            with self._lock:
+                self._order_seq += 1
+                order_id = f"{int(time.time())}{self._order_seq:06d}"
+                order = {
+                    "order_id": order_id,
+                    "status": "COMPLETE",
+                    "tradingsymbol": (params.get("body") or {}).get("tradingsymbol"),
+                    "filled_quantity": int((params.get("body") or {}).get("quantity") or 0),
+                    "order_timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                }
+                self._orders.setdefault(token, {})[order_id] = [order]
+            return {"order_id": order_id}
+        if route == "api.token":
+            return {"access_token": f"fake-{random.getrandbits(32):08x}", "user_id": "FAKE01"}
+        raise LookupError(route)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *_args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _error(self, status: int, error_type: str, message: str) -> None:
+                body = json.dumps({"status": "error", "error_type": error_type, "message": message}).encode()
+                self._send(status, body, "application/json")
+
+            def _handle(self, method: str) -> None:
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                auth = self.headers.get("Authorization") or ""
+                token = auth.split(":", 1)[1] if ":" in auth else "anonymous"
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+
+                for route_method, pattern, route in ROUTES:
+                    match = pattern.match(parsed.path)
+                    if route_method == method and match:
+                        break
+                else:
+                    self._error(404, "GeneralException", f"Route not found: {method} {parsed.path}")
+                    return
+
+                params: Dict[str, Any] = dict(match.groupdict())
+                if raw:
+                    content_type = self.headers.get("Content-Type") or ""
+                    if "json" in content_type:
+                        params["body"] = json.loads(raw)
+                    else:
+                        params["body"] = {k: v[0] for k, v in parse_qs(raw.decode()).items()}
+
+                time.sleep(server.config.latency(route))
+                if random.random() < server.config.error_rate:
+                    server._record(token, route, failed=True)
+                    self._error(server.config.error_status, "NetworkException", "Injected upstream failure")
+                    return
+                try:
+                    data = server._dispatch(route, params, query, token)
+                except LookupError as exc:
+                    server._record(token, route, failed=True)
+                    self._error(404, "InputException", str(exc))
+                    return
+                except ValueError as exc:
+                    server._record(token, route, failed=True)
+                    self._error(400, "InputException", str(exc))
+                    return
+                server._record(token, route, failed=False)
+                if isinstance(data, str):
+                    self._send(200, data.encode(), "text/csv")
+                else:
+                    self._send(200, json.dumps({"status": "success", "data": data}).encode(), "application/json")
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local fake Kite Connect API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--symbols", type=int, default=0, help="Synthetic symbols added to nse_universe.csv.")
+    args = parser.parse_args()
+    config = FakeKiteConfig(args.latency_ms, args.jitter_ms, error_rate=args.error_rate, symbols=args.symbols)
+    server = FakeKiteServer(config, args.host, args.port).start()
+    print(f"Fake Kite API listening on {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark tick consumers by replaying a tick journal at full speed.
+
+Replays a journaled day (or a window of it) through a ``MarketStream`` wired to
+the same tick listeners the backend uses (per-user P&L engines) and reports
+ticks/s and per-batch ingestion latency. With ``--record-simulated`` it first
+records a journal from the simulated market, so it also runs offline.
+
+    cd Trading-backend
+    python -m bench.replay_ticks --record-simulated 30 --symbols 2000
+    python -m bench.replay_ticks --day 2026-10-19 --start 09:15 --end 09:20 --users 100
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.market_stream import MarketStream  # noqa: E402
+from app.services.pnl_engine import POSITION, PnLEngine  # noqa: E402
+from app.services.simulated_market import SimulatedMarket, SimulatedTicker  # noqa: E402
+from app.services.tick_journal import IST, TickJournal, TickReplayer  # noqa: E402
+
+
+def _record_simulated(journal: TickJournal, seconds: float, symbols: int, ticks_per_second: float) -> None:
+    market = SimulatedMarket({f"SIM{i:05d}": f"Simulated {i}" for i in range(symbols)}, ticks_per_second, seed=1)
+    stream = MarketStream()
+    stream.journal = journal
+    stream.subscribe(market.tokens.tolist())
+    stream.start("", "", lambda: SimulatedTicker(market, 0.05))
+    time.sleep(seconds)
+    stream.stop()
+    journal.close()
+
+
+def _at(day: str, clock: Optional[str]) -> Optional[float]:
+    if not clock:
+        return None
+    return datetime.fromisoformat(f"{day}T{clock}").replace(tzinfo=IST).timestamp()
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] if ordered else 0.0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay a tick journal through the tick listeners.")
+    parser.add_argument("--journal", default=None, help="Journal directory (default: TICK_JOURNAL_DIR).")
+    parser.add_argument("--day", help="Journal day, YYYY-MM-DD (default: latest).")
+    parser.add_argument("--start", help="IST clock time to seek to, e.g. 09:15.")
+    parser.add_argument("--end", help="IST clock time to stop at.")
+    parser.add_argument("--speed", type=float, default=None, help="Replay speed; omit for max.")
+    parser.add_argument("--users", type=int, default=50, help="P&L engines listening, one per simulated user.")
+    parser.add_argument("--positions", type=int, default=20, help="Positions per user.")
+    parser.add_argument("--record-simulated", type=float, default=0, help="First record this many seconds of simulated ticks.")
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--ticks-per-second", type=float, default=20000)
+    args = parser.parse_args(argv)
+
+    if args.journal:
+        directory = Path(args.journal)
+    elif args.record_simulated:
+        directory = Path(tempfile.mkdtemp(prefix="tick-journal-"))
+    else:
+        from app.controllers.market_data_controller import market_controller
+
+        directory = market_controller.tick_journal.directory
+    journal = TickJournal(directory)
+    if args.record_simulated:
+        print(f"Recording {args.record_simulated}s of simulated ticks into {directory}")
+        _record_simulated(journal, args.record_simulated, args.symbols, args.ticks_per_second)
+
+    days = journal.days()
+    if not days:
+        raise SystemExit(f"No journal in {directory}")
+    day = args.day or days[-1]
+
+    tokens = sorted({tick["instrument_token"] for _, ticks in journal.read(day) for tick in ticks[:50]})
+    stream = MarketStream()
+    for user in range(args.users):
+        engine = PnLEngine()
+        held = tokens[user % max(len(tokens), 1):][: args.positions] or tokens[: args.positions]
+        engine.rebuild(POSITION, [{"instrument_token": token, "quantity": 10, "average_price": 100.0} for token in held])
+        stream.add_tick_listener(engine.on_ticks)
+
+    latencies: List[float] = []
+
+    def sink(ticks):
+        started = time.perf_counter()
+        stream.ingest_ticks(ticks)
+        latencies.append(time.perf_counter() - started)
+
+    replayer = TickReplayer(journal, sink)
+    state = replayer.run(day, _at(day, args.start), _at(day, args.end), args.speed)
+    elapsed = state["elapsed_seconds"] or 1e-9
+    print(f"\n{day}: {state['batches']} batches, {state['ticks']} ticks in {elapsed:.2f}s, {args.users} P&L engines")
+    print(f"  replay rate     {state['ticks'] / elapsed:,.0f} ticks/s (including journal decoding)")
+    print(f"  listener rate   {state['ticks'] / (sum(latencies) or 1e-9):,.0f} ticks/s")
+    print(f"  batch p50       {_percentile(latencies, 50) * 1000:.3f} ms")
+    print(f"  batch p99       {_percentile(latencies, 99) * 1000:.3f} ms")
+    if state["error"]:
+        print(f"  error           {state['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.utils import black_scholes
+
+
+def test_norm_cdf_matches_erf():
+    x = np.linspace(-5, 5, 41)
+    expected = np.array([0.5 * (1 + math.erf(v / math.sqrt(2))) for v in x])
+
+    assert np.allclose(black_scholes.norm_cdf(x), expected, atol=1e-7)
+
+
+def test_price_matches_reference_and_put_call_parity():
+    # Hull's textbook example: S=42, K=40, r=10%, sigma=20%, six months.
+    call = black_scholes.price(42.0, 40.0, 0.5, 0.1, 0.2, True)
+    put = black_scholes.price(42.0, 40.0, 0.5, 0.1, 0.2, False)
+
+    assert call == pytest.approx(4.76, abs=0.01)
+    assert put == pytest.approx(0.81, abs=0.01)
+    assert call - put == pytest.approx(42.0 - 40.0 * math.exp(-0.1 * 0.5))
+
+
+def test_greeks_match_finite_differences():
+    spot, strike, t, rate, sigma = 24000.0, 24200.0, 20 / 365, 0.065, 0.14
+    greeks = black_scholes.greeks(spot, strike, t, rate, sigma, True)
+    bump = 1e-3
+
+    def premium(**changes):
+        args = {"spot": spot, "t": t, "sigma": sigma, **changes}
+        return black_scholes.price(args["spot"], strike, args["t"], rate, args["sigma"], True)
+
+    delta = (premium(spot=spot + bump) - premium(spot=spot - bump)) / (2 * bump)
+    vega = (premium(sigma=sigma + bump) - premium(sigma=sigma - bump)) / (2 * bump) / 100
+    theta = (premium(t=t - 1 / 365) - premium())
+
+    assert greeks["price"] == pytest.approx(premium())
+    assert greeks["delta"] == pytest.approx(delta, rel=1e-4)
+    assert greeks["vega"] == pytest.approx(vega, rel=1e-4)
+    assert greeks["theta"] == pytest.approx(theta, rel=0.05)
+
+
+def test_implied_volatility_recovers_sigma():
+    spot = 24000.0
+    strikes = np.array([20000.0, 23000.0, 24000.0, 25000.0, 28000.0])
+    t = 30 / 365
+    sigma = np.array([0.25, 0.18, 0.14, 0.13, 0.2])
+    is_call = strikes >= spot
+    premiums = black_scholes.price(spot, strikes, t, 0.065, sigma, is_call)
+
+    solved = black_scholes.implied_volatility(premiums, spot, strikes, t, 0.065, is_call)
+
+    assert np.allclose(solved, sigma, atol=1e-4)
+
+
+def test_implied_volatility_warm_start_converges_to_same_answer():
+    premiums = black_scholes.price(24000.0, 24500.0, 7 / 365, 0.065, 0.16, True)
+
+    cold = black_scholes.implied_volatility(premiums, 24000.0, 24500.0, 7 / 365, 0.065, True)
+    warm = black_scholes.implied_volatility(premiums, 24000.0, 24500.0, 7 / 365, 0.065, True, initial=0.5)
+
+    assert cold == pytest.approx(0.16, abs=1e-4)
+    assert warm == pytest.approx(cold, abs=1e-5)
+
+
+def test_implied_volatility_rejects_arbitrage_premiums():
+    # Below intrinsic value, above the spot, and already expired. Callers run the
+    # solver under errstate, since the expired row divides by zero.
+    with np.errstate(all="ignore"):
+        solved = black_scholes.implied_volatility(
+            [500.0, 25000.0, 100.0], 24000.0, [23000.0, 24000.0, 24000.0], [0.1, 0.1, 0.0], 0.065, True
+        )
+
+    assert np.isnan(solved).all()
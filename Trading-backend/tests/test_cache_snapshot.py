@@ -0,0 +1,39 @@
+import gzip
+import json
+from datetime import date, datetime
+
+from app.utils.cache_snapshot import SNAPSHOT_VERSION, load_snapshot, save_snapshot
+
+
+def test_round_trip_keeps_dates(tmp_path):
+    path = tmp_path / "caches.json.gz"
+    caches = {
+        "instruments": {
+            "NSE": {"data": [{"expiry": date(2026, 10, 27), "last": datetime(2026, 10, 19, 15, 30)}], "ts": 1.0},
+        },
+    }
+
+    save_snapshot(path, caches)
+
+    assert load_snapshot(path) == caches
+    assert not path.with_suffix(".gz.tmp").exists()
+
+
+def test_malformed_caches_are_dropped(tmp_path):
+    path = tmp_path / "caches.json.gz"
+    save_snapshot(path, {"good": {"k": {"data": 1, "ts": 1.0}}, "bad": {"k": {"data": 1}}})
+
+    assert load_snapshot(path) == {"good": {"k": {"data": 1, "ts": 1.0}}}
+
+
+def test_unreadable_or_outdated_snapshots_are_ignored(tmp_path):
+    missing = tmp_path / "missing.json.gz"
+    corrupt = tmp_path / "corrupt.json.gz"
+    corrupt.write_bytes(b"not gzip")
+    outdated = tmp_path / "outdated.json.gz"
+    with gzip.open(outdated, "wt", encoding="utf-8") as handle:
+        json.dump({"version": SNAPSHOT_VERSION - 1, "caches": {}}, handle)
+
+    assert load_snapshot(missing) is None
+    assert load_snapshot(corrupt) is None
+    assert load_snapshot(outdated) is None
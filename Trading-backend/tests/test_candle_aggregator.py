@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+
+from app.services import candle_aggregator
+from app.services.candle_aggregator import IST, CandleAggregator, bar_to_candle
+
+TOKEN = 256265
+
+
+def _ist(*args) -> float:
+    return datetime(*args, tzinfo=IST).timestamp()
+
+
+def _tick(when: datetime, price: float, volume: int):
+    # Kite's ticker sends naive IST exchange timestamps.
+    return {"instrument_token": TOKEN, "last_price": price, "volume_traded": volume, "exchange_timestamp": when}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"ts": _ist(2026, 10, 19, 10, 0)}
+    monkeypatch.setattr(candle_aggregator.time, "time", lambda: now["ts"])
+    return now
+
+
+def test_minute_bars_complete_when_a_later_bar_ticks(clock):
+    aggregator = CandleAggregator(intervals=("minute",))
+    aggregator.on_ticks([_tick(datetime(2026, 10, 19, 9, 59, 1), 100, 1000)])
+    aggregator.on_ticks([_tick(datetime(2026, 10, 19, 9, 59, 30), 102, 1200), _tick(datetime(2026, 10, 19, 9, 59, 40), 99, 1300)])
+    aggregator.on_ticks([_tick(datetime(2026, 10, 19, 10, 0, 2), 101, 1350)])
+
+    completed, forming = aggregator.candles(TOKEN, "minute")
+
+    assert completed == [(_ist(2026, 10, 19, 9, 59), 100, 102, 99, 99, 300)]
+    assert forming == (_ist(2026, 10, 19, 10, 0), 101, 101, 101, 101, 50)
+
+
+def test_ticks_outside_the_session_are_ignored(clock):
+    aggregator = CandleAggregator(intervals=("minute",))
+    aggregator.on_ticks([_tick(datetime(2026, 10, 19, 8, 0), 100, 10), _tick(datetime(2026, 10, 19, 16, 0), 100, 10)])
+
+    assert aggregator.candles(TOKEN, "minute") == ([], None)
+
+
+def test_seeded_day_candle_stays_open_for_live_ticks(clock):
+    aggregator = CandleAggregator(intervals=("day",))
+    aggregator.seed(
+        TOKEN,
+        "day",
+        [
+            {"date": datetime(2026, 10, 16, tzinfo=IST), "open": 95, "high": 99, "low": 94, "close": 98, "volume": 800},
+            {"date": datetime(2026, 10, 19, tzinfo=IST), "open": 100, "high": 105, "low": 99, "close": 104, "volume": 1000},
+        ],
+    )
+    aggregator.on_ticks([_tick(datetime(2026, 10, 19, 10, 0, 5), 106, 1500)])
+    aggregator.on_ticks([_tick(datetime(2026, 10, 19, 10, 0, 10), 98, 1600)])
+
+    completed, forming = aggregator.candles(TOKEN, "day")
+
+    assert [bar_to_candle(bar)["date"] for bar in completed] == ["2026-10-16T00:00:00+05:30"]
+    # One bar for the session, stamped like Kite's, carrying the seeded OHLC and volume.
+    assert bar_to_candle(forming) == {
+        "date": "2026-10-19T00:00:00+05:30",
+        "open": 100.0,
+        "high": 106.0,
+        "low": 98.0,
+        "close": 98.0,
+        "volume": 1100,
+    }
+
+
+def test_day_bar_completes_at_the_close(clock):
+    aggregator = CandleAggregator(intervals=("day",))
+    aggregator.on_ticks([_tick(datetime(2026, 10, 19, 15, 29), 100, 1000)])
+    clock["ts"] = _ist(2026, 10, 19, 15, 31)
+
+    completed, forming = aggregator.candles(TOKEN, "day")
+
+    assert forming is None
+    assert [bar[0] for bar in completed] == [_ist(2026, 10, 19)]
+
+
+def test_simulated_feed_builds_bars_outside_market_hours(clock):
+    clock["ts"] = _ist(2026, 10, 19, 21, 0, 30)
+    aggregator = CandleAggregator(intervals=("minute", "day"), session_hours=False)
+    aggregator.on_ticks([_tick(datetime(2026, 10, 19, 20, 59, 10), 100, 10), _tick(datetime(2026, 10, 19, 21, 0, 5), 101, 15)])
+
+    completed, forming = aggregator.candles(TOKEN, "minute")
+    assert [bar[0] for bar in completed] == [_ist(2026, 10, 19, 20, 59)]
+    assert forming[0] == _ist(2026, 10, 19, 21, 0)
+    # Day bars stay open past 15:30 when there is no session.
+    assert aggregator.candles(TOKEN, "day")[1][0] == _ist(2026, 10, 19)
@@ -0,0 +1,61 @@
+import asyncio
+
+from app.core import database
+from app.core.database import LazySession
+
+
+class _FakeSession:
+    def __init__(self):
+        self.closed = False
+
+    def query(self, model):
+        return model
+
+    def close(self):
+        self.closed = True
+
+
+def test_lazy_session_opens_on_first_use():
+    opened = []
+    db = LazySession(lambda: opened.append(_FakeSession()) or opened[-1])
+
+    assert not db.has_session and opened == []
+    assert db.query("users") == "users"
+    db.query("orders")
+    assert db.has_session and len(opened) == 1
+
+
+def test_get_db_only_closes_sessions_it_opened(monkeypatch):
+    opened = []
+    monkeypatch.setattr(database, "SessionLocal", lambda: opened.append(_FakeSession()) or opened[-1])
+
+    untouched = database.get_db()
+    next(untouched)
+    untouched.close()
+    assert opened == []
+
+    used = database.get_db()
+    next(used).query("users")
+    used.close()
+    assert opened[0].closed
+
+
+def test_get_async_db_closes_the_async_session(monkeypatch):
+    class _FakeAsyncSession:
+        closed = False
+
+        async def close(self):
+            self.closed = True
+
+    session = _FakeAsyncSession()
+    monkeypatch.setattr(database, "_async_session", lambda: session)
+
+    async def request():
+        dependency = database.get_async_db()
+        db = await dependency.__anext__()
+        assert not db.has_session
+        assert db.closed is False  # first attribute access opens the session
+        await dependency.aclose()
+
+    asyncio.run(request())
+    assert session.closed
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from app.utils.downsample import lttb, ohlc_buckets
+
+
+def _candles(closes):
+    start = datetime(2026, 10, 19, 9, 15)
+    return [
+        {
+            "date": start + timedelta(minutes=i),
+            "open": close - 1,
+            "high": close + 2,
+            "low": close - 2,
+            "close": close,
+            "volume": 10,
+        }
+        for i, close in enumerate(closes)
+    ]
+
+
+def test_short_series_are_returned_unchanged():
+    candles = _candles([100.0, 101.0])
+
+    assert ohlc_buckets(candles, 5) is candles
+    assert lttb(candles, 5) is candles
+
+
+def test_ohlc_buckets_preserve_range_and_volume():
+    candles = _candles([float(100 + i) for i in range(10)])
+
+    buckets = ohlc_buckets(candles, 3)
+
+    assert len(buckets) == 3
+    assert buckets[0]["date"] == candles[0]["date"]
+    assert buckets[0]["open"] == candles[0]["open"]
+    assert buckets[-1]["close"] == candles[-1]["close"]
+    assert max(b["high"] for b in buckets) == max(c["high"] for c in candles)
+    assert min(b["low"] for b in buckets) == min(c["low"] for c in candles)
+    assert sum(b["volume"] for b in buckets) == 100
+
+
+def test_ohlc_bucket_boundaries_do_not_overlap():
+    candles = _candles([float(i) for i in range(7)])
+
+    buckets = ohlc_buckets(candles, 3)
+
+    # Bucket i closes on the candle just before bucket i + 1 opens.
+    for left, right in zip(buckets, buckets[1:]):
+        assert right["open"] - left["close"] == 0
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    closes = [100.0] * 50
+    closes[23] = 180.0
+    closes[37] = 20.0
+    candles = _candles(closes)
+
+    sampled = lttb(candles, 8)
+
+    assert len(sampled) == 8
+    assert sampled[0] is candles[0]
+    assert sampled[-1] is candles[-1]
+    assert candles[23] in sampled
+    assert candles[37] in sampled
+    dates = [c["date"] for c in sampled]
+    assert dates == sorted(dates)
@@ -0,0 +1,43 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.controllers.market_data_controller import market_controller
+from app.core.readiness import ReadinessState
+from app.routes import health
+
+
+def test_readyz_turns_ready_after_warmup(monkeypatch):
+    state = ReadinessState()
+    monkeypatch.setattr(health, "readiness", state)
+    app = FastAPI()
+    app.include_router(health.router)
+    client = TestClient(app)
+
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert client.get("/readyz").status_code == 503
+
+    state.record("instruments", "ok")
+    state.mark_ready()
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json()["steps"] == {"instruments": "ok"}
+
+
+def test_warmup_reports_each_step_without_raising(monkeypatch):
+    def missing_token():
+        raise HTTPException(status_code=403, detail="token missing")
+
+    def broken():
+        raise RuntimeError("nse down")
+
+    monkeypatch.setattr(market_controller, "_nse_universe_entries", lambda: [])
+    monkeypatch.setattr(market_controller.index_refresher, "ensure_loaded", lambda keys: broken())
+    monkeypatch.setattr(market_controller, "_cached_instruments", missing_token)
+    monkeypatch.setattr(market_controller, "_symbol_map", lambda: {})
+
+    assert market_controller.warmup() == {
+        "nse_universe": "ok",
+        "index_constituents": "failed: nse down",
+        "instruments": "skipped: token missing",
+        "symbol_index": "ok",
+    }
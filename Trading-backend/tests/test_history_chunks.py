@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.controllers.market_data_controller import market_controller
+from app.utils.rate_limiter import TokenBucket
+
+
+class _FakeKite:
+    def __init__(self):
+        self.windows = []
+
+    def historical_data(self, instrument_token, from_date, to_date, interval, continuous=False, oi=False):
+        self.windows.append((from_date, to_date))
+        # Day bars are stamped at midnight, so a window starting mid-day also gets
+        # the bar the previous window already returned.
+        day = from_date.replace(hour=0, minute=0, second=0)
+        candles = []
+        while day <= to_date:
+            candles.append({"date": day, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1})
+            day += timedelta(days=1)
+        return candles
+
+
+@pytest.fixture(autouse=True)
+def fast_rate(monkeypatch):
+    monkeypatch.setattr(market_controller, "_historical_rate", TokenBucket(rate=1000, capacity=1000, name="test"))
+
+
+def test_windows_tile_the_range_without_overlap():
+    start, end = datetime(2020, 1, 1), datetime(2026, 1, 1)
+
+    windows = market_controller._history_windows(start, end, "day")
+
+    assert windows[0][0] == start and windows[-1][1] == end
+    assert all(b[0] - a[1] == timedelta(seconds=1) for a, b in zip(windows, windows[1:]))
+    assert all(w[1] - w[0] < timedelta(days=2000) for w in windows)
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_chunks_are_date_ordered_without_duplicates(prefetch):
+    kite = _FakeKite()
+    windows = market_controller._history_windows(datetime(2020, 1, 1, 12), datetime(2026, 1, 1), "day")
+
+    chunks = list(market_controller._history_chunks(kite, 1, "day", windows, prefetch=prefetch))
+
+    dates = [candle["date"] for chunk in chunks for candle in chunk]
+    assert len(chunks) == len(windows) == len(kite.windows)
+    assert dates == sorted(set(dates))
@@ -0,0 +1,52 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pyarrow.parquet as pq
+
+from app.services.history_export import TERMINAL_STATES, HistoryExporter
+
+IST = timezone(timedelta(hours=5, minutes=30))
+START = datetime(2026, 10, 1, tzinfo=IST)
+
+
+def _fetch(token, interval, start, end):
+    if token == 3:
+        raise ValueError("no data")
+    days = [start + timedelta(days=n) for n in range(token * 2)]
+    # Two chunks per instrument, as the windowed fetcher yields them.
+    for chunk in (days[:token], days[token:]):
+        yield [{"date": day, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": token} for day in chunk]
+
+
+def _wait(job):
+    deadline = time.time() + 10
+    while job.state not in TERMINAL_STATES and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_export_writes_one_row_group_per_instrument(tmp_path):
+    exporter = HistoryExporter(_fetch, tmp_path, concurrency=2)
+    job = exporter.submit("u1", [(1, "INFY"), (2, "TCS"), (3, "BAD")], "day", START, START + timedelta(days=10))
+    _wait(job)
+    exporter.shutdown()
+
+    assert job.state == "done"
+    assert job.completed == 2 and job.rows == 6
+    assert job.failures == {"BAD": "no data"}
+    parquet = pq.ParquetFile(job.path)
+    assert parquet.metadata.num_row_groups == 2
+    table = parquet.read().to_pydict()
+    assert sorted(set(table["symbol"])) == ["INFY", "TCS"]
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_cancelled_queued_job_never_runs(tmp_path):
+    exporter = HistoryExporter(_fetch, tmp_path)
+    exporter._runner.submit(time.sleep, 0.2)
+    job = exporter.submit("u1", [(1, "INFY")], "day", START, START + timedelta(days=10))
+
+    exporter.cancel(job)
+    exporter._runner.shutdown(wait=True)
+
+    assert job.state == "cancelled"
+    assert job.path is None and not list(tmp_path.iterdir())
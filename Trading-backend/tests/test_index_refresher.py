@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from app.services import index_refresher
+from app.services.index_refresher import IndexConstituentsRefresher
+
+
+class _Response:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def nse(monkeypatch):
+    replies = []
+    monkeypatch.setattr(index_refresher.requests, "get", lambda url, **kwargs: replies.pop(0))
+    return replies
+
+
+def _refresher(cache):
+    return IndexConstituentsRefresher(cache, indices={"NIFTY50": "NIFTY 50"}, ttl_seconds=3600, base_backoff_seconds=30)
+
+
+def test_successful_fetch_drops_the_index_row(nse):
+    nse.append(_Response(200, {"data": [{"symbol": "NIFTY 50"}, {"symbol": "INFY"}, {"symbol": "TCS"}]}))
+    cache = {}
+    refresher = _refresher(cache)
+
+    assert refresher.fetch("NIFTY50")
+    assert refresher.get("NIFTY50") == ["INFY", "TCS"]
+    assert 3200 < refresher.freshness()["NIFTY50"]["next_refresh_in_seconds"] <= 3960
+
+
+def test_failures_keep_last_good_list_and_back_off(nse):
+    cache = {"NIFTY50": {"data": ["INFY"], "ts": time.time()}}
+    refresher = _refresher(cache)
+
+    delays = []
+    for _ in range(3):
+        nse.append(_Response(503))
+        assert not refresher.fetch("NIFTY50")
+        delays.append(refresher.freshness()["NIFTY50"]["next_refresh_in_seconds"])
+
+    assert refresher.get("NIFTY50") == ["INFY"]
+    assert refresher.freshness()["NIFTY50"]["consecutive_failures"] == 3
+    assert 15 <= delays[0] <= 30 and 60 <= delays[2] <= 120
+
+
+def test_restored_entries_are_not_refetched_early(nse):
+    cache = {"NIFTY50": {"data": ["INFY"], "ts": time.time() - 60}}
+    refresher = _refresher(cache)
+
+    refresher.refresh_due()
+
+    assert refresher.freshness()["NIFTY50"]["consecutive_failures"] == 0
+    assert 3000 < refresher.freshness()["NIFTY50"]["next_refresh_in_seconds"] <= 3540
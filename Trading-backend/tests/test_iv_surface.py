@@ -0,0 +1,90 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from app.services.iv_surface import IVSurfaceEngine, fit_smiles
+from app.services.option_chain import IST, ExpiryChain, years_to_expiry
+from app.utils import black_scholes
+
+NOW = datetime(2026, 10, 20, 10, 0, tzinfo=IST)
+EXPIRIES = (date(2026, 10, 27), date(2026, 11, 24))
+RATE = 0.065
+
+
+def _chains():
+    chains = []
+    token = 1
+    for expiry in EXPIRIES:
+        rows = []
+        for strike in range(22000, 26001, 250):
+            for kind in ("CE", "PE"):
+                rows.append((token, f"NIFTY{expiry:%y%b}{strike}{kind}".upper(), "NIFTY", expiry, float(strike), kind, 75))
+                token += 1
+        chains.append(ExpiryChain("NIFTY", expiry, rows))
+    return chains
+
+
+def _quotes(chains, spot, sigma):
+    quotes = {}
+    for chain in chains:
+        t = years_to_expiry(chain.expiry, NOW)
+        for strike, ce, pe in zip(chain.strikes.tolist(), chain.ce_symbols, chain.pe_symbols):
+            for symbol, is_call in ((ce, True), (pe, False)):
+                premium = float(black_scholes.price(spot, strike, t, RATE, sigma, is_call))
+                quotes[f"NFO:{symbol}"] = {"last_price": premium}
+    return quotes
+
+
+def test_fit_smiles_recovers_quadratic_per_expiry():
+    k = np.tile(np.linspace(-0.1, 0.1, 9), 2)
+    expiry = np.repeat([0, 1], 9)
+    variance = np.where(expiry == 0, 0.002 - 0.01 * k + 0.05 * k * k, 0.004 + 0.02 * k * k)
+
+    coefficients = fit_smiles(expiry, k, variance, np.ones_like(k), 3)
+
+    assert np.allclose(coefficients[0], [0.002, -0.01, 0.05])
+    assert np.allclose(coefficients[1], [0.004, 0.0, 0.02], atol=1e-12)
+    assert np.isnan(coefficients[2]).all()
+
+
+def test_flat_volatility_gives_flat_surface():
+    engine = IVSurfaceEngine(RATE)
+    chains = _chains()
+    options = engine.options(chains, 24000.0, NOW)
+
+    surface = engine.build("NIFTY", options, 24000.0, _quotes(chains, 24000.0, 0.15))
+
+    for row in surface["term_structure"]:
+        assert row["atm_iv"] == pytest.approx(15.0, abs=0.1)
+        assert abs(row["skew"]) < 0.1
+    assert surface["recomputed"] == len(options.tokens)
+
+
+def test_only_changed_premiums_are_resolved():
+    engine = IVSurfaceEngine(RATE)
+    chains = _chains()
+    options = engine.options(chains, 24000.0, NOW)
+    quotes = _quotes(chains, 24000.0, 0.15)
+    engine.build("NIFTY", options, 24000.0, quotes)
+
+    unchanged = engine.build("NIFTY", options, 24000.0, quotes)
+    assert unchanged["recomputed"] == 0
+    assert unchanged["reused"] == len(options.tokens)
+
+    key = options.quote_keys()[5]
+    quotes[key] = {"last_price": quotes[key]["last_price"] + 1}
+    partial = engine.build("NIFTY", options, 24000.0, quotes)
+    assert partial["recomputed"] == 1
+
+
+def test_spot_move_resolves_everything():
+    engine = IVSurfaceEngine(RATE, spot_tolerance=0.0005)
+    chains = _chains()
+    options = engine.options(chains, 24000.0, NOW)
+    quotes = _quotes(chains, 24000.0, 0.15)
+    engine.build("NIFTY", options, 24000.0, quotes)
+
+    moved = engine.build("NIFTY", options, 24100.0, quotes)
+
+    assert moved["recomputed"] == len(options.tokens)
@@ -0,0 +1,61 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.kite_sessions import KiteSessionPool
+from app.services.simulated_market import SimulatedKite, SimulatedMarket
+
+
+@pytest.fixture
+def market():
+    return SimulatedMarket({f"SYM{i}": f"Symbol {i}" for i in range(10)}, seed=3)
+
+
+def _pool(market, tokens=None, **kwargs):
+    tokens = tokens if tokens is not None else {}
+    return KiteSessionPool(
+        "key",
+        lambda user_id: (tokens.get(user_id, f"token-{user_id}"), False),
+        client_factory=lambda user_id: SimulatedKite(market, user_id),
+        **kwargs,
+    )
+
+
+def test_users_get_isolated_sessions(market):
+    pool = _pool(market)
+    alice, bob = pool.get("alice"), pool.get("bob")
+
+    alice.require_kite().place_order("regular", tradingsymbol="SYM0", transaction_type="BUY", quantity=1)
+
+    assert pool.get("alice") is alice
+    assert [p["tradingsymbol"] for p in alice.get_positions()] == ["SYM0"]
+    assert bob.get_positions() == []
+
+
+def test_fills_invalidate_cached_positions(market):
+    session = _pool(market).get("alice")
+    assert session.get_positions() == []
+
+    order_id = session.require_kite().place_order("regular", tradingsymbol="SYM1", transaction_type="BUY", quantity=1)
+    session.fetch_order_status(order_id)
+
+    assert [p["tradingsymbol"] for p in session.get_positions()] == ["SYM1"]
+
+
+def test_missing_token_is_forbidden(market):
+    session = _pool(market, tokens={"alice": None}).get("alice")
+
+    with pytest.raises(HTTPException) as error:
+        session.require_kite()
+    assert error.value.status_code == 403
+    assert session.get_positions() == []
+
+
+def test_pool_evicts_least_recently_used(market):
+    pool = _pool(market, max_sessions=2)
+    first = pool.get("a")
+    pool.get("b")
+    pool.get("a")
+    pool.get("c")
+
+    assert {session.user_id for session in pool.active()} == {"a", "c"}
+    assert pool.get("a") is first
@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+from app.utils.loop_monitor import LoopLagMonitor
+
+
+def test_blocking_call_is_captured_with_its_stack():
+    monitor = LoopLagMonitor(interval=0.02, threshold=0.1)
+
+    def slow_handler():
+        time.sleep(0.4)
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        slow_handler()
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+    asyncio.run(main())
+
+    [stall] = monitor.recent_stalls()
+    assert stall["route"] == "background"
+    assert stall["blocked_ms"] >= 100
+    assert any("slow_handler" in line for line in stall["stack"])
+
+
+def test_stall_is_attributed_to_the_request_scope():
+    monitor = LoopLagMonitor(interval=0.02, threshold=0.1)
+
+    async def endpoint(scope):
+        time.sleep(0.3)
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await endpoint({"type": "http", "method": "GET", "path": "/api/v1/market/quote"})
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+    asyncio.run(main())
+
+    assert [stall["route"] for stall in monitor.recent_stalls()] == ["GET /api/v1/market/quote"]
@@ -0,0 +1,36 @@
+import time
+
+from app.services import market_movers
+from app.services.market_movers import MarketMovers
+
+
+def _movers(reference, loader):
+    return MarketMovers(reference, loader, lambda: {}, lambda: 0.5, lambda fn, *args: fn(*args))
+
+
+def test_reference_stats_cached_for_the_trading_day(monkeypatch):
+    calls = []
+
+    def loader(symbol):
+        calls.append(symbol)
+        return {"high_52w": 120.0, "low_52w": 80.0, "avg_volume": 1000.0}
+
+    now = 1_792_400_000.0  # 2026-10-19 14:23 IST
+    monkeypatch.setattr(market_movers.time, "time", lambda: now)
+    reference = {}
+    movers = _movers(reference, loader)
+
+    movers._refresh_reference(["INFY"])
+    now += 6 * 3600
+    assert not movers._reference_stale("INFY")
+
+    now += 18 * 3600
+    assert movers._reference_stale("INFY")
+    assert calls == ["INFY"]
+
+
+def test_reference_entries_without_a_day_are_refetched():
+    reference = {"INFY": {"high_52w": 120.0, "ts": time.time()}}
+    movers = _movers(reference, lambda symbol: None)
+
+    assert movers._reference_stale("INFY")
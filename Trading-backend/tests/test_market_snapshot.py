@@ -0,0 +1,58 @@
+from app.services.market_snapshot import MarketSnapshot, SnapshotFrame
+
+NAMES = {"INFY": "Infosys", "TCS": "Tata Consultancy", "WIPRO": "Wipro", "ITC": "ITC"}
+
+
+def _quote(price, close, volume):
+    return {"last_price": price, "ohlc": {"close": close, "open": close}, "volume": volume}
+
+
+def _frame():
+    quotes = {
+        "INFY": _quote(1500.0, 1450.0, 300),
+        "TCS": _quote(4000.0, 4100.0, 100),
+        "WIPRO": _quote(500.0, 500.0, 200),
+    }
+    return SnapshotFrame(NAMES, quotes, fetched_at=0)
+
+
+def test_sort_orders_a_subset_by_the_global_order():
+    frame = _frame()
+
+    assert frame.sort(["WIPRO", "TCS", "INFY"], "price") == ["WIPRO", "INFY", "TCS"]
+    assert frame.sort(["WIPRO", "TCS", "INFY"], "price", descending=True) == ["TCS", "INFY", "WIPRO"]
+    assert frame.sort(["TCS", "INFY"], "change_pct", descending=True) == ["INFY", "TCS"]
+    assert frame.sort(["WIPRO", "ITC", "TCS"], "name") == ["ITC", "TCS", "WIPRO"]
+
+
+def test_missing_quotes_and_unknown_symbols_sort_last():
+    frame = _frame()
+
+    assert frame.sort(["ITC", "NEW", "INFY", "TCS"], "volume") == ["TCS", "INFY", "ITC", "NEW"]
+    assert frame.sort(["ITC", "NEW", "INFY", "TCS"], "volume", descending=True) == ["INFY", "TCS", "ITC", "NEW"]
+
+
+def test_refresh_batches_quotes_and_keeps_frame_on_empty_reply(monkeypatch):
+    from app.services import market_snapshot
+
+    monkeypatch.setattr(market_snapshot, "QUOTE_BATCH_SIZE", 3)
+    batches = []
+    replies = [True]
+
+    def quote_loader(keys):
+        batches.append(keys)
+        if not replies[0]:
+            return {}
+        return {key: _quote(100.0, 99.0, 1) for key in keys}
+
+    frames = []
+    snapshot = MarketSnapshot(lambda: NAMES, quote_loader)
+    snapshot.add_listener(frames.append)
+
+    first = snapshot.refresh()
+    assert [len(batch) for batch in batches] == [3, 1]
+    assert len(first) == 4 and snapshot.current() is first
+
+    replies[0] = False
+    assert snapshot.refresh() is first
+    assert frames == [first]
@@ -0,0 +1,47 @@
+import pytest
+
+from app.utils.metrics import Counter, Gauge, Histogram, registry
+
+
+def test_counter_renders_labelled_series():
+    counter = Counter("test_requests_total", "Requests.", ("route",))
+    counter.inc(route="/a")
+    counter.inc(2, route='/b"x')
+
+    lines = counter.render()
+
+    assert lines[:2] == ["# HELP test_requests_total Requests.", "# TYPE test_requests_total counter"]
+    assert 'test_requests_total{route="/a"} 1.0' in lines
+    assert 'test_requests_total{route="/b\\"x"} 2.0' in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+
+    lines = histogram.render()
+
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{le="1.0"} 3' in lines
+    assert 'test_latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "test_latency_seconds_count 4" in lines
+    assert "test_latency_seconds_sum 6.05" in lines
+
+
+def test_gauge_reads_collector_at_scrape_time():
+    values = {("idle",): 3}
+    Gauge("test_pool_connections", "Connections.", ("state",), collect=lambda: values)
+    values[("busy",)] = 1
+
+    rendered = registry.render()
+
+    assert 'test_pool_connections{state="idle"} 3.0' in rendered
+    assert 'test_pool_connections{state="busy"} 1.0' in rendered
+
+
+def test_duplicate_names_are_rejected():
+    Counter("test_duplicate_total", "First.")
+
+    with pytest.raises(ValueError):
+        Counter("test_duplicate_total", "Second.")
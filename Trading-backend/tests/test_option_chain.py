@@ -0,0 +1,75 @@
+from datetime import date, datetime
+
+import numpy as np
+
+from app.services.option_chain import IST, OptionIndex, build_chain, option_premium, years_to_expiry
+from app.utils import black_scholes
+
+EXPIRY = date(2026, 10, 27)
+NOW = datetime(2026, 10, 20, 10, 0, tzinfo=IST)
+
+
+def _rows():
+    rows = []
+    token = 1
+    for strike in (23800, 23900, 24000, 24100, 24200):
+        for kind in ("CE", "PE"):
+            if strike == 24200 and kind == "PE":
+                continue
+            rows.append((token, f"NIFTY26OCT{strike}{kind}", "NIFTY", EXPIRY, float(strike), kind, 75))
+            token += 1
+    rows.append((99, "NIFTY26OCTFUT", "NIFTY", EXPIRY, 0.0, "FUT", 75))
+    return rows
+
+
+def _quotes(spot, sigma, rate):
+    t = years_to_expiry(EXPIRY, NOW)
+    quotes = {}
+    for _, symbol, _, _, strike, kind, _ in _rows():
+        if kind == "FUT":
+            continue
+        mid = float(black_scholes.price(spot, strike, t, rate, sigma, kind == "CE"))
+        quotes[f"NFO:{symbol}"] = {
+            "last_price": mid,
+            "depth": {"buy": [{"price": mid - 0.5}], "sell": [{"price": mid + 0.5}]},
+        }
+    return quotes
+
+
+def test_index_groups_options_by_expiry_and_strike():
+    index = OptionIndex(_rows())
+    chain = index.chains["NIFTY"][EXPIRY]
+
+    assert index.underlyings() == ["NIFTY"]
+    assert index.expiries("NIFTY", today=NOW.date()) == [EXPIRY]
+    assert index.expiries("NIFTY", today=date(2026, 10, 28)) == []
+    assert chain.strikes.tolist() == [23800, 23900, 24000, 24100, 24200]
+    assert chain.pe_tokens[-1] == -1
+    assert len(chain.quote_keys()) == 9
+
+
+def test_option_premium_prefers_mid():
+    assert option_premium({"last_price": 10, "depth": {"buy": [{"price": 9}], "sell": [{"price": 12}]}})[0] == 10.5
+    assert option_premium({"last_price": 10, "depth": {"buy": [{"price": 0}], "sell": [{"price": 12}]}})[0] == 10
+    assert np.isnan(option_premium(None)[0])
+
+
+def test_build_chain_recovers_iv_around_the_money():
+    chain = OptionIndex(_rows()).chains["NIFTY"][EXPIRY]
+
+    result = build_chain(chain, 24030.0, _quotes(24030.0, 0.15, 0.065), 0.065, strike_count=3, now=NOW)
+
+    assert [row["strike"] for row in result["strikes"]] == [23900.0, 24000.0, 24100.0]
+    for row in result["strikes"]:
+        assert abs(row["call"]["iv"] - 15.0) < 0.01
+        assert abs(row["put"]["iv"] - 15.0) < 0.01
+        assert row["call"]["delta"] > 0 > row["put"]["delta"]
+
+
+def test_build_chain_leaves_missing_sides_empty():
+    chain = OptionIndex(_rows()).chains["NIFTY"][EXPIRY]
+
+    result = build_chain(chain, 24030.0, _quotes(24030.0, 0.15, 0.065), 0.065, now=NOW)
+
+    assert result["strikes"][-1]["put"] is None
+    assert result["strikes"][-1]["call"]["tradingsymbol"] == "NIFTY26OCT24200CE"
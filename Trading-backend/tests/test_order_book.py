@@ -0,0 +1,82 @@
+from app.services.order_book import OrderBook
+
+
+def _order(status="OPEN", filled=0, ts="2026-10-19 10:00:00", **fields):
+    return {
+        "order_id": "1",
+        "status": status,
+        "filled_quantity": filled,
+        "exchange_update_timestamp": ts,
+        **fields,
+    }
+
+
+def test_apply_merges_updates_and_bumps_version():
+    book = OrderBook()
+    assert book.apply(_order())
+    assert book.apply(_order(filled=5, ts="2026-10-19 10:00:01"), pushed=True)
+
+    order = book.get("1")
+    assert order["filled_quantity"] == 5
+    assert order["version"] == 2
+    assert "pushed_at" in order
+
+
+def test_terminal_orders_ignore_late_updates():
+    book = OrderBook()
+    book.apply(_order(status="COMPLETE", filled=10))
+
+    assert not book.apply(_order(status="OPEN", filled=10, ts="2026-10-19 10:00:05"))
+    assert book.get("1")["status"] == "COMPLETE"
+
+
+def test_out_of_order_updates_are_rejected():
+    book = OrderBook()
+    book.apply(_order(filled=5, ts="2026-10-19 10:00:05"))
+
+    assert not book.apply(_order(status="TRIGGER PENDING", ts="2026-10-19 10:00:01"))
+    assert not book.apply(_order(filled=2, ts="2026-10-19 10:00:06"))
+    assert book.version == 1
+
+
+def test_identical_updates_do_not_bump_version():
+    book = OrderBook()
+    book.apply(_order())
+
+    assert not book.apply(_order())
+    assert book.version == 1
+
+
+def test_seed_does_not_overwrite_streamed_order():
+    book = OrderBook()
+    book.apply(_order(status="OPEN", filled=3))
+
+    assert not book.seed(_order(status="PUT ORDER REQ RECEIVED"))
+    assert book.get("1")["filled_quantity"] == 3
+
+
+def test_changes_since_returns_each_order_once_in_version_order():
+    book = OrderBook()
+    book.apply(_order(order_id="1"))
+    book.apply(_order(order_id="2"))
+    since = book.version
+    book.apply(_order(order_id="1", filled=1, ts="2026-10-19 10:00:01"))
+    book.apply(_order(order_id="3"))
+    book.apply(_order(order_id="1", filled=2, ts="2026-10-19 10:00:02"))
+
+    changed = book.changes_since(since)
+
+    assert [order["order_id"] for order in changed] == ["3", "1"]
+    assert changed[-1]["filled_quantity"] == 2
+    assert book.changes_since(book.version) == []
+
+
+def test_cursor_carries_the_book_epoch():
+    book = OrderBook()
+    book.apply(_order())
+    epoch, version = book.cursor.split(".")
+
+    assert epoch == book.epoch
+    assert int(version) == book.version == 1
+    # A new book restarts versions, so its epoch must differ.
+    assert OrderBook().epoch != book.epoch
@@ -0,0 +1,87 @@
+import pytest
+from fastapi import HTTPException
+
+from app.controllers.market_data_controller import market_controller
+from app.services.kite_sessions import KiteSessionPool
+from app.services.simulated_market import SimulatedKite, SimulatedMarket
+
+SYMBOLS = {f"SYM{i}": f"Symbol {i}" for i in range(10)}
+
+
+@pytest.fixture
+def market(monkeypatch):
+    market = SimulatedMarket(SYMBOLS, seed=11, starting_cash=100_000)
+    pool = KiteSessionPool(
+        "key",
+        lambda user_id: (f"token-{user_id}", False),
+        client_factory=lambda user_id: SimulatedKite(market, user_id),
+    )
+    monkeypatch.setattr(market_controller, "sessions", pool)
+    monkeypatch.setattr(market_controller, "_symbol_map", lambda: {symbol: {} for symbol in SYMBOLS})
+    monkeypatch.setattr(market_controller, "_is_market_open", lambda: True)
+    return market
+
+
+def _order(symbol="SYM0", quantity=1, **fields):
+    return {"tradingsymbol": symbol, "quantity": quantity, "transaction_type": "BUY", **fields}
+
+
+def test_place_order_checks_margin_and_seeds_the_order_book(market):
+    result = market_controller.place_order("alice", _order())
+
+    assert result["required_margin"] == pytest.approx(market.last_price("SYM0"), rel=0.01)
+    assert set(result["timings_ms"]) == {"validate", "pretrade", "submit", "total"}
+    order = market_controller.order_book_for("alice").get(result["order_id"])
+    assert order["tradingsymbol"] == "SYM0"
+
+
+def test_place_order_rejects_orders_beyond_available_funds(market):
+    quantity = int(200_000 / market.last_price("SYM0")) + 1
+
+    with pytest.raises(HTTPException) as error:
+        market_controller.place_order("alice", _order(quantity=quantity))
+
+    assert error.value.status_code == 400
+    assert market.account("alice").orders == {}
+
+
+def test_invalid_orders_are_rejected_before_any_call(market):
+    for order in (_order(symbol="NOPE"), _order(quantity=0), _order(transaction_type="HOLD")):
+        with pytest.raises(HTTPException) as error:
+            market_controller.place_order("alice", order)
+        assert error.value.status_code == 400
+
+
+def test_basket_validation_reports_every_bad_leg(market):
+    with pytest.raises(HTTPException) as error:
+        market_controller.prepare_basket("alice", [_order(), _order(symbol="NOPE"), _order(quantity=-1)])
+
+    assert [item["index"] for item in error.value.detail["errors"]] == [1, 2]
+
+
+def test_basket_is_margined_once_and_streams_each_leg(market):
+    legs = [_order(symbol=f"SYM{i}") for i in range(4)]
+
+    basket = market_controller.prepare_basket("alice", legs)
+    results = list(market_controller.submit_basket(basket))
+
+    assert basket["required_margin"] == pytest.approx(sum(market.last_price(f"SYM{i}") for i in range(4)), rel=0.01)
+    assert results[0] == {
+        "type": "summary",
+        "legs": 4,
+        "required_margin": basket["required_margin"],
+        "available": basket["available"],
+    }
+    placed = sorted(results[1:], key=lambda leg: leg["index"])
+    assert [leg["status"] for leg in placed] == ["placed"] * 4
+    book = market_controller.order_book_for("alice")
+    assert all(book.get(leg["order_id"]) for leg in placed)
+
+
+def test_basket_beyond_available_funds_places_nothing(market):
+    quantity = int(60_000 / market.last_price("SYM0")) + 1
+
+    with pytest.raises(HTTPException):
+        market_controller.prepare_basket("alice", [_order(quantity=quantity), _order(quantity=quantity)])
+
+    assert market.account("alice").orders == {}
@@ -0,0 +1,73 @@
+import pytest
+
+from app.services.pnl_engine import HOLDING, POSITION, PnLEngine
+
+
+def _position(**fields):
+    return {
+        "instrument_token": 1,
+        "quantity": 2,
+        "average_price": 100.0,
+        "last_price": 100.0,
+        "close_price": 100.0,
+        "multiplier": 1,
+        **fields,
+    }
+
+
+def test_position_columns_follow_ticks():
+    engine = PnLEngine()
+    engine.rebuild(POSITION, [_position(day_buy_value=200.0)])
+
+    engine.on_ticks([{"instrument_token": 1, "last_price": 105.0}])
+
+    [row] = engine.rows(POSITION)
+    assert row["ltp"] == 105.0
+    assert row["pnl"] == pytest.approx(10.0)
+    assert row["day_pnl"] == pytest.approx(10.0)
+
+
+def test_multiplier_applies_to_total_and_day():
+    # e.g. a currency future quoted per unit but settled per 1000 units
+    engine = PnLEngine()
+    engine.rebuild(POSITION, [_position(multiplier=1000, day_buy_value=200_000.0)])
+
+    engine.on_ticks([{"instrument_token": 1, "last_price": 100.5}])
+
+    [row] = engine.rows(POSITION)
+    assert row["pnl"] == pytest.approx(1000.0)
+    assert row["day_pnl"] == pytest.approx(1000.0)
+
+
+def test_holding_day_pnl_is_against_previous_close():
+    engine = PnLEngine()
+    engine.rebuild(HOLDING, [{"instrument_token": 2, "quantity": 10, "average_price": 50.0, "close_price": 60.0}])
+
+    engine.on_ticks([{"instrument_token": 2, "last_price": 62.0}])
+
+    [row] = engine.rows(HOLDING)
+    assert row["pnl"] == pytest.approx(120.0)
+    assert row["day_pnl"] == pytest.approx(20.0)
+
+
+def test_aggregates_split_positions_and_holdings():
+    engine = PnLEngine()
+    engine.rebuild(POSITION, [_position(day_buy_value=200.0)])
+    engine.rebuild(HOLDING, [{"instrument_token": 2, "quantity": 10, "average_price": 50.0, "close_price": 60.0}])
+
+    engine.on_ticks([{"instrument_token": 1, "last_price": 101.0}, {"instrument_token": 2, "last_price": 61.0}])
+
+    summary = engine.aggregates()
+    assert summary["positions"]["total"] == pytest.approx(2.0)
+    assert summary["holdings"]["total"] == pytest.approx(110.0)
+    assert summary["total"]["day"] == pytest.approx(2.0 + 10.0)
+
+
+def test_rebuild_keeps_streamed_prices():
+    engine = PnLEngine()
+    engine.rebuild(POSITION, [_position()])
+    engine.on_ticks([{"instrument_token": 1, "last_price": 103.0}])
+
+    engine.rebuild(POSITION, [_position(last_price=101.0)])
+
+    assert engine.rows(POSITION)[0]["ltp"] == 103.0
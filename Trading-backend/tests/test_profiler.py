@@ -0,0 +1,40 @@
+import contextvars
+import threading
+
+from app.utils.profiler import SamplingProfiler
+
+
+def _in_worker(fn):
+    # Starlette runs sync endpoints in a worker thread with a copy of the request context.
+    result = {}
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=lambda: result.update(value=context.run(fn), ident=threading.get_ident()))
+    thread.start()
+    thread.join()
+    return result["value"], result["ident"]
+
+
+def test_concurrent_requests_keep_separate_entries():
+    profiler = SamplingProfiler()
+    with profiler.track("GET /a"):
+        with profiler.track("GET /b"):
+            assert sorted(entry[0] for entry in profiler._active.values()) == ["GET /a", "GET /b"]
+        assert [entry[0] for entry in profiler._active.values()] == ["GET /a"]
+    assert profiler._active == {}
+
+
+def test_only_the_thread_serving_the_request_is_sampled():
+    profiler = SamplingProfiler()
+    with profiler.track("GET /slow"):
+        assert profiler._targets() == {threading.get_ident(): {"GET /slow"}}
+        targets, worker = _in_worker(profiler.bind(profiler._targets))
+        assert targets == {worker: {"GET /slow"}}
+        # Back on the loop thread once the endpoint returns.
+        assert profiler._targets() == {threading.get_ident(): {"GET /slow"}}
+
+
+def test_bound_endpoint_outside_a_tracked_request_is_untouched():
+    profiler = SamplingProfiler()
+    value, _ = _in_worker(profiler.bind(lambda: 42))
+    assert value == 42
+    assert profiler._targets() == {}
@@ -0,0 +1,45 @@
+import threading
+import time
+
+from app.utils.rate_limiter import TokenBucket
+
+
+def test_reserve_waits_for_a_full_bucket():
+    bucket = TokenBucket(rate=20, capacity=3, name="test")
+    bucket.acquire()
+
+    started = time.monotonic()
+    bucket.acquire(reserve=2)
+
+    # Two tokens were left; the low-priority caller waited for the third to refill.
+    assert time.monotonic() - started >= 0.04
+
+
+def test_reserve_leaves_tokens_for_normal_callers():
+    bucket = TokenBucket(rate=1, capacity=3, name="test")
+    bucket.acquire(reserve=2)
+
+    started = time.monotonic()
+    bucket.acquire()
+    bucket.acquire()
+
+    assert time.monotonic() - started < 0.1
+
+
+def test_low_priority_caller_yields_while_bucket_is_busy():
+    bucket = TokenBucket(rate=50, capacity=3, name="test")
+    taken = []
+
+    def background():
+        bucket.acquire(reserve=2)
+        taken.append("background")
+
+    for _ in range(3):
+        bucket.acquire()
+    worker = threading.Thread(target=background)
+    worker.start()
+    bucket.acquire()
+    taken.append("user")
+    worker.join()
+
+    assert taken == ["user", "background"]
@@ -0,0 +1,46 @@
+import asyncio
+import contextvars
+
+from app.utils import server_timing
+
+
+def test_spans_outside_a_request_are_ignored():
+    def outside():
+        with server_timing.span("db"):
+            pass
+        return server_timing._spans.get()
+
+    assert contextvars.Context().run(outside) is None
+
+
+def test_repeated_spans_are_summed_into_the_header():
+    def request():
+        spans = server_timing.start()
+        for _ in range(2):
+            with server_timing.span("kite"):
+                pass
+        with server_timing.span("db"):
+            pass
+        return spans
+
+    spans = contextvars.Context().run(request)
+
+    assert spans["kite"][1] == 2 and spans["db"][1] == 1
+    header = server_timing.header(spans, 12.34)
+    assert header.startswith("kite;dur=")
+    assert 'desc="2 calls"' in header
+    assert header.endswith("total;dur=12.3")
+
+
+def test_spans_from_worker_threads_land_on_the_request():
+    async def request():
+        spans = server_timing.start()
+
+        def work():
+            with server_timing.span("quotes"):
+                pass
+
+        await asyncio.to_thread(work)
+        return spans
+
+    assert asyncio.run(request())["quotes"][1] == 1
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+from kiteconnect.exceptions import InputException, OrderException
+
+from app.services.simulated_market import IST, TICK_SIZE, SimulatedMarket
+
+UNIVERSE = {f"SYM{i}": f"Symbol {i}" for i in range(20)}
+
+
+@pytest.fixture
+def market():
+    return SimulatedMarket(UNIVERSE, seed=7)
+
+
+def test_prices_stay_on_the_tick_grid(market):
+    market.advance()
+
+    ticks = market.price / TICK_SIZE
+    assert (market.price > 0).all()
+    assert abs(ticks - ticks.round()).max() < 1e-6
+
+
+def test_history_is_deterministic_and_ends_at_live_price(market):
+    token = int(market.tokens[3])
+    end = datetime.now(IST)
+    start = end - timedelta(days=10)
+
+    first = market.historical(token, start, end, "day")
+    again = market.historical(token, start, end, "day")
+
+    assert first == again
+    assert first[-1]["close"] == pytest.approx(market.last_price("SYM3"), abs=TICK_SIZE)
+    assert all(bar["low"] <= min(bar["open"], bar["close"]) for bar in first)
+    assert all(bar["high"] >= max(bar["open"], bar["close"]) for bar in first)
+    assert all(bar["date"].weekday() < 5 for bar in first)
+
+
+def test_market_buy_fills_and_updates_cash(market):
+    account = market.account("u1")
+    orders = []
+    market.add_order_listener(orders.append)
+    price = market.last_price("SYM0")
+
+    account.place_order({"tradingsymbol": "SYM0", "transaction_type": "BUY", "quantity": 2})
+
+    assert [order["status"] for order in orders] == ["OPEN", "COMPLETE"]
+    assert account.cash == pytest.approx(market.starting_cash - 2 * price)
+    [position] = account.net_positions()
+    assert position["quantity"] == 2
+    assert position["day_buy_value"] == pytest.approx(2 * price)
+
+
+def test_orders_are_validated(market):
+    account = market.account("u1")
+
+    with pytest.raises(InputException):
+        account.place_order({"tradingsymbol": "NOPE", "transaction_type": "BUY", "quantity": 1})
+    with pytest.raises(InputException):
+        account.place_order({"tradingsymbol": "SYM0", "transaction_type": "BUY", "quantity": 0})
+    with pytest.raises(OrderException):
+        account.place_order({"tradingsymbol": "SYM0", "transaction_type": "BUY", "quantity": 10**9})
+
+
+def test_resting_limit_order_fills_once_marketable(market):
+    account = market.account("u1")
+    price = market.last_price("SYM1")
+    order_id = account.place_order(
+        {"tradingsymbol": "SYM1", "transaction_type": "BUY", "quantity": 1, "order_type": "LIMIT", "price": price / 2}
+    )
+    assert account.orders[order_id][-1]["status"] == "OPEN"
+
+    # Market trades down through the limit.
+    market._latent[market.index["SYM1"]] = price / 4
+    account.match_open_orders()
+
+    assert account.orders[order_id][-1]["status"] == "COMPLETE"
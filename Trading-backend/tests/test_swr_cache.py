@@ -0,0 +1,138 @@
+import pytest
+
+from app.utils import swr_cache
+from app.utils.swr_cache import SWRCache, swr_cached
+
+
+class _DeferredExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append((fn, args))
+
+    def run(self):
+        for fn, args in self.submitted:
+            fn(*args)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(swr_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    deferred = _DeferredExecutor()
+    monkeypatch.setattr(swr_cache, "background_executor", deferred)
+    return deferred
+
+
+def _loader(values):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return values[len(calls) - 1]
+
+    return load, calls
+
+
+def test_fresh_entries_skip_the_loader(clock, executor):
+    cache = SWRCache(soft_ttl=10, hard_ttl=60)
+    load, calls = _loader(["a", "b"])
+
+    assert cache.get("k", load) == "a"
+    clock[0] += 5
+    assert cache.get("k", load) == "a"
+    assert len(calls) == 1
+
+
+def test_stale_entries_are_served_while_refreshing(clock, executor):
+    cache = SWRCache(soft_ttl=10, hard_ttl=60)
+    load, calls = _loader(["a", "b"])
+    cache.get("k", load)
+
+    clock[0] += 30
+    assert cache.get("k", load) == "a"
+    assert cache.get("k", load) == "a"
+    assert len(executor.submitted) == 1
+
+    executor.run()
+    assert cache.get("k", load) == "b"
+    assert len(calls) == 2
+
+
+def test_expired_entries_load_synchronously(clock, executor):
+    cache = SWRCache(soft_ttl=10, hard_ttl=60)
+    load, calls = _loader(["a", "b"])
+    cache.get("k", load)
+
+    clock[0] += 61
+    assert cache.get("k", load) == "b"
+    assert executor.submitted == []
+
+
+def test_failures_are_cached_for_negative_ttl(clock, executor):
+    cache = SWRCache(soft_ttl=10, hard_ttl=60, negative_ttl=5)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise RuntimeError("upstream down")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            cache.get("k", failing)
+    assert len(calls) == 1
+
+    clock[0] += 6
+    with pytest.raises(RuntimeError):
+        cache.get("k", failing)
+    assert len(calls) == 2
+
+
+def test_failed_refresh_keeps_serving_last_good_value(clock, executor):
+    cache = SWRCache(soft_ttl=10, hard_ttl=60, negative_ttl=30)
+    cache.get("k", lambda: "a")
+
+    def failing():
+        raise RuntimeError("upstream down")
+
+    clock[0] += 20
+    assert cache.get("k", failing) == "a"
+    executor.run()
+    assert cache.get("k", failing) == "a"
+    assert len(executor.submitted) == 1
+
+
+def test_get_many_loads_only_missing_keys(clock, executor):
+    cache = SWRCache(soft_ttl=10, hard_ttl=60)
+    cache.set("a", 1)
+    requested = []
+
+    def load(keys):
+        requested.append(list(keys))
+        return {key: key.upper() for key in keys}
+
+    assert cache.get_many(["a", "b", "c"], load) == {"a": 1, "b": "B", "c": "C"}
+    assert requested == [["b", "c"]]
+
+
+def test_swr_cached_keys_by_arguments(clock, executor):
+    class Fetcher:
+        def __init__(self):
+            self.cache = SWRCache(soft_ttl=10, hard_ttl=60)
+            self.calls = 0
+
+        @swr_cached("cache", key=lambda symbol: symbol)
+        def quote(self, symbol):
+            self.calls += 1
+            return f"{symbol}:{self.calls}"
+
+    fetcher = Fetcher()
+    assert fetcher.quote("INFY") == "INFY:1"
+    assert fetcher.quote("INFY") == "INFY:1"
+    assert fetcher.quote("TCS") == "TCS:2"
@@ -0,0 +1,94 @@
+import time
+from datetime import datetime
+
+from app.services.tick_journal import CHUNK_HEADER, TickJournal, TickReplayer, journal_day
+
+
+def _batch(token: int, price: float):
+    return [{"instrument_token": token, "last_price": price, "exchange_timestamp": datetime(2026, 10, 19, 10, 0, 5)}]
+
+
+def test_batches_round_trip_with_timestamps(tmp_path):
+    journal = TickJournal(tmp_path, chunk_ticks=2)
+    for price in (100.0, 101.0, 102.0):
+        journal.record(_batch(1, price))
+    journal.close()
+
+    day = journal_day(time.time())
+    batches = list(journal.read(day))
+
+    assert [ticks[0]["last_price"] for _, ticks in batches] == [100.0, 101.0, 102.0]
+    assert batches[0][1][0]["exchange_timestamp"] == datetime(2026, 10, 19, 10, 0, 5)
+    assert [chunk.ticks for chunk in journal.chunks(day)] == [2, 1]
+
+
+def test_read_seeks_to_start_time(tmp_path):
+    journal = TickJournal(tmp_path, chunk_ticks=1)
+    journal.record(_batch(1, 100.0))
+    journal.flush()
+    time.sleep(0.01)
+    cutoff = time.time()
+    journal.record(_batch(1, 101.0))
+    journal.close()
+
+    batches = list(journal.read(journal_day(cutoff), start=cutoff))
+
+    assert [ticks[0]["last_price"] for _, ticks in batches] == [101.0]
+
+
+def test_quiet_feed_is_flushed_by_the_writer(tmp_path):
+    journal = TickJournal(tmp_path, flush_seconds=0.05)
+    journal.record(_batch(1, 100.0))
+    deadline = time.time() + 2
+    while journal.written_chunks == 0 and time.time() < deadline:
+        time.sleep(0.02)
+    try:
+        assert journal.written_chunks == 1
+    finally:
+        journal.close()
+
+
+def test_torn_tail_and_missing_index_are_recovered(tmp_path):
+    journal = TickJournal(tmp_path, chunk_ticks=1)
+    journal.record(_batch(1, 100.0))
+    journal.record(_batch(1, 101.0))
+    journal.close()
+    day = journal_day(time.time())
+    data_path, index_path = tmp_path / f"{day}.ticks", tmp_path / f"{day}.idx"
+    index_path.unlink()
+    with data_path.open("ab") as handle:
+        handle.write(CHUNK_HEADER.pack(b"TKJ2", 0, 0, 1, 1, 1000))
+
+    assert [ticks[0]["last_price"] for _, ticks in journal.read(day)] == [100.0, 101.0]
+
+
+def test_replayer_feeds_every_batch_to_its_sink(tmp_path):
+    journal = TickJournal(tmp_path, chunk_ticks=2)
+    for price in (100.0, 101.0, 102.0, 103.0, 104.0):
+        journal.record(_batch(1, price))
+    journal.close()
+    received = []
+
+    state = TickReplayer(journal, received.extend).run(journal_day(time.time()), speed=None)
+
+    assert [tick["last_price"] for tick in received] == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert state["batches"] == 5 and state["ticks"] == 5
+    assert state["error"] is None and not state["running"]
+
+
+def test_replayer_stops_and_reports_a_failing_sink(tmp_path):
+    journal = TickJournal(tmp_path, chunk_ticks=1)
+    for price in (100.0, 101.0, 102.0):
+        journal.record(_batch(1, price))
+    journal.close()
+    received = []
+
+    def sink(ticks):
+        if received:
+            raise RuntimeError("aggregator down")
+        received.extend(ticks)
+
+    state = TickReplayer(journal, sink).run(journal_day(time.time()), speed=None)
+
+    assert len(received) == 1 and state["batches"] == 1
+    assert state["error"] == "aggregator down"
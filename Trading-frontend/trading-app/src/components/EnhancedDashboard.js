@@ -381,7 +381,9 @@ const EnhancedDashboard = () => {
             return;
         }
         try {
-            const data = await fetchHistoricalData(token, scale);
+            // Candles narrower than ~2px are never drawn; let the server bucket them.
+            const maxPoints = Math.max(100, Math.floor(window.innerWidth / 2));
+            const data = await fetchHistoricalData(token, scale, maxPoints);
             setModalChartData(Array.isArray(data) ? data : []);
         } catch (error) {
             console.error("Failed to load historical data", error);
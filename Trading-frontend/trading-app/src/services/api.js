@@ -98,9 +98,9 @@ export const fetchStrategies = async () => {
   return response.data;
 };
 
-export const fetchHistoricalData = async (instrumentToken, scale) => {
+export const fetchHistoricalData = async (instrumentToken, scale, maxPoints) => {
   const response = await api.get('/market/historical-data', {
-    params: { instrument_token: instrumentToken, scale },
+    params: { instrument_token: instrumentToken, scale, max_points: maxPoints },
     headers: getAuthHeaders(),
   });
   return response.data;